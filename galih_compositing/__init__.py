@@ -0,0 +1,4428 @@
+bl_info = {
+    "name": "Compositing by Galih 2025",
+    "author": "Your Name",
+    "version": (1, 38),
+    "blender": (4, 5, 0),
+    "location": "Compositor > Sidebar > Galih@2025",
+    "description": "Proper node connections with Set Alpha -> Denoise -> Output for specific passes",
+    "category": "Compositing",
+}
+
+import bpy
+from bpy.app.handlers import persistent
+import argparse
+import concurrent.futures
+import csv
+import glob
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import zlib
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+# Pass tables, socket discovery and the plan compiler are bpy-free, in the compositing_plan submodule
+if "compositing_plan" in globals():
+    # Reload Scripts re-executes this file in the same namespace, pick up compiler changes with it
+    importlib.reload(compositing_plan)
+from . import compositing_plan
+from .compositing_plan import (
+    DEFAULT_PASSES, get_default_denoise_flags, CRYPTOMATTE_PASSES, CRYPTOMATTE_TYPES, get_cryptomatte_passes,
+    EXR_PASSES, PASS_MAP,
+    SOCKET_LOOKUP_LEVELS, SOCKET_REGISTRY, discover_sockets,
+    BuildProfiler, profile_stage, profile_count, set_build_profiler,
+    PLAN_VERSION, SettingsSnapshot, LayerInputs, FormatPlan, FilterGroupPlan, NodePlan, LinkPlan, PNG_FORMAT,
+    OUTPUT_TARGETS,
+    get_encoded_format, resolve_base_path, get_staged_base, count_oidn_runs, count_filter_layouts, get_graph_plan,
+    clear_plan_cache,
+)
+
+# -------------------------------------------------------
+# RENDER LAYERS SOCKETS - Enabled outputs of the Render Layers nodes, classified by discover_sockets
+# -------------------------------------------------------
+
+def get_enabled_socket_names(node):
+    """Output sockets Blender actually provides, disabled pass sockets are kept on the node but unavailable."""
+    return tuple(sock.name for sock in node.outputs if sock.enabled)
+
+def get_output_socket(node, pass_name):
+    """Render Layers output socket of a pass, through the node's cached discovery."""
+    if not node:
+        return None
+    socket_name = get_socket_routes(node).passes.get(pass_name)
+    return node.outputs.get(socket_name) if socket_name else None
+
+# -------------------------------------------------------
+# PANEL CACHE - Enabled passes per view layer, invalidated by depsgraph updates
+# -------------------------------------------------------
+
+# (scene pointer, view layer name) -> frozenset of enabled DEFAULT_PASSES
+_enabled_pass_cache = {}
+# Render Layers node pointer -> SocketRoutes of its enabled outputs
+_socket_routes_cache = {}
+# scene pointer -> EnumProperty items for selected_view_layer (kept alive for Blender)
+_view_layer_items_cache = {}
+
+def invalidate_pass_cache():
+    """Drop all cached pass/socket lookups, the next draw rebuilds what it needs."""
+    _enabled_pass_cache.clear()
+    _socket_routes_cache.clear()
+    _view_layer_items_cache.clear()
+
+def get_socket_routes(node):
+    """Return the cached SocketRoutes of a Render Layers node."""
+    key = node.as_pointer()
+    routes = _socket_routes_cache.get(key)
+    if routes is None:
+        routes = discover_sockets(get_enabled_socket_names(node))
+        _socket_routes_cache[key] = routes
+    return routes
+
+def find_render_layers_node(node_tree, view_layer_name):
+    """Find the Render Layers node for a view layer, by generated name first."""
+    node = node_tree.nodes.get(f"RenderLayers_{view_layer_name}")
+    if node is not None and node.type == 'R_LAYERS' and node.layer == view_layer_name:
+        return node
+    return next((node for node in node_tree.nodes if node.type == 'R_LAYERS' and node.layer == view_layer_name), None)
+
+def get_enabled_passes(scene, view_layer):
+    """Cached set of DEFAULT_PASSES available on a view layer."""
+    key = (scene.as_pointer(), view_layer.name)
+    enabled = _enabled_pass_cache.get(key)
+    if enabled is not None:
+        return enabled
+
+    render_layers = find_render_layers_node(scene.node_tree, view_layer.name) if scene.node_tree else None
+    if render_layers:
+        routes = get_socket_routes(render_layers).passes
+        enabled = frozenset(p for p in DEFAULT_PASSES if p in routes)
+    else:
+        enabled = frozenset(p for p in DEFAULT_PASSES if getattr(view_layer.cycles, PASS_MAP.get(p, ''), False))
+    _enabled_pass_cache[key] = enabled
+    return enabled
+
+def get_view_layer_items(self, context):
+    """EnumProperty items for selected_view_layer, cached per scene."""
+    scene = context.scene
+    items = _view_layer_items_cache.get(scene.as_pointer())
+    if items is None:
+        items = [(vl.name, vl.name, "") for vl in scene.view_layers]
+        _view_layer_items_cache[scene.as_pointer()] = items
+    return items
+
+@persistent
+def invalidate_pass_cache_on_depsgraph(scene, depsgraph):
+    # Pass toggles tag the scene, Prefetch/Generate tag the compositor node tree
+    if depsgraph.id_type_updated('SCENE') or depsgraph.id_type_updated('NODETREE'):
+        invalidate_pass_cache()
+
+def update_preview_mode(self, context):
+    """Property update: switch the generated graph between final and preview in place."""
+    apply_preview_mode(self.id_data, self.preview_mode)
+
+class CompositingSettings(bpy.types.PropertyGroup):
+    set_alpha_passes: bpy.props.BoolVectorProperty(
+        name="Set Alpha Passes",
+        description="Select passes that require Set Alpha",
+        default=[False] * len(DEFAULT_PASSES),
+        size=len(DEFAULT_PASSES),
+    )
+    denoise_passes: bpy.props.BoolVectorProperty(
+        name="Denoise Passes",
+        description="Select passes that require Denoise",
+        default=get_default_denoise_flags(),
+        size=len(DEFAULT_PASSES),
+    )
+    use_denoise_albedo: bpy.props.BoolVectorProperty(
+        name="Use Denoise Albedo",
+        description="Use Denoising Albedo for the selected passes",
+        default=[False] * len(DEFAULT_PASSES),
+        size=len(DEFAULT_PASSES),
+    )
+    use_denoise_normal: bpy.props.BoolVectorProperty(
+        name="Use Denoise Normal",
+        description="Use Denoising Normal for the selected passes",
+        default=[False] * len(DEFAULT_PASSES),
+        size=len(DEFAULT_PASSES),
+    )
+    denoise_mode: bpy.props.EnumProperty(
+        name="Denoise Mode",
+        description="Choose the denoising mode",
+        items=[
+            ('FAST', 'Fast', 'Use fast denoising'),
+            ('ACCURATE', 'Accurate', 'Use accurate denoising'),
+        ],
+        default='FAST',
+    )
+    base_path: bpy.props.StringProperty(
+        name="Base Path",
+        description="Base directory for output files",
+        default="//",
+        subtype='DIR_PATH',
+    )
+    noise_threshold: bpy.props.FloatProperty(
+        name="Noise Threshold",
+        description="Analyze Noise denoises passes whose relative noise (high-frequency energy / signal) is above this",
+        default=0.02,
+        min=0.0,
+        max=1.0,
+        precision=3,
+    )
+    use_prefix: bpy.props.BoolProperty(
+        name="Use Prefix",
+        default=False,
+    )
+    prefix_text: bpy.props.StringProperty(
+        name="Prefix Text",
+        default="",
+    )
+    use_suffix: bpy.props.BoolProperty(
+        name="Use Suffix",
+        default=False,
+    )
+    suffix_text: bpy.props.StringProperty(
+        name="Suffix Text",
+        default="",
+    )
+    selected_view_layer: bpy.props.EnumProperty(
+        name="View Layer",
+        description="Select the view layer to use",
+        items=get_view_layer_items,
+    )
+    keep_existing_path: bpy.props.BoolProperty(
+        name="Keep Existing Nodes",
+        description="Whether to keep existing compositing nodes or delete them",
+        default=False,
+    )
+    # Quality trade-off: the guides are cleaned with plain Denoise nodes (normals remapped to 0..1,
+    # denoised, remapped and renormalised), which approximates the ACCURATE aux prefilter of OIDN
+    # instead of reproducing it. Off by default, check the frames with Compare Denoise Layouts first.
+    shared_prefilter: bpy.props.BoolProperty(
+        name="Shared Prefilter",
+        description=("Prefilter Denoising Albedo/Normal once per view layer and feed the cleaned passes to every "
+                     "Denoise node. Much faster with many denoised passes, but only approximates the accurate "
+                     "prefilter, compare both layouts before using it for final renders"),
+        default=False,
+    )
+    use_staging: bpy.props.BoolProperty(
+        name="Stage Locally",
+        description="File Outputs write to a local scratch folder, background threads move finished frames to the base path",
+        default=False,
+    )
+    staging_root: bpy.props.StringProperty(
+        name="Staging Root",
+        description="Local scratch folder, the same path on every render machine (empty: system temp folder)",
+        default="",
+        subtype='DIR_PATH',
+    )
+    staging_threads: bpy.props.IntProperty(
+        name="Transfer Threads",
+        description="Threads moving staged files to the base path",
+        default=4,
+        min=1,
+        max=32,
+    )
+    staging_retries: bpy.props.IntProperty(
+        name="Transfer Retries",
+        description="Attempts per file after a failed or unverified copy, the file stays in the scratch folder after the last",
+        default=3,
+        min=0,
+        max=10,
+    )
+    staging_batch: bpy.props.IntProperty(
+        name="Transfer Batch",
+        description="Files handed to a transfer thread at once",
+        default=16,
+        min=1,
+        max=256,
+    )
+    encoding_profile: bpy.props.StringProperty(
+        name="Encoding Profile",
+        description="JSON profile from Benchmark Encoding that overrides PNG compression and EXR codecs per output node",
+        default="",
+        subtype='FILE_PATH',
+    )
+    reconcile_existing: bpy.props.BoolProperty(
+        name="Update In Place",
+        description="Match generated nodes by name and only add, remove or relink what changed",
+        default=False,
+    )
+    output_layout: bpy.props.EnumProperty(
+        name="Output Layout",
+        description="How beauty and lighting passes are written per view layer",
+        items=[
+            ('SEPARATE', 'Separate Files', 'One PNG per pass and frame'),
+            ('CONSOLIDATED', 'Single EXR', 'One multilayer EXR per view layer and frame, layers named like the PNG folders'),
+        ],
+        default='SEPARATE',
+    )
+    merge_cryptomatte: bpy.props.BoolProperty(
+        name="Merge Cryptomatte",
+        description="Also write the cryptomatte passes into the single EXR (written as 32-bit float PIZ then)",
+        default=False,
+    )
+    use_node_groups: bpy.props.BoolProperty(
+        name="Group Set Alpha/Denoise",
+        description="Route passes with the same Set Alpha/Denoise settings through one shared node group instead of loose nodes per pass",
+        default=True,
+    )
+    preview_mode: bpy.props.BoolProperty(
+        name="Lookdev Preview",
+        description="Mute Denoise and cryptomatte outputs, write 8-bit PNG with light compression; turn off to restore final quality",
+        default=False,
+        update=update_preview_mode,
+    )
+    preview_resolution: bpy.props.IntProperty(
+        name="Preview Resolution",
+        description="Render resolution percentage while the preview is on (100 keeps the scene's)",
+        default=100,
+        min=10,
+        max=100,
+        subtype='PERCENTAGE',
+        update=update_preview_mode,
+    )
+    deferred_compression: bpy.props.BoolProperty(
+        name="Deferred PNG Compression",
+        description="Write PNGs uncompressed during rendering and recompress them to the final level on background threads",
+        default=False,
+    )
+    recompress_threads: bpy.props.IntProperty(
+        name="Recompress Threads",
+        description="Threads recompressing PNGs while rendering",
+        default=2,
+        min=1,
+        max=32,
+    )
+    recompress_queue: bpy.props.IntProperty(
+        name="Recompress Queue",
+        description="Files waiting for recompression before the render waits for the pool",
+        default=256,
+        min=1,
+    )
+    deduplicate_frames: bpy.props.BoolProperty(
+        name="Deduplicate Static Frames",
+        description="After each frame, compare every output file with the previous frame of the same slot and share identical ones",
+        default=False,
+    )
+    dedupe_mode: bpy.props.EnumProperty(
+        name="Duplicates",
+        description="What happens to a file identical to the previous frame",
+        items=[
+            ('HARDLINK', 'Hardlink', 'Replace the file with a hardlink to the first frame of the run (falls back to the manifest)'),
+            ('MANIFEST', 'Manifest Only', 'Keep the file, only record it in <sequence>_dedupe.json for transfers to skip'),
+        ],
+        default='HARDLINK',
+    )
+    index_cryptomatte: bpy.props.BoolProperty(
+        name="Index Cryptomatte",
+        description="After rendering, write a manifest index next to each cryptomatte sequence (read from the EXR headers only)",
+        default=False,
+    )
+    memory_budget_gb: bpy.props.FloatProperty(
+        name="Memory Budget (GB)",
+        description="Warn when the estimated compositor memory per frame exceeds this (0 disables the check)",
+        default=0.0,
+        min=0.0,
+    )
+    disk_budget_gb: bpy.props.FloatProperty(
+        name="Disk Budget (GB)",
+        description="Warn when the estimated size of all output sequences exceeds this (0: only check free space)",
+        default=0.0,
+        min=0.0,
+    )
+    footprint_calibration: bpy.props.StringProperty(
+        name="Footprint Calibration",
+        description="JSON file with compression ratios measured from rendered frames (Calibrate writes it)",
+        default="//footprint_calibration.json",
+        subtype='FILE_PATH',
+    )
+    profile_build: bpy.props.BoolProperty(
+        name="Profile Build",
+        description="Time each stage of GENERATE NODES / Prefetch Passes and write a JSON report",
+        default=False,
+    )
+    profile_report_path: bpy.props.StringProperty(
+        name="Profile Report",
+        description="Where the build profile JSON is written (blend-relative paths allowed)",
+        default="//build_profile.json",
+        subtype='FILE_PATH',
+    )
+    telemetry_enabled: bpy.props.BoolProperty(
+        name="Render Telemetry",
+        description="Log render, compositing and write times plus bytes per File Output node for every rendered frame",
+        default=False,
+    )
+    telemetry_path: bpy.props.StringProperty(
+        name="Telemetry Log",
+        description="Telemetry log file, .csv for one row per frame and output node, anything else for JSON lines",
+        default="//render_telemetry.jsonl",
+        subtype='FILE_PATH',
+    )
+
+# -------------------------------------------------------
+# NEW OPERATOR: Restore Default Settings
+# -------------------------------------------------------
+
+class RestoreDefaultSettings(bpy.types.Operator):
+    bl_idname = "nodes.restore_default_settings"
+    bl_label = "Default"
+    bl_description = "Restore default checkbox settings"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        
+        # Restore default values
+        settings.set_alpha_passes = [False] * len(DEFAULT_PASSES)
+        settings.denoise_passes = get_default_denoise_flags()
+        settings.use_denoise_albedo = [False] * len(DEFAULT_PASSES)
+        settings.use_denoise_normal = [False] * len(DEFAULT_PASSES)
+        
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# UPDATED PREFETCH OPERATOR - Creates Render Layers nodes for each view layer
+# -------------------------------------------------------
+
+class PrefetchPasses(bpy.types.Operator):
+    bl_idname = "nodes.prefetch_passes"
+    bl_label = "Prefetch Passes"
+    bl_description = "Create Render Layers nodes for all available view layers"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        scene = context.scene
+        
+        # Ensure we're in compositing mode with nodes enabled
+        scene.use_nodes = True
+        node_tree = scene.node_tree
+        
+        # Get all available view layers
+        view_layers = context.scene.view_layers
+        
+        if not view_layers:
+            self.report({'WARNING'}, "No view layers found in scene")
+            return {'CANCELLED'}
+        
+        profiler = begin_build_profile(scene.compositing_settings, "Prefetch Passes")
+        try:
+            # Remove existing render layer nodes to avoid duplicates
+            with profile_stage("remove_render_layers"):
+                existing_render_nodes = [node for node in node_tree.nodes if node.type == 'R_LAYERS']
+                for node in existing_render_nodes:
+                    node_tree.nodes.remove(node)
+                profile_count("nodes_removed", len(existing_render_nodes))
+
+            # Starting position for the first node
+            x_pos = -1600
+            y_pos = 0
+
+            # Create a Render Layers node for each view layer
+            for view_layer in view_layers:
+                with profile_stage("render_layers", view_layer.name):
+                    # Create the Render Layers node
+                    with profile_stage("nodes.new"):
+                        render_node = node_tree.nodes.new('CompositorNodeRLayers')
+                    render_node.name = f"RenderLayers_{view_layer.name}"
+                    render_node.label = f"RenderLayers_{view_layer.name}"
+                    render_node.location = (x_pos, y_pos)
+                    render_node.layer = view_layer.name
+                    profile_count("nodes_added")
+
+                # Position the next node to the right
+                x_pos += 300
+
+            invalidate_pass_cache()
+        finally:
+            end_build_profile(profiler, scene.compositing_settings)
+        self.report({'INFO'}, f"Created {len(view_layers)} Render Layers nodes")
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# EXISTING OPERATORS (unchanged)
+# -------------------------------------------------------
+
+class ToggleAllSetAlpha(bpy.types.Operator):
+    bl_idname = "nodes.toggle_all_set_alpha"
+    bl_label = "Toggle All Set Alpha"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        current_state = settings.set_alpha_passes[0]
+        new_state = not current_state
+        for i in range(len(DEFAULT_PASSES)):
+            settings.set_alpha_passes[i] = new_state
+        return {'FINISHED'}
+
+class ToggleAllDenoise(bpy.types.Operator):
+    bl_idname = "nodes.toggle_all_denoise"
+    bl_label = "Toggle All Denoise"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        current_state = settings.denoise_passes[0]
+        new_state = not current_state
+        for i in range(len(DEFAULT_PASSES)):
+            settings.denoise_passes[i] = new_state
+        return {'FINISHED'}
+
+class ToggleAllAlbedo(bpy.types.Operator):
+    bl_idname = "nodes.toggle_all_albedo"
+    bl_label = "Toggle All Albedo"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        current_state = settings.use_denoise_albedo[0]
+        new_state = not current_state
+        for i in range(len(DEFAULT_PASSES)):
+            settings.use_denoise_albedo[i] = new_state
+        return {'FINISHED'}
+
+class ToggleAllNormal(bpy.types.Operator):
+    bl_idname = "nodes.toggle_all_normal"
+    bl_label = "Toggle All Normal"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        current_state = settings.use_denoise_normal[0]
+        new_state = not current_state
+        for i in range(len(DEFAULT_PASSES)):
+            settings.use_denoise_normal[i] = new_state
+        return {'FINISHED'}
+
+class UncheckAllPasses(bpy.types.Operator):
+    bl_idname = "nodes.uncheck_all_passes"
+    bl_label = "Uncheck All"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        for i in range(len(DEFAULT_PASSES)):
+            settings.set_alpha_passes[i] = False
+            settings.denoise_passes[i] = False
+            settings.use_denoise_albedo[i] = False
+            settings.use_denoise_normal[i] = False
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# BUILD PROFILER - Optional stage timings and counters for node generation
+# -------------------------------------------------------
+
+# Report of the last profiled build, shown in the sidebar
+_last_build_report = None
+
+def begin_build_profile(settings, label):
+    """Start profiling a build if enabled in the settings, return the profiler or None."""
+    profiler = BuildProfiler(label) if settings.profile_build else None
+    set_build_profiler(profiler)
+    return profiler
+
+def resolve_report_path(path):
+    """Absolute path of a report file, blend-relative paths go to the temp dir for unsaved files."""
+    if path.startswith("//") and not bpy.data.filepath:
+        return os.path.join(tempfile.gettempdir(), path[2:])
+    return bpy.path.abspath(path)
+
+def write_build_report(report, path):
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    except OSError as exc:
+        print(f"Could not write build profile {path}: {exc}")
+
+def end_build_profile(profiler, settings):
+    """Finish the build profile, store it for the panel and write the JSON report."""
+    global _last_build_report
+    set_build_profiler(None)
+    if profiler is None:
+        return None
+    report = profiler.to_dict()
+    path = resolve_report_path(settings.profile_report_path or "//build_profile.json")
+    report["report_path"] = path
+    _last_build_report = report
+    write_build_report(report, path)
+
+    # The undo push and redraw happen after execute() returns, time them with a one-shot timer
+    finished = time.perf_counter()
+
+    def record_post_operator():
+        report["stages_s"]["undo_push_and_redraw"] = round(time.perf_counter() - finished, 6)
+        write_build_report(report, path)
+        return None
+
+    bpy.app.timers.register(record_post_operator, first_interval=0.0)
+    return report
+
+# -------------------------------------------------------
+# GRAPH PLAN INPUTS - Settings and view layers frozen for the compiler in compositing_plan.py
+# -------------------------------------------------------
+
+def snapshot_settings(settings, warnings=None):
+    """Freeze the CompositingSettings into a hashable SettingsSnapshot, problems with them go to warnings."""
+    base_path = settings.base_path
+    # If base_path is empty, use default
+    if not base_path or base_path == "//":
+        base_path = "/tmp"
+    # Convert relative paths to absolute
+    if base_path.startswith("//"):
+        base_path = bpy.path.abspath(base_path)
+
+    def selected(flags):
+        return tuple(pass_name for pass_name, enabled in zip(DEFAULT_PASSES, flags) if enabled)
+
+    return SettingsSnapshot(
+        set_alpha=selected(settings.set_alpha_passes),
+        denoise=selected(settings.denoise_passes),
+        albedo=selected(settings.use_denoise_albedo),
+        normal=selected(settings.use_denoise_normal),
+        denoise_mode=settings.denoise_mode,
+        shared_prefilter=settings.shared_prefilter,
+        base_path=base_path,
+        prefix=settings.prefix_text if settings.use_prefix else "",
+        suffix=settings.suffix_text if settings.use_suffix else "",
+        encoding=load_encoding_profile(settings.encoding_profile, warnings),
+        group_filters=settings.use_node_groups,
+        consolidated=settings.output_layout == 'CONSOLIDATED',
+        merge_cryptomatte=settings.merge_cryptomatte,
+        deferred_compression=settings.deferred_compression,
+        staging_root=get_staging_root(settings) if settings.use_staging else "",
+    )
+
+def get_layer_inputs(view_layer, render_layers):
+    """Describe a view layer and the sockets of its Render Layers node."""
+    return LayerInputs(
+        view_layer.name,
+        tuple(sorted(get_enabled_socket_names(render_layers))),
+        get_cryptomatte_passes(view_layer),
+        tuple((aov.name, aov.type) for aov in view_layer.aovs),
+        tuple(lightgroup.name for lightgroup in view_layer.lightgroups),
+    )
+
+def get_staging_root(settings):
+    if settings.staging_root:
+        return bpy.path.abspath(settings.staging_root)
+    return os.path.join(tempfile.gettempdir(), "compositing_staging")
+
+def get_staging_map(snapshot, view_layer_names):
+    """{staged base: base path} for the view layers of a plan, empty when staging is off."""
+    if not snapshot.staging_root:
+        return {}
+    bases = {resolve_base_path(snapshot.base_path, name) for name in view_layer_names}
+    return {get_staged_base(snapshot.staging_root, base): bpy.path.abspath(base) for base in bases}
+
+# -------------------------------------------------------
+# GRAPH RECONCILE HELPERS - Deterministic node names so reruns can update in place
+# -------------------------------------------------------
+
+# Name prefixes of the nodes owned by GENERATE NODES, with the node type they must have
+MANAGED_NODE_PREFIXES = {
+    "RenderLayers_": 'R_LAYERS',
+    **{target.node_prefix: 'OUTPUT_FILE' for target in OUTPUT_TARGETS.values()},
+    "SetAlpha_": 'SETALPHA',
+    "Denoise_": 'DENOISE',
+    "Prefilter_": 'DENOISE',
+    "PrefilterRemap_": 'MIX_RGB',
+    "PrefilterSplit_": 'SEPARATE_XYZ',
+    "PrefilterMath_": 'MATH',
+    "PassFilter_": 'GROUP',
+}
+
+def is_managed_node(node):
+    """Return True if the node was generated by AutoCompositingSetup."""
+    for prefix, node_type in MANAGED_NODE_PREFIXES.items():
+        if node.name.startswith(prefix) and node.type == node_type:
+            return True
+    return False
+
+def assign_prop(target, attr_path, value):
+    """Set a (dotted, optionally indexed) attribute only when it differs, return True if it changed."""
+    *parents, attr = attr_path.split(".")
+    for parent in parents:
+        parent, _, index = parent.partition("[")
+        target = getattr(target, parent)
+        if index:
+            target = target[int(index.rstrip("]"))]
+    current = getattr(target, attr)
+    if isinstance(value, tuple):
+        current = tuple(current)
+    if current == value:
+        return False
+    setattr(target, attr, value)
+    return True
+
+def get_slot_inputs(node):
+    """Map each File Output slot path (layer name for multilayer EXR) to its input socket."""
+    if node.format.file_format == 'OPEN_EXR_MULTILAYER':
+        return {slot.name: node.inputs[i] for i, slot in enumerate(node.layer_slots)}
+    return {slot.path: node.inputs[i] for i, slot in enumerate(node.file_slots)}
+
+def get_input_keys(node):
+    """
+    Map input socket pointers to a stable key: the slot path on File Output nodes, otherwise the
+    socket name, or the identifier ('Image_001') for an input repeating an earlier name (Mix, Math).
+    """
+    if node.type == 'OUTPUT_FILE':
+        return {sock.as_pointer(): key for key, sock in get_slot_inputs(node).items()}
+    keys = {}
+    names = set()
+    for sock in node.inputs:
+        keys[sock.as_pointer()] = sock.identifier if sock.name in names else sock.name
+        names.add(sock.name)
+    return keys
+
+def get_input_socket(node, key):
+    """Input socket for a key of get_input_keys."""
+    sock = node.inputs.get(key)
+    if sock is None:
+        sock = next((sock for sock in node.inputs if sock.identifier == key), None)
+    return sock
+
+# Marks node groups built by ensure_filter_group, bump to rebuild them after layout changes
+FILTER_GROUP_TAG = "compositing_filter_group"
+FILTER_GROUP_VERSION = 1
+
+def ensure_filter_group(group_plan):
+    """Return the shared node group for this pass chain, building it when missing."""
+    group = bpy.data.node_groups.get(group_plan.name)
+    if group is not None and group.get(FILTER_GROUP_TAG) == FILTER_GROUP_VERSION:
+        return group
+    if group is None:
+        group = bpy.data.node_groups.new(group_plan.name, 'CompositorNodeTree')
+    group.nodes.clear()
+    group.interface.clear()
+
+    interface = group.interface
+    for pass_name in group_plan.passes:
+        interface.new_socket(pass_name, in_out='INPUT', socket_type='NodeSocketColor')
+    if group_plan.set_alpha:
+        interface.new_socket("Alpha", in_out='INPUT', socket_type='NodeSocketFloat')
+    if group_plan.albedo:
+        interface.new_socket("Albedo", in_out='INPUT', socket_type='NodeSocketColor')
+    if group_plan.normal:
+        interface.new_socket("Normal", in_out='INPUT', socket_type='NodeSocketVector')
+    for pass_name in group_plan.passes:
+        interface.new_socket(pass_name, in_out='OUTPUT', socket_type='NodeSocketColor')
+
+    nodes = group.nodes
+    links = group.links
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = (-400, 0)
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = (400, 0)
+
+    # One Set Alpha -> Denoise row per pass
+    for row, pass_name in enumerate(group_plan.passes):
+        source = group_input.outputs[pass_name]
+        if group_plan.set_alpha:
+            set_alpha = nodes.new('CompositorNodeSetAlpha')
+            set_alpha.location = (-200, -row * 250)
+            links.new(source, set_alpha.inputs["Image"])
+            links.new(group_input.outputs["Alpha"], set_alpha.inputs["Alpha"])
+            source = set_alpha.outputs["Image"]
+        if group_plan.prefilter is not None:
+            denoise = nodes.new('CompositorNodeDenoise')
+            denoise.location = (100, -row * 250)
+            denoise.prefilter = group_plan.prefilter
+            links.new(source, denoise.inputs["Image"])
+            if group_plan.albedo:
+                links.new(group_input.outputs["Albedo"], denoise.inputs["Albedo"])
+            if group_plan.normal:
+                links.new(group_input.outputs["Normal"], denoise.inputs["Normal"])
+            source = denoise.outputs["Image"]
+        links.new(source, group_output.inputs[pass_name])
+
+    group[FILTER_GROUP_TAG] = FILTER_GROUP_VERSION
+    return group
+
+def set_node_group(node, group):
+    """Point a group node at a node group with the same sockets, keeping its links by socket name."""
+    if node.node_tree is group:
+        return False
+    links = node.id_data.links
+    inputs = [(link.from_socket, sock.name) for sock in node.inputs for link in sock.links]
+    outputs = [(sock.name, link.to_socket) for sock in node.outputs for link in sock.links]
+    node.node_tree = group
+    for from_socket, name in inputs:
+        sock = node.inputs.get(name)
+        if sock is not None and not sock.is_linked:
+            links.new(from_socket, sock)
+    for name, to_socket in outputs:
+        sock = node.outputs.get(name)
+        if sock is not None and not to_socket.is_linked:
+            links.new(sock, to_socket)
+    return True
+
+class GraphApplier:
+    """Apply a GraphPlan to a node tree, reusing nodes by name when reconciling."""
+
+    def __init__(self, node_tree, reuse):
+        self.node_tree = node_tree
+        self.reuse = reuse
+        self.wanted = {}
+        self.nodes_added = 0
+        self.nodes_removed = 0
+        self.slots_added = 0
+        self.slots_removed = 0
+        self.links_added = 0
+        self.links_removed = 0
+
+    def ensure_node(self, node_plan):
+        nodes = self.node_tree.nodes
+        node = self.wanted.get(node_plan.name)
+        if node is None and self.reuse:
+            node = nodes.get(node_plan.name)
+        if node is not None and node.bl_idname != node_plan.bl_idname:
+            nodes.remove(node)
+            self.nodes_removed += 1
+            node = None
+        if node is None:
+            with profile_stage("nodes.new"):
+                node = nodes.new(node_plan.bl_idname)
+            node.name = node_plan.name
+            for attr, value in node_plan.initial:
+                assign_prop(node, attr, value)
+            self.nodes_added += 1
+        if node_plan.group is not None:
+            # The plan's group is the new final one, apply_preview_mode swaps in its preview variant again
+            if PREVIEW_GROUP_PROP in node:
+                del node[PREVIEW_GROUP_PROP]
+            set_node_group(node, ensure_filter_group(node_plan.group))
+        if node_plan.format is not None:
+            # The plan's format is the new final one, apply_preview_mode records it again
+            if PREVIEW_FORMAT_PROP in node:
+                del node[PREVIEW_FORMAT_PROP]
+            for field in FormatPlan.__slots__:
+                value = getattr(node_plan.format, field)
+                if value is not None:
+                    assign_prop(node.format, field, value)
+        for attr, value in node_plan.props:
+            assign_prop(node, attr, value)
+        self.wanted[node_plan.name] = node
+        return node
+
+    def apply_nodes(self, layer_plan):
+        for node_plan in layer_plan.nodes:
+            node = self.ensure_node(node_plan)
+            if node_plan.bl_idname != 'CompositorNodeOutputFile':
+                continue
+
+            # Keep existing slots that are still wanted, drop the rest, append the missing ones
+            existing = get_slot_inputs(node)
+            wanted_slots = frozenset(node_plan.slots)
+            for path, sock in existing.items():
+                if path not in wanted_slots:
+                    node.file_slots.remove(sock)
+                    self.slots_removed += 1
+            with profile_stage("file_slots.new"):
+                for path in node_plan.slots:
+                    if path not in existing:
+                        node.file_slots.new(path)
+                        self.slots_added += 1
+
+    def remove_stale_nodes(self):
+        """Remove generated nodes that are no longer part of the plan."""
+        for node in [n for n in self.node_tree.nodes if is_managed_node(n) and n.name not in self.wanted]:
+            self.node_tree.nodes.remove(node)
+            self.nodes_removed += 1
+
+    def apply_links(self, plan):
+        node_tree = self.node_tree
+        desired = set()
+        for layer_plan in plan.layers:
+            desired.update(layer_plan.links)
+
+        # Index the current links into generated nodes with a single pass over the tree
+        wanted_names = {node.as_pointer(): name for name, node in self.wanted.items()}
+        input_keys = {name: get_input_keys(node) for name, node in self.wanted.items()}
+        existing = set()
+        # Inputs fed by the user's own nodes (a Color Correction inserted before a slot): kept, not rewired
+        user_inputs = set()
+        for link in list(node_tree.links):
+            to_name = wanted_names.get(link.to_node.as_pointer())
+            if to_name is None:
+                continue
+            from_name = wanted_names.get(link.from_node.as_pointer(), link.from_node.name)
+            key = LinkPlan(from_name, link.from_socket.name, to_name,
+                           input_keys[to_name].get(link.to_socket.as_pointer()))
+            if key in desired and key not in existing:
+                existing.add(key)
+            elif not is_managed_node(link.from_node):
+                user_inputs.add((to_name, key.to_socket))
+            else:
+                node_tree.links.remove(link)
+                self.links_removed += 1
+
+        slot_inputs = {}
+        for link_plan in desired - existing:
+            if (link_plan.to_node, link_plan.to_socket) in user_inputs:
+                continue
+            from_node = self.wanted.get(link_plan.from_node) or node_tree.nodes.get(link_plan.from_node)
+            to_node = self.wanted[link_plan.to_node]
+            if to_node.type == 'OUTPUT_FILE':
+                if link_plan.to_node not in slot_inputs:
+                    slot_inputs[link_plan.to_node] = get_slot_inputs(to_node)
+                target = slot_inputs[link_plan.to_node].get(link_plan.to_socket)
+            else:
+                target = get_input_socket(to_node, link_plan.to_socket)
+            source = from_node.outputs.get(link_plan.from_socket) if from_node else None
+            if source and target:
+                node_tree.links.new(source, target)
+                self.links_added += 1
+
+    def apply(self, plan):
+        for layer_plan in plan.layers:
+            with profile_stage("apply_nodes", layer_plan.view_layer):
+                self.apply_nodes(layer_plan)
+        if self.reuse:
+            with profile_stage("remove_stale_nodes"):
+                self.remove_stale_nodes()
+        with profile_stage("apply_links"):
+            self.apply_links(plan)
+        for field in ("nodes_added", "nodes_removed", "slots_added", "slots_removed", "links_added", "links_removed"):
+            profile_count(field, getattr(self, field))
+
+    def summary(self):
+        return (f"+{self.nodes_added}/-{self.nodes_removed} nodes, "
+                f"+{self.slots_added}/-{self.slots_removed} slots, "
+                f"+{self.links_added}/-{self.links_removed} links")
+
+# Node and link totals of the last generated setup, loose vs grouped
+_last_group_stats = None
+
+# Scene ID property holding the fingerprint of the plan GENERATE NODES last applied
+SETUP_FINGERPRINT_PROP = "compositing_setup_fingerprint"
+# Scene ID property holding {staged base: base path} (JSON) while the outputs are staged locally
+STAGING_MAP_PROP = "compositing_staging_map"
+
+# -------------------------------------------------------
+# LOOKDEV PREVIEW - Lightweight variant of the generated graph, toggled in place
+# -------------------------------------------------------
+
+PREVIEW_PNG_DEPTH = '8'
+PREVIEW_PNG_COMPRESSION = 0  # no deflate effort, preview files are throwaway
+# Scene ID property holding the resolution percentage to restore when leaving the preview
+PREVIEW_RESOLUTION_PROP = "compositing_final_resolution"
+# File Output ID property holding the format values to restore when leaving the preview
+PREVIEW_FORMAT_PROP = "compositing_final_format"
+# Filter group node ID property holding the name of the node group to restore when leaving the preview
+PREVIEW_GROUP_PROP = "compositing_final_group"
+
+def get_node_target(node_name):
+    """The OutputTarget whose node prefix a generated File Output name starts with."""
+    return next((target for target in OUTPUT_TARGETS.values() if node_name.startswith(target.node_prefix)), None)
+
+def get_preview_filter_group(group):
+    """
+    The variant of a filter group built by ensure_filter_group without its Denoise rows: the same
+    sockets (read back from its interface), Set Alpha kept, so only the Denoise step is bypassed.
+    """
+    inputs = set()
+    passes = []
+    for item in group.interface.items_tree:
+        if item.item_type != 'SOCKET':
+            continue
+        if item.in_out == 'OUTPUT':
+            passes.append(item.name)
+        else:
+            inputs.add(item.name)
+    return ensure_filter_group(FilterGroupPlan(
+        tuple(passes), "Alpha" in inputs, None, "Albedo" in inputs, "Normal" in inputs,
+    ))
+
+def apply_preview_mode(scene, preview):
+    """
+    Switch the generated nodes between final and preview quality with mutes and format
+    changes only, so the wiring is never touched. Returns the number of changed values.
+    """
+    node_tree = scene.node_tree
+    if node_tree is None:
+        return 0
+    settings = scene.compositing_settings
+    crypto_passes = frozenset(CRYPTOMATTE_PASSES)
+    changed = 0
+
+    for node in node_tree.nodes:
+        if not is_managed_node(node):
+            continue
+        if node.type == 'DENOISE':
+            changed += assign_prop(node, "mute", preview)
+        elif node.type == 'GROUP':
+            # Shared groups are never edited: the node switches to the group variant without Denoise
+            if preview:
+                if node.node_tree is None or node.node_tree.get(FILTER_GROUP_TAG) is None:
+                    continue
+                if PREVIEW_GROUP_PROP not in node:
+                    node[PREVIEW_GROUP_PROP] = node.node_tree.name
+                changed += set_node_group(node, get_preview_filter_group(node.node_tree))
+            elif PREVIEW_GROUP_PROP in node:
+                group = bpy.data.node_groups.get(node[PREVIEW_GROUP_PROP])
+                if group is not None:
+                    changed += set_node_group(node, group)
+                del node[PREVIEW_GROUP_PROP]
+        elif node.type == 'OUTPUT_FILE':
+            target = get_node_target(node.name)
+            if target is None:
+                continue
+            if target is OUTPUT_TARGETS["Cryptomatte"]:
+                changed += assign_prop(node, "mute", preview)
+                continue
+            if target is OUTPUT_TARGETS["Combined"]:
+                # Cryptomatte merged into the combined EXR: mute those links, half float is enough without them
+                for link in node_tree.links:
+                    if link.to_node == node and link.from_socket.name in crypto_passes:
+                        changed += assign_prop(link, "is_muted", preview)
+                preview_format = {"color_depth": '16'}
+            elif node.format.file_format == 'PNG':
+                preview_format = {"color_depth": PREVIEW_PNG_DEPTH, "compression": PREVIEW_PNG_COMPRESSION}
+            else:
+                continue
+            if preview:
+                # The final values are kept on the node, whatever GENERATE NODES or the user set
+                if PREVIEW_FORMAT_PROP not in node:
+                    node[PREVIEW_FORMAT_PROP] = {field: getattr(node.format, field) for field in preview_format}
+                for field, value in preview_format.items():
+                    changed += assign_prop(node.format, field, value)
+            elif PREVIEW_FORMAT_PROP in node:
+                for field, value in dict(node[PREVIEW_FORMAT_PROP]).items():
+                    changed += assign_prop(node.format, field, value)
+                del node[PREVIEW_FORMAT_PROP]
+
+    render = scene.render
+    if preview and settings.preview_resolution < 100:
+        if PREVIEW_RESOLUTION_PROP not in scene:
+            scene[PREVIEW_RESOLUTION_PROP] = render.resolution_percentage
+        changed += assign_prop(render, "resolution_percentage",
+                               min(scene[PREVIEW_RESOLUTION_PROP], settings.preview_resolution))
+    elif PREVIEW_RESOLUTION_PROP in scene:
+        changed += assign_prop(render, "resolution_percentage", scene[PREVIEW_RESOLUTION_PROP])
+        del scene[PREVIEW_RESOLUTION_PROP]
+    return changed
+
+# -------------------------------------------------------
+# UPDATED AUTO COMPOSITING SETUP - Generates nodes for ALL view layers with SEPARATE OUTPUT NODES
+# -------------------------------------------------------
+
+class AutoCompositingSetup(bpy.types.Operator):
+    bl_idname = "nodes.auto_compositing_setup"
+    bl_label = "GENERATE NODES"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        reconcile = settings.reconcile_existing
+
+        # Get all view layers
+        view_layers = context.scene.view_layers
+        
+        if not view_layers:
+            self.report({'ERROR'}, "No view layers found in scene")
+            return {'CANCELLED'}
+
+        # Layers excluded from rendering get no nodes (reconcile removes the ones left from earlier runs)
+        disabled_layers = len([vl for vl in view_layers if not vl.use])
+        view_layers = [vl for vl in view_layers if vl.use]
+        if not view_layers:
+            self.report({'ERROR'}, "All view layers are disabled for rendering")
+            return {'CANCELLED'}
+
+        context.scene.use_nodes = True
+        node_tree = context.scene.node_tree
+
+        # Clear all nodes only if "Keep existing path" is OFF (reconcile mode updates in place instead)
+        if not reconcile and not settings.keep_existing_path:
+            node_tree.nodes.clear()
+
+        applier = GraphApplier(node_tree, reuse=reconcile)
+        profiler = begin_build_profile(settings, "GENERATE NODES")
+        try:
+            # The Render Layers nodes come first, their sockets are inputs to the plan
+            layers = []
+            for view_layer_idx, view_layer in enumerate(view_layers):
+                with profile_stage("render_layers", view_layer.name):
+                    render_layers = applier.ensure_node(NodePlan(
+                        f"RenderLayers_{view_layer.name}",
+                        'CompositorNodeRLayers',
+                        props=(("layer", view_layer.name),),
+                        initial=(
+                            ("label", f"RenderLayers_{view_layer.name}"),
+                            ("location", (-1600, -view_layer_idx * 1200)),
+                        ),
+                    ))
+                    layers.append(get_layer_inputs(view_layer, render_layers))
+
+            warnings = []
+            with profile_stage("snapshot_settings"):
+                snapshot = snapshot_settings(settings, warnings)
+            for warning in warnings:
+                self.report({'WARNING'}, warning)
+            with profile_stage("plan"):
+                plan = get_graph_plan(snapshot, layers)
+            for layer_plan in plan.layers:
+                for warning in layer_plan.warnings:
+                    self.report({'WARNING'}, warning)
+            applier.apply(plan)
+            invalidate_pass_cache()
+            context.scene[SETUP_FINGERPRINT_PROP] = plan.fingerprint
+            staging = get_staging_map(snapshot, [layer.name for layer in layers])
+            if staging:
+                context.scene[STAGING_MAP_PROP] = json.dumps(staging)
+            elif STAGING_MAP_PROP in context.scene:
+                del context.scene[STAGING_MAP_PROP]
+            # Newly created nodes are final quality, bring them in line with the preview
+            if settings.preview_mode:
+                apply_preview_mode(context.scene, True)
+        finally:
+            report = end_build_profile(profiler, settings)
+        if report is not None:
+            self.report({'INFO'}, f"Build profile: {report['total_s'] * 1000:.1f} ms, written to {report['report_path']}")
+
+        # Tree size with and without the shared Set Alpha -> Denoise groups, shown in the sidebar
+        global _last_group_stats
+        _last_group_stats = count_filter_layouts(plan, snapshot.group_filters)
+
+        skipped_outputs = sum(layer_plan.skipped_outputs for layer_plan in plan.layers)
+        if skipped_outputs or disabled_layers:
+            self.report({'INFO'}, (f"Skipped {disabled_layers} disabled view layers, "
+                                   f"avoided {skipped_outputs} empty File Output nodes"))
+        if reconcile:
+            self.report({'INFO'}, f"Updated compositing setup for {len(view_layers)} view layers ({applier.summary()})")
+        else:
+            self.report({'INFO'}, f"Generated compositing setup for {len(view_layers)} view layers with separate output nodes")
+        return {'FINISHED'}
+
+class CompareDenoiseLayouts(bpy.types.Operator):
+    bl_idname = "nodes.compare_denoise_layouts"
+    bl_label = "Compare Denoise Layouts"
+    bl_description = "Render the current frame with per-pass and shared prefiltering and report both timings"
+    bl_options = {'REGISTER'}
+
+    repeats: bpy.props.IntProperty(
+        name="Repeats",
+        description="Renders per layout, timings are averaged",
+        default=1,
+        min=1,
+        max=10,
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        settings = scene.compositing_settings
+        original_shared = settings.shared_prefilter
+        original_reconcile = settings.reconcile_existing
+        timings = {False: [], True: []}
+        oidn_runs = {}
+
+        # File Outputs still have to run (muting them would skip the Denoise nodes), so write to a temp dir
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                settings.reconcile_existing = True
+                for _ in range(self.repeats):
+                    for shared in (False, True):
+                        settings.shared_prefilter = shared
+                        bpy.ops.nodes.auto_compositing_setup()
+                        oidn_runs[shared] = count_oidn_runs(get_current_plan(scene))
+                        for node in scene.node_tree.nodes:
+                            if node.type == 'OUTPUT_FILE':
+                                node.base_path = os.path.join(temp_dir, node.name, "")
+                        start = time.perf_counter()
+                        bpy.ops.render.render(write_still=False)
+                        timings[shared].append(time.perf_counter() - start)
+            finally:
+                # Reconcile restores the real output paths
+                settings.shared_prefilter = original_shared
+                bpy.ops.nodes.auto_compositing_setup()
+                settings.reconcile_existing = original_reconcile
+
+        per_pass = sum(timings[False]) / len(timings[False])
+        shared = sum(timings[True]) / len(timings[True])
+        saved = (per_pass - shared) / per_pass * 100.0 if per_pass else 0.0
+        self.report({'INFO'}, (f"Per-pass prefilter: {per_pass:.2f}s ({oidn_runs[False]} OIDN runs), "
+                               f"shared prefilter: {shared:.2f}s ({oidn_runs[True]} OIDN runs), {saved:.1f}% saved"))
+        return {'FINISHED'}
+
+class CompareOutputLayouts(bpy.types.Operator):
+    bl_idname = "nodes.compare_output_layouts"
+    bl_label = "Compare Output Layouts"
+    bl_description = "Render the current frame with separate files and with a single EXR and report file counts, sizes and times"
+    bl_options = {'REGISTER'}
+
+    repeats: bpy.props.IntProperty(
+        name="Repeats",
+        description="Renders per layout, timings are averaged",
+        default=1,
+        min=1,
+        max=10,
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        settings = scene.compositing_settings
+        original_layout = settings.output_layout
+        original_reconcile = settings.reconcile_existing
+        results = {}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                settings.reconcile_existing = True
+                for layout in ('SEPARATE', 'CONSOLIDATED'):
+                    settings.output_layout = layout
+                    bpy.ops.nodes.auto_compositing_setup()
+                    layout_dir = os.path.join(temp_dir, layout)
+                    for node in scene.node_tree.nodes:
+                        if node.type == 'OUTPUT_FILE':
+                            node.base_path = os.path.join(layout_dir, node.name, "")
+                    timings = []
+                    for _ in range(self.repeats):
+                        start = time.perf_counter()
+                        bpy.ops.render.render(write_still=False)
+                        timings.append(time.perf_counter() - start)
+                    files = 0
+                    size = 0
+                    for root, _dirs, names in os.walk(layout_dir):
+                        for file_name in names:
+                            files += 1
+                            size += os.path.getsize(os.path.join(root, file_name))
+                    # Every repeat rewrites the same frame, the files on disk are one frame's worth
+                    results[layout] = (files, size, sum(timings) / len(timings))
+            finally:
+                # Reconcile restores the real output paths
+                settings.output_layout = original_layout
+                bpy.ops.nodes.auto_compositing_setup()
+                settings.reconcile_existing = original_reconcile
+
+        frames = len(get_scene_frames(scene))
+        separate_files, separate_size, separate_time = results['SEPARATE']
+        single_files, single_size, single_time = results['CONSOLIDATED']
+        self.report({'INFO'}, (
+            f"Separate: {separate_files} files, {separate_size / 1e6:.1f} MB, {separate_time:.2f}s per frame; "
+            f"single EXR: {single_files} files, {single_size / 1e6:.1f} MB, {single_time:.2f}s per frame; "
+            f"{frames} frames: {separate_files * frames} vs {single_files * frames} files"
+        ))
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# NOISE ANALYSIS - Pick the passes to denoise from a test frame rendered without Denoise
+# -------------------------------------------------------
+
+# Lighting passes are divided by their Color pass (the albedo of that component) before measuring,
+# so texture detail does not count as noise
+NOISE_ALBEDO_PASS = {
+    "DiffDir": "DiffCol", "DiffInd": "DiffCol",
+    "GlossDir": "GlossCol", "GlossInd": "GlossCol",
+    "TransDir": "TransCol", "TransInd": "TransCol",
+}
+
+# Passes that get the Denoising Albedo / Normal guides when denoised and the view layer stores them
+ALBEDO_GUIDED_PASSES = frozenset(NOISE_ALBEDO_PASS)
+NORMAL_GUIDED_PASSES = ALBEDO_GUIDED_PASSES | {"AO"}
+
+# Rough CPU OIDN cost, only used to estimate the time saved
+OIDN_SECONDS_PER_MEGAPIXEL = 0.08
+
+LUMINANCE_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+# Laplacian kernel norm: the residual of unit variance white noise has a standard deviation of sqrt(20)
+LAPLACIAN_NORM = 20 ** 0.5
+
+# Format of the analysis render: PNGs are view transformed, clamped to 0..1 and quantized,
+# float EXRs keep the scene linear values (no view transform), so highlights and ratios are measured as rendered
+NOISE_ANALYSIS_FORMAT = FormatPlan('OPEN_EXR', '32', color_mode='RGBA', exr_codec='ZIP')
+
+def estimate_relative_noise(pixels, albedo=None, epsilon=1e-4):
+    """
+    Noise of a pass (H x W x 4 float array) relative to its signal:
+    robust sigma (median absolute Laplacian residual) over the mean luminance, on pixels with signal only.
+    """
+    import numpy as np
+
+    weights = np.asarray(LUMINANCE_WEIGHTS, dtype=np.float32)
+    luminance = pixels[..., :3] @ weights
+    valid = luminance > epsilon
+    if albedo is not None:
+        albedo_luminance = albedo[..., :3] @ weights
+        valid &= albedo_luminance > epsilon
+        luminance = np.divide(luminance, albedo_luminance, out=np.zeros_like(luminance), where=valid)
+    residual = (4.0 * luminance[1:-1, 1:-1] - luminance[:-2, 1:-1] - luminance[2:, 1:-1]
+                - luminance[1:-1, :-2] - luminance[1:-1, 2:])
+    # Only interior pixels whose whole neighbourhood has signal, so object edges are not measured
+    mask = (valid[1:-1, 1:-1] & valid[:-2, 1:-1] & valid[2:, 1:-1] & valid[1:-1, :-2] & valid[1:-1, 2:])
+    if not mask.any():
+        return 0.0
+    sigma = float(np.median(np.abs(residual[mask]))) / 0.6745 / LAPLACIAN_NORM
+    signal = float(luminance[1:-1, 1:-1][mask].mean())
+    return sigma / signal if signal > epsilon else 0.0
+
+def select_denoise_passes(noise, threshold, guides_available):
+    """
+    noise: {pass name: relative noise}, the highest value over the view layers.
+    Returns (denoise, albedo, normal) as sets of pass names.
+    """
+    denoise = {pass_name for pass_name, value in noise.items() if value > threshold}
+    albedo = denoise & ALBEDO_GUIDED_PASSES if guides_available else set()
+    normal = denoise & NORMAL_GUIDED_PASSES if guides_available else set()
+    return denoise, albedo, normal
+
+def get_rendered_pass_files(node_tree, frame):
+    """{(view layer, pass name): file path} of the PNG/EXR slots linked straight from a Render Layers node."""
+    files = {}
+    for node in node_tree.nodes:
+        if node.type != 'OUTPUT_FILE' or node.mute or node.format.file_format not in ('PNG', 'OPEN_EXR'):
+            continue
+        extension = FILE_EXTENSIONS[node.format.file_format]
+        base_path = bpy.path.abspath(node.base_path)
+        for socket, slot in zip(node.inputs, node.file_slots):
+            if not socket.is_linked or socket.links[0].from_node.type != 'R_LAYERS':
+                continue
+            entry = SOCKET_REGISTRY.get(socket.links[0].from_socket.name)
+            if entry is None or entry[0] != 'LIGHTING':
+                continue
+            directory, prefix, suffix, padding = split_frame_pattern(os.path.join(base_path, slot.path), extension)
+            path = os.path.join(directory, f"{prefix}{frame:0{padding}d}{suffix}")
+            files[(socket.links[0].from_node.layer, entry[1])] = path
+    return files
+
+def load_image_pixels(path):
+    import numpy as np
+
+    image = bpy.data.images.load(path, check_existing=False)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)
+
+def measure_pass_noise(files):
+    """{pass name: highest relative noise over the view layers} from the rendered pass files."""
+    noise = {}
+    pixels = {key: load_image_pixels(path) for key, path in files.items() if os.path.exists(path)}
+    for (view_layer, pass_name), buffer in pixels.items():
+        albedo = pixels.get((view_layer, NOISE_ALBEDO_PASS.get(pass_name)))
+        value = estimate_relative_noise(buffer, albedo)
+        noise[pass_name] = max(noise.get(pass_name, 0.0), value)
+    return noise
+
+class AnalyzeDenoiseNoise(bpy.types.Operator):
+    bl_idname = "nodes.analyze_denoise_noise"
+    bl_label = "Analyze Noise"
+    bl_description = ("Render the current frame without Set Alpha/Denoise, measure the noise of each pass "
+                      "and enable Denoise (with albedo/normal guides) only where it is above the threshold")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        scene = context.scene
+        settings = scene.compositing_settings
+        before_plan = get_current_plan(scene)
+        if before_plan is None:
+            self.report({'WARNING'}, "Generate the nodes first")
+            return {'CANCELLED'}
+        runs_before = count_oidn_runs(before_plan)
+        original = {
+            name: list(getattr(settings, name)) if name.endswith("passes") else getattr(settings, name)
+            for name in ("set_alpha_passes", "denoise_passes", "use_node_groups", "output_layout", "preview_mode", "reconcile_existing")
+        }
+        guides_available = any(
+            'Denoising Albedo' in get_socket_routes(node).passes for node in scene.node_tree.nodes if node.type == 'R_LAYERS'
+        )
+
+        # Separate float EXRs linked straight from the Render Layers node, written to a temp dir
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                settings.preview_mode = False
+                settings.reconcile_existing = True
+                settings.use_node_groups = False
+                settings.output_layout = 'SEPARATE'
+                settings.set_alpha_passes = [False] * len(DEFAULT_PASSES)
+                settings.denoise_passes = [False] * len(DEFAULT_PASSES)
+                bpy.ops.nodes.auto_compositing_setup()
+                for node in scene.node_tree.nodes:
+                    if node.type == 'OUTPUT_FILE':
+                        node.base_path = os.path.join(temp_dir, node.name, "")
+                        # The lighting passes go to the PNG outputs, regenerating puts their format back
+                        if node.format.file_format == 'PNG':
+                            for field in FormatPlan.__slots__:
+                                value = getattr(NOISE_ANALYSIS_FORMAT, field)
+                                if value is not None:
+                                    assign_prop(node.format, field, value)
+                bpy.ops.render.render(write_still=False)
+                noise = measure_pass_noise(get_rendered_pass_files(scene.node_tree, scene.frame_current))
+            finally:
+                # Reconcile (still on) puts the original graph back in place, user nodes stay
+                for name, value in original.items():
+                    if name not in ("preview_mode", "reconcile_existing"):
+                        setattr(settings, name, value)
+                bpy.ops.nodes.auto_compositing_setup()
+                settings.reconcile_existing = original["reconcile_existing"]
+                settings.preview_mode = original["preview_mode"]
+
+        if not noise:
+            self.report({'WARNING'}, "No lighting passes were rendered to analyze")
+            return {'CANCELLED'}
+        denoise, albedo, normal = select_denoise_passes(noise, settings.noise_threshold, guides_available)
+        settings.denoise_passes = [p in denoise if p in noise else flag for p, flag in zip(DEFAULT_PASSES, settings.denoise_passes)]
+        # Passes that were not rendered keep their flags
+        settings.use_denoise_albedo = [p in albedo if p in noise else flag for p, flag in zip(DEFAULT_PASSES, settings.use_denoise_albedo)]
+        settings.use_denoise_normal = [p in normal if p in noise else flag for p, flag in zip(DEFAULT_PASSES, settings.use_denoise_normal)]
+        settings.reconcile_existing = True
+        bpy.ops.nodes.auto_compositing_setup()
+        settings.reconcile_existing = original["reconcile_existing"]
+
+        runs_after = count_oidn_runs(get_current_plan(scene))
+        render = scene.render
+        megapixels = (render.resolution_x * render.resolution_percentage / 100) * (render.resolution_y * render.resolution_percentage / 100) / 1e6
+        saved = (runs_before - runs_after) * megapixels * OIDN_SECONDS_PER_MEGAPIXEL
+        self.report({'INFO'}, "Noise: " + ", ".join(
+            f"{p} {noise[p]:.4f}{' (denoise)' if p in denoise else ''}" for p in DEFAULT_PASSES if p in noise))
+        clean = sorted(p for p in noise if p not in denoise)
+        self.report({'INFO'}, (f"Denoising {len(denoise)} of {len(noise)} passes (clean: {', '.join(clean) or 'none'}), "
+                               f"OIDN runs {runs_before} -> {runs_after}, about {saved:.1f}s per frame "
+                               f"({saved * len(get_scene_frames(scene)) / 60:.1f} min per sequence) saved"))
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# OUTPUT ENCODING BENCHMARK - Time PNG compression levels and EXR codecs, write an encoding profile
+# -------------------------------------------------------
+
+# Output node roles an encoding profile can override (the OUTPUT_TARGETS), with their default format
+ENCODING_ROLES = {target_name: target.format for target_name, target in OUTPUT_TARGETS.items()}
+LOSSLESS_EXR_CODECS = ('NONE', 'RLE', 'ZIPS', 'ZIP', 'PIZ')
+
+# Candidates per role (color depth stays as in the pipeline, only the encoding is tuned)
+ENCODING_CANDIDATES = {
+    "PNG": [{"compression": level} for level in (0, 5, 15, 30, 50, 75, 90, 100)],
+    "Combined": [{"exr_codec": codec} for codec in LOSSLESS_EXR_CODECS],
+    "EXR": [{"exr_codec": codec} for codec in ('NONE', 'RLE', 'ZIPS', 'ZIP', 'PIZ', 'DWAA', 'DWAB')],
+    # Lossless targets stay lossless, cryptomatte IDs are hashes stored as floats
+    "EXR_Lossless": [{"exr_codec": codec} for codec in LOSSLESS_EXR_CODECS],
+    "EXR_Full": [{"exr_codec": codec} for codec in LOSSLESS_EXR_CODECS],
+    "Cryptomatte": [{"exr_codec": codec} for codec in LOSSLESS_EXR_CODECS],
+}
+
+# Synthetic pass types written by each role
+ENCODING_PASS_TYPES = {
+    "PNG": ("lighting", "color"),
+    "Combined": ("lighting", "color"),
+    "EXR": ("normal", "vector"),
+    "EXR_Lossless": ("mist",),
+    "EXR_Full": ("depth", "position"),
+    "Cryptomatte": ("cryptomatte",),
+}
+
+# Format fields a profile may override, the file format and color mode stay as the slots and layers expect
+ENCODING_OVERRIDE_FIELDS = frozenset(("compression", "exr_codec", "color_depth"))
+
+_encoding_profile_cache = {}
+
+def load_encoding_profile(path, warnings=None):
+    """
+    Read the per-role format overrides of an encoding profile as hashable data (cached by mtime).
+    An unreadable or malformed profile gives the default encoding, with a message added to warnings.
+    """
+    if not path:
+        return ()
+    path = bpy.path.abspath(path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return ()
+    cached = _encoding_profile_cache.get(path)
+    if not cached or cached[0] != mtime:
+        error = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                outputs = json.load(f).get("outputs", {})
+            encoding = tuple(sorted(
+                (role, tuple(sorted((k, v) for k, v in overrides.items() if k in ENCODING_OVERRIDE_FIELDS)))
+                for role, overrides in outputs.items()
+                if role in ENCODING_ROLES
+            ))
+        except (OSError, ValueError, AttributeError) as e:
+            encoding = ()
+            error = f"Encoding profile {path} not used, default encoding: {e}"
+        cached = _encoding_profile_cache[path] = (mtime, encoding, error)
+    if cached[2] and warnings is not None:
+        warnings.append(cached[2])
+    return cached[1]
+
+def synthetic_pass_buffer(pass_type, width, height, seed=0):
+    """Float RGBA pixels with statistics close to a rendered pass of the given type."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    u, v = x / width, y / height
+    pixels = np.ones((height, width, 4), dtype=np.float32)
+
+    def smooth(scale):
+        field = np.zeros((height, width), dtype=np.float32)
+        for _ in range(4):
+            fx, fy, phase = rng.uniform(0.5, 4.0) * scale, rng.uniform(0.5, 4.0) * scale, rng.uniform(0, 6.28)
+            field += np.sin(u * fx * 6.28 + phase) * np.cos(v * fy * 6.28 + phase)
+        return field / 4.0
+
+    def patches(cell, values):
+        grid_h, grid_w = height // cell + 1, width // cell + 1
+        coarse = values(grid_h * grid_w).reshape(grid_h, grid_w)
+        return np.repeat(np.repeat(coarse, cell, axis=0), cell, axis=1)[:height, :width]
+
+    if pass_type == "lighting":
+        # HDR shading with Monte Carlo noise
+        for c in range(3):
+            pixels[..., c] = np.exp(smooth(1.0) * 1.5) * 0.5 * (1.0 + rng.normal(0, 0.05, (height, width)))
+    elif pass_type == "color":
+        # Flat albedo-like regions
+        for c in range(3):
+            pixels[..., c] = patches(24, lambda n: rng.uniform(0.05, 0.9, n).astype(np.float32))
+    elif pass_type == "depth":
+        depth = 1.0 + (smooth(0.5) + 1.0) * 500.0 + patches(32, lambda n: rng.uniform(0, 50, n).astype(np.float32))
+        pixels[..., 0] = pixels[..., 1] = pixels[..., 2] = depth
+    elif pass_type == "position":
+        for c in range(3):
+            pixels[..., c] = smooth(0.5) * 5000.0 + rng.uniform(-5000, 5000)
+    elif pass_type == "mist":
+        pixels[..., 0] = pixels[..., 1] = pixels[..., 2] = np.clip(smooth(0.5) * 0.5 + 0.5, 0.0, 1.0)
+    elif pass_type == "normal":
+        n = np.stack([smooth(1.0), smooth(1.0), np.abs(smooth(1.0)) + 0.1], axis=-1)
+        pixels[..., :3] = n / np.linalg.norm(n, axis=-1, keepdims=True)
+    elif pass_type == "vector":
+        for c in range(4):
+            pixels[..., c] = smooth(0.3) * 8.0
+    elif pass_type == "cryptomatte":
+        # Hashed IDs stored as float bit patterns, with soft coverage at the edges
+        ids = patches(16, lambda n: rng.integers(0, 2 ** 23, n, dtype=np.uint32) | np.uint32(0x3F000000)).view(np.float32)
+        pixels[..., 0] = ids
+        pixels[..., 2] = np.roll(ids, 1, axis=1)
+        pixels[..., 1] = patches(16, lambda n: rng.uniform(0.5, 1.0, n).astype(np.float32))
+        pixels[..., 3] = 1.0 - pixels[..., 1]
+    return pixels.ravel()
+
+def set_image_settings(image_settings, format_plan, overrides):
+    for field in FormatPlan.__slots__:
+        value = overrides.get(field, getattr(format_plan, field))
+        if value is None or field == 'color_management':
+            continue
+        if field == 'file_format' and value == 'OPEN_EXR_MULTILAYER':
+            # Standalone images are written as single-layer EXR, same codecs
+            value = 'OPEN_EXR'
+        setattr(image_settings, field, value)
+
+def time_encoding(scene, pixels, width, height, format_plan, overrides, filepath, repeats):
+    """Return (bytes, encode seconds, decode seconds) for one buffer and format, best of repeats."""
+    image_settings = scene.render.image_settings
+    saved = {field: getattr(image_settings, field) for field in ('file_format', 'color_depth', 'color_mode', 'compression', 'exr_codec')}
+    image = bpy.data.images.new("__encoding_benchmark", width, height, alpha=True, float_buffer=True)
+    try:
+        image.pixels.foreach_set(pixels)
+        set_image_settings(image_settings, format_plan, overrides)
+        encode = decode = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            image.save_render(filepath, scene=scene)
+            encode = min(encode, time.perf_counter() - start)
+
+            loaded = bpy.data.images.load(filepath, check_existing=False)
+            try:
+                buffer = pixels.copy()
+                start = time.perf_counter()
+                loaded.pixels.foreach_get(buffer)
+                decode = min(decode, time.perf_counter() - start)
+            finally:
+                bpy.data.images.remove(loaded)
+        return os.path.getsize(filepath), encode, decode
+    finally:
+        bpy.data.images.remove(image)
+        for field, value in saved.items():
+            try:
+                setattr(image_settings, field, value)
+            except (TypeError, ValueError):
+                pass
+
+def load_source_buffers(source_dir):
+    """Pixels of an already rendered frame, grouped by output role from the generated folder layout."""
+    import numpy as np
+
+    buffers = {role: [] for role in ENCODING_ROLES}
+    for root, _dirs, files in os.walk(source_dir):
+        folder = os.path.basename(root)
+        for file_name in sorted(files):
+            ext = os.path.splitext(file_name)[1].lower()
+            if ext == ".png":
+                role = "PNG"
+            elif ext == ".exr":
+                role = next((target_name for target_name, target in OUTPUT_TARGETS.items()
+                             if target.folder_suffix and folder.endswith(target.folder_suffix)), "EXR")
+            else:
+                continue
+            image = bpy.data.images.load(os.path.join(root, file_name), check_existing=False)
+            try:
+                width, height = image.size
+                pixels = np.empty(width * height * 4, dtype=np.float32)
+                image.pixels.foreach_get(pixels)
+            finally:
+                bpy.data.images.remove(image)
+            buffers[role].append((file_name, pixels, width, height))
+    return buffers
+
+def run_encoding_benchmark(scene, width=960, height=540, repeats=3, source_dir=None, storage_mb_per_s=200.0, decode_weight=0.0):
+    """
+    Time every encoding candidate per role and pick the one with the lowest cost:
+    encode seconds + bytes / storage throughput (+ decode_weight * decode seconds).
+    Returns the encoding profile as a dict.
+    """
+    if source_dir:
+        buffers = load_source_buffers(source_dir)
+    else:
+        buffers = {
+            role: [(pass_type, synthetic_pass_buffer(pass_type, width, height, seed), width, height)
+                   for seed, pass_type in enumerate(pass_types)]
+            for role, pass_types in ENCODING_PASS_TYPES.items()
+        }
+
+    results = []
+    outputs = {}
+    bytes_per_second = storage_mb_per_s * 1e6
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for role, samples in buffers.items():
+            if not samples:
+                continue
+            format_plan = ENCODING_ROLES[role]
+            ext = ".png" if format_plan.file_format == 'PNG' else ".exr"
+            best = None
+            for overrides in ENCODING_CANDIDATES[role]:
+                cost = 0.0
+                for pass_type, pixels, w, h in samples:
+                    filepath = os.path.join(temp_dir, f"{role}_{pass_type}{ext}")
+                    size, encode, decode = time_encoding(scene, pixels, w, h, format_plan, overrides, filepath, repeats)
+                    cost += encode + size / bytes_per_second + decode_weight * decode
+                    results.append({
+                        "role": role,
+                        "pass": pass_type,
+                        "settings": overrides,
+                        "bytes": size,
+                        "encode_seconds": round(encode, 6),
+                        "decode_seconds": round(decode, 6),
+                    })
+                if best is None or cost < best[0]:
+                    best = (cost, overrides)
+            outputs[role] = dict(best[1])
+
+    return {
+        "version": 1,
+        "objective": {"storage_mb_per_s": storage_mb_per_s, "decode_weight": decode_weight},
+        "source": source_dir or f"synthetic {width}x{height}",
+        "outputs": outputs,
+        "results": results,
+    }
+
+def write_encoding_profile(profile, path):
+    path = bpy.path.abspath(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+class BenchmarkEncoding(bpy.types.Operator):
+    bl_idname = "nodes.benchmark_encoding"
+    bl_label = "Benchmark Encoding"
+    bl_description = "Time PNG compression levels and EXR codecs and write an encoding profile for the File Output nodes"
+    bl_options = {'REGISTER'}
+
+    width: bpy.props.IntProperty(name="Width", default=960, min=16)
+    height: bpy.props.IntProperty(name="Height", default=540, min=16)
+    repeats: bpy.props.IntProperty(name="Repeats", default=3, min=1, max=20)
+    source_dir: bpy.props.StringProperty(
+        name="Rendered Frame",
+        description="Folder with an already rendered frame (empty: synthetic buffers)",
+        subtype='DIR_PATH',
+    )
+    storage_mb_per_s: bpy.props.FloatProperty(
+        name="Storage MB/s",
+        description="Write throughput of the output storage, trades file size against encode time",
+        default=200.0,
+        min=1.0,
+    )
+    profile_path: bpy.props.StringProperty(name="Profile", default="//encoding_profile.json", subtype='FILE_PATH')
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        source_dir = bpy.path.abspath(self.source_dir) if self.source_dir else None
+        profile = run_encoding_benchmark(
+            context.scene, self.width, self.height, self.repeats, source_dir, self.storage_mb_per_s,
+        )
+        path = write_encoding_profile(profile, self.profile_path)
+        context.scene.compositing_settings.encoding_profile = self.profile_path
+        chosen = ", ".join(f"{role}: {', '.join(f'{k}={v}' for k, v in o.items())}" for role, o in profile["outputs"].items())
+        self.report({'INFO'}, f"Encoding profile written to {path} ({chosen})")
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# OUTPUT COMPLETENESS INDEX - Which frames of the generated outputs exist on disk
+# -------------------------------------------------------
+
+# File extension written for each File Output format
+FILE_EXTENSIONS = {
+    'PNG': ".png",
+    'OPEN_EXR': ".exr",
+    'OPEN_EXR_MULTILAYER': ".exr",
+    'JPEG': ".jpg",
+    'TIFF': ".tif",
+}
+
+# A file smaller than this fraction of the median size of its sequence counts as truncated
+TRUNCATED_FRACTION = 0.05
+
+@dataclass(frozen=True, slots=True)
+class OutputPattern:
+    """One frame sequence written by a File Output node (a slot, or the whole multilayer EXR)."""
+    node: str
+    view_layers: tuple
+    directory: str
+    prefix: str
+    suffix: str
+    padding: int
+
+    def file_name(self, frame):
+        return f"{self.prefix}{frame:0{self.padding}d}{self.suffix}"
+
+def split_frame_pattern(path, extension):
+    """Split an output path into (directory, prefix, suffix, padding) like Blender numbers frames."""
+    directory, base_name = os.path.split(path)
+    if "#" in base_name:
+        end = base_name.rindex("#") + 1
+        start = end
+        while start > 0 and base_name[start - 1] == "#":
+            start -= 1
+        return directory, base_name[:start], base_name[end:] + extension, end - start
+    return directory, base_name, extension, 4
+
+def map_staged_path(path, staging):
+    """Final location of a path written under one of the staged bases, the path itself otherwise."""
+    for staged, final in staging.items():
+        if path == staged or path.startswith(staged + os.sep):
+            return final + path[len(staged):]
+    return path
+
+def get_staging(scene):
+    return json.loads(scene.get(STAGING_MAP_PROP, "{}"))
+
+def get_output_patterns(scene, written=False):
+    """
+    Expected frame sequences of all active File Output nodes in the compositor, at their final location,
+    or where the nodes write them (the local scratch folder while staging) with written=True.
+    """
+    node_tree = scene.node_tree
+    if node_tree is None:
+        return []
+    staging = {} if written else get_staging(scene)
+    extension_enabled = scene.render.use_file_extension
+    output_layers = get_output_view_layers(node_tree)
+    patterns = []
+    for node in node_tree.nodes:
+        if node.type != 'OUTPUT_FILE' or node.mute:
+            continue
+        extension = FILE_EXTENSIONS.get(node.format.file_format, "") if extension_enabled else ""
+        view_layers = tuple(sorted(output_layers.get(node.name, ())))
+        base_path = map_staged_path(bpy.path.abspath(node.base_path), staging)
+        if node.format.file_format == 'OPEN_EXR_MULTILAYER':
+            if len(node.inputs):
+                patterns.append(OutputPattern(node.name, view_layers, *split_frame_pattern(base_path, extension)))
+            continue
+        for i, slot in enumerate(node.file_slots):
+            if not node.inputs[i].is_linked:
+                continue
+            slot_extension = extension
+            if not slot.use_node_format and extension_enabled:
+                slot_extension = FILE_EXTENSIONS.get(slot.format.file_format, "")
+            path = os.path.join(base_path, slot.path)
+            patterns.append(OutputPattern(node.name, view_layers, *split_frame_pattern(path, slot_extension)))
+    return patterns
+
+def index_directories(directories, workers=8):
+    """List every directory once with os.scandir (in parallel), return {directory: {file name: size}}."""
+    def scan(directory):
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        entries[entry.name] = entry.stat().st_size
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        return directory, entries
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(scan, sorted(set(directories))))
+
+# Format signatures checked when verifying: (bytes at start, bytes at end)
+FILE_SIGNATURES = {
+    ".png": (b"\x89PNG\r\n\x1a\n", b"IEND\xaeB`\x82"),
+    ".exr": (b"\x76\x2f\x31\x01", b""),
+}
+
+def verify_file(path):
+    """Check the format signature at the start (and the PNG end chunk) of a written file."""
+    signature = FILE_SIGNATURES.get(os.path.splitext(path)[1].lower())
+    if signature is None:
+        return True
+    head, tail = signature
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(head)) != head:
+                return False
+            if tail:
+                f.seek(-len(tail), os.SEEK_END)
+                return f.read(len(tail)) == tail
+    except OSError:
+        return False
+    return True
+
+class CompletenessReport:
+    """Missing and truncated frames per OutputPattern."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.missing = {}
+        self.truncated = {}
+        self.patterns = []
+
+    def incomplete_frames(self, view_layer=None):
+        """Frames that have to be rendered again (optionally only for one view layer's outputs)."""
+        frames = set()
+        for pattern in self.patterns:
+            if view_layer is not None and view_layer not in pattern.view_layers:
+                continue
+            frames.update(self.missing.get(pattern, ()))
+            frames.update(self.truncated.get(pattern, ()))
+        return sorted(frames)
+
+    def summary(self):
+        missing = sum(len(frames) for frames in self.missing.values())
+        truncated = sum(len(frames) for frames in self.truncated.values())
+        incomplete = self.incomplete_frames()
+        return (f"{len(self.patterns)} sequences x {len(self.frames)} frames: {missing} missing, "
+                f"{truncated} truncated files, {len(incomplete)} frames to re-render")
+
+    def to_dict(self):
+        sequences = []
+        for pattern in self.patterns:
+            sequences.append({
+                "node": pattern.node,
+                "view_layers": list(pattern.view_layers),
+                "pattern": os.path.join(pattern.directory, f"{pattern.prefix}{'#' * pattern.padding}{pattern.suffix}"),
+                "missing": format_frame_spec(self.missing.get(pattern, [])),
+                "truncated": format_frame_spec(self.truncated.get(pattern, [])),
+            })
+        return {
+            "frames": format_frame_spec(self.frames),
+            "rerender": format_frame_spec(self.incomplete_frames()),
+            "sequences": sequences,
+        }
+
+def scan_output_completeness(patterns, frames, verify=False, workers=8):
+    """Index the output folders once and find missing or truncated frames of every pattern."""
+    report = CompletenessReport(frames)
+    report.patterns = list(patterns)
+    index = index_directories([pattern.directory for pattern in patterns], workers)
+
+    to_verify = []
+    for pattern in patterns:
+        files = index.get(pattern.directory, {})
+        sizes = [(frame, files.get(pattern.file_name(frame))) for frame in frames]
+        present = sorted(size for _frame, size in sizes if size)
+        median = present[len(present) // 2] if present else 0
+        for frame, size in sizes:
+            if size is None:
+                report.missing.setdefault(pattern, []).append(frame)
+            elif size == 0 or size < median * TRUNCATED_FRACTION:
+                report.truncated.setdefault(pattern, []).append(frame)
+            elif verify:
+                to_verify.append((pattern, frame))
+
+    if to_verify:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = [os.path.join(p.directory, p.file_name(f)) for p, f in to_verify]
+            for (pattern, frame), ok in zip(to_verify, pool.map(verify_file, paths)):
+                if not ok:
+                    report.truncated.setdefault(pattern, []).append(frame)
+    return report
+
+def get_scene_frames(scene):
+    return list(range(scene.frame_start, scene.frame_end + 1, scene.frame_step))
+
+class CheckOutputCompleteness(bpy.types.Operator):
+    bl_idname = "nodes.check_output_completeness"
+    bl_label = "Check Outputs"
+    bl_description = "Scan the File Output folders for missing or truncated frames in the scene frame range"
+    bl_options = {'REGISTER'}
+
+    verify: bpy.props.BoolProperty(
+        name="Verify Files",
+        description="Also check the PNG/EXR signatures of every file (reads each file)",
+        default=False,
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        patterns = get_output_patterns(scene)
+        if not patterns:
+            self.report({'WARNING'}, "No File Output nodes to check")
+            return {'CANCELLED'}
+        report = scan_output_completeness(patterns, get_scene_frames(scene), self.verify)
+        incomplete = report.incomplete_frames()
+        if incomplete:
+            context.window_manager.clipboard = format_frame_spec(incomplete)
+            self.report({'WARNING'}, f"{report.summary()}: {format_frame_spec(incomplete)} (copied to clipboard)")
+        else:
+            self.report({'INFO'}, report.summary())
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# FOOTPRINT ESTIMATE - Compositor memory per frame and disk per sequence, from the generated nodes
+# -------------------------------------------------------
+
+# Channels written per socket type, the Vector pass carries 4 (speed to previous and next frame)
+SOCKET_CHANNELS = {'RGBA': 4, 'VALUE': 1, 'VECTOR': 3}
+FOUR_CHANNEL_VECTORS = frozenset({"Vector"})
+
+# Channels written by single layer formats, per color mode
+COLOR_MODE_CHANNELS = {'BW': 1, 'RGB': 3, 'RGBA': 4}
+
+# Extra full float RGBA buffers a Denoise node holds while OIDN runs (its input copy and scratch)
+DENOISE_SCRATCH_BUFFERS = 2
+
+# File size / uncompressed size at the file bit depth, per codec key (see get_codec_key).
+# Rough averages for rendered passes, Calibrate Footprint replaces them with measured ratios.
+DEFAULT_COMPRESSION_RATIOS = {
+    "PNG": 0.6,
+    "PNG_0": 1.0,
+    "EXR_NONE": 1.0,
+    "EXR_RLE": 0.8,
+    "EXR_ZIPS": 0.6,
+    "EXR_ZIP": 0.55,
+    "EXR_PIZ": 0.5,
+    "EXR_PXR24": 0.45,
+    "EXR_B44": 0.55,
+    "EXR_B44A": 0.5,
+    "EXR_DWAA": 0.3,
+    "EXR_DWAB": 0.3,
+}
+
+GIB = 1024 ** 3
+
+def get_codec_key(image_format):
+    """Key of DEFAULT_COMPRESSION_RATIOS for a File Output format."""
+    if image_format.file_format == 'PNG':
+        return "PNG" if image_format.compression else "PNG_0"
+    if image_format.file_format in ('OPEN_EXR', 'OPEN_EXR_MULTILAYER'):
+        return f"EXR_{image_format.exr_codec}"
+    return image_format.file_format
+
+def get_socket_channels(socket):
+    if socket.type == 'VECTOR' and socket.name in FOUR_CHANNEL_VECTORS:
+        return 4
+    return SOCKET_CHANNELS.get(socket.type, 4)
+
+def get_output_raw_bytes(node, pixels):
+    """Uncompressed bytes one frame of a File Output node writes, at the file bit depth."""
+    image_format = node.format
+    bytes_per_channel = 4 if image_format.color_depth == '32' else 2 if image_format.color_depth == '16' else 1
+    linked = [socket for socket in node.inputs if socket.is_linked]
+    if image_format.file_format == 'OPEN_EXR_MULTILAYER':
+        # Every layer keeps the channels of the socket feeding it
+        channels = sum(get_socket_channels(socket.links[0].from_socket) for socket in linked)
+    else:
+        channels = COLOR_MODE_CHANNELS.get(image_format.color_mode, 4) * len(linked)
+    return pixels * channels * bytes_per_channel
+
+def get_buffer_bytes(nodes, pixels):
+    """Full float buffers held by intermediate nodes (Set Alpha, Denoise, remaps, node group contents)."""
+    total = 0
+    for node in nodes:
+        if node.mute or node.type in ('R_LAYERS', 'OUTPUT_FILE', 'GROUP_INPUT', 'GROUP_OUTPUT'):
+            continue
+        if node.type == 'GROUP':
+            if node.node_tree is not None:
+                total += get_buffer_bytes(node.node_tree.nodes, pixels)
+            continue
+        total += sum(get_socket_channels(socket) for socket in node.outputs if socket.is_linked) * 4 * pixels
+        if node.type == 'DENOISE':
+            total += DENOISE_SCRATCH_BUFFERS * 4 * 4 * pixels
+    return total
+
+def load_footprint_calibration(path):
+    """Measured compression ratios, {} when the file is missing or invalid."""
+    path = bpy.path.abspath(path) if path else ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return dict(json.load(f).get("ratios", {}))
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def get_volume(directory):
+    """(device id, free bytes) of the volume holding directory or its nearest existing parent, None if unknown."""
+    while directory and not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+    try:
+        return os.stat(directory or ".").st_dev, shutil.disk_usage(directory or ".").free
+    except OSError:
+        return None
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+class FootprintEstimate:
+    """Peak compositor memory per frame and bytes per sequence, per view layer and per output node."""
+
+    def __init__(self, width, height, frames):
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.outputs = []         # dicts per File Output node
+        self.memory = {}          # view layer -> bytes per frame
+        self.render_result = 0    # bytes of the render result every view layer keeps
+        self.warnings = []
+
+    @property
+    def peak_memory(self):
+        return sum(self.memory.values())
+
+    @property
+    def sequence_bytes(self):
+        return sum(output["sequence_bytes"] for output in self.outputs)
+
+    def disk_by_view_layer(self):
+        result = {}
+        for output in self.outputs:
+            key = "+".join(output["view_layers"]) or "-"
+            result[key] = result.get(key, 0) + output["sequence_bytes"]
+        return result
+
+    def summary(self):
+        return (f"{self.width}x{self.height}, {self.frames} frames: compositor peak "
+                f"{format_bytes(self.peak_memory)} per frame, outputs {format_bytes(self.sequence_bytes)} "
+                f"({len(self.outputs)} File Output nodes)")
+
+    def to_dict(self):
+        return {
+            "resolution": [self.width, self.height],
+            "frames": self.frames,
+            "peak_memory_bytes": self.peak_memory,
+            "memory_by_view_layer": self.memory,
+            "sequence_bytes": self.sequence_bytes,
+            "disk_by_view_layer": self.disk_by_view_layer(),
+            "outputs": self.outputs,
+            "warnings": self.warnings,
+        }
+
+def estimate_footprint(scene, ratios=None, memory_budget=0, disk_budget=0):
+    """
+    Walk the compositor nodes and estimate:
+    - memory: render result passes + intermediate buffers + encode buffers, as if all are alive at once
+    - disk: uncompressed bytes at the file bit depth x the compression ratio of the codec
+    Budgets are in bytes, 0 skips the check.
+    """
+    render = scene.render
+    width = render.resolution_x * render.resolution_percentage // 100
+    height = render.resolution_y * render.resolution_percentage // 100
+    pixels = width * height
+    frames = len(get_scene_frames(scene))
+    estimate = FootprintEstimate(width, height, frames)
+    node_tree = scene.node_tree
+    if node_tree is None:
+        return estimate
+    all_ratios = {**DEFAULT_COMPRESSION_RATIOS, **(ratios or {})}
+    staging = get_staging(scene)
+    node_layers = get_output_view_layers(node_tree, node_types={node.type for node in node_tree.nodes})
+
+    def add_memory(node_name, size):
+        layers = sorted(node_layers.get(node_name, ())) or ["-"]
+        for view_layer in layers:
+            estimate.memory[view_layer] = estimate.memory.get(view_layer, 0) + size // len(layers)
+
+    for node in node_tree.nodes:
+        if node.mute:
+            continue
+        if node.type == 'R_LAYERS':
+            # The render result holds every enabled pass in full float, linked or not
+            size = sum(get_socket_channels(socket) for socket in node.outputs if socket.enabled) * 4 * pixels
+            estimate.render_result += size
+            estimate.memory[node.layer] = estimate.memory.get(node.layer, 0) + size
+        elif node.type == 'OUTPUT_FILE':
+            raw = get_output_raw_bytes(node, pixels)
+            if not raw:
+                continue
+            add_memory(node.name, raw)
+            codec = get_codec_key(node.format)
+            frame_bytes = int(raw * all_ratios.get(codec, 1.0))
+            estimate.outputs.append({
+                "node": node.name,
+                "view_layers": sorted(node_layers.get(node.name, ())),
+                "codec": codec,
+                "ratio": all_ratios.get(codec, 1.0),
+                "calibrated": codec in (ratios or {}),
+                "raw_frame_bytes": raw,
+                "frame_bytes": frame_bytes,
+                "sequence_bytes": frame_bytes * frames,
+                "directory": os.path.dirname(map_staged_path(bpy.path.abspath(node.base_path), staging)),
+            })
+        else:
+            add_memory(node.name, get_buffer_bytes([node], pixels))
+
+    if memory_budget and estimate.peak_memory > memory_budget:
+        estimate.warnings.append(
+            f"Compositor memory {format_bytes(estimate.peak_memory)} per frame exceeds the budget of {format_bytes(memory_budget)}")
+    if disk_budget and estimate.sequence_bytes > disk_budget:
+        estimate.warnings.append(
+            f"Output sequences {format_bytes(estimate.sequence_bytes)} exceed the disk budget of {format_bytes(disk_budget)}")
+    # Sequences sharing a volume have to fit its free space together
+    volumes = {}
+    for output in estimate.outputs:
+        volume = get_volume(output["directory"])
+        if volume is not None:
+            device, free = volume
+            total, _, directory = volumes.get(device, (0, free, output["directory"]))
+            volumes[device] = (total + output["sequence_bytes"], free, directory)
+    for total, free, directory in volumes.values():
+        if total > free:
+            estimate.warnings.append(f"Outputs need {format_bytes(total)} but only {format_bytes(free)} are free at {directory}")
+    return estimate
+
+def calibrate_compression_ratios(scene, max_frames=5):
+    """Measure file size / uncompressed size per codec from frames already rendered by the File Output nodes."""
+    node_tree = scene.node_tree
+    if node_tree is None:
+        return {}
+    render = scene.render
+    pixels = (render.resolution_x * render.resolution_percentage // 100) * (render.resolution_y * render.resolution_percentage // 100)
+    patterns = get_output_patterns(scene)
+    index = index_directories([pattern.directory for pattern in patterns])
+    samples = {}
+    for node in node_tree.nodes:
+        if node.type != 'OUTPUT_FILE' or node.mute:
+            continue
+        raw = get_output_raw_bytes(node, pixels)
+        node_patterns = [pattern for pattern in patterns if pattern.node == node.name]
+        if not raw or not node_patterns:
+            continue
+        measured = 0
+        for frame in get_scene_frames(scene):
+            sizes = [index.get(pattern.directory, {}).get(pattern.file_name(frame)) for pattern in node_patterns]
+            # Only frames where every file of the node exists
+            if all(sizes):
+                samples.setdefault(get_codec_key(node.format), []).append(sum(sizes) / raw)
+                measured += 1
+                if measured >= max_frames:
+                    break
+    return {codec: round(sorted(values)[len(values) // 2], 4) for codec, values in samples.items()}
+
+def write_footprint_calibration(ratios, path):
+    path = bpy.path.abspath(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"ratios": ratios}, f, indent=2)
+    return path
+
+def run_footprint_estimate(scene):
+    settings = scene.compositing_settings
+    return estimate_footprint(
+        scene,
+        load_footprint_calibration(settings.footprint_calibration),
+        int(settings.memory_budget_gb * GIB),
+        int(settings.disk_budget_gb * GIB),
+    )
+
+# Last estimate, shown in the sidebar
+_last_footprint = None
+
+class EstimateFootprint(bpy.types.Operator):
+    bl_idname = "nodes.estimate_footprint"
+    bl_label = "Estimate Footprint"
+    bl_description = "Estimate compositor memory per frame and disk space per sequence of the generated nodes"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        global _last_footprint
+        estimate = run_footprint_estimate(context.scene)
+        if not estimate.outputs:
+            self.report({'WARNING'}, "No File Output nodes to estimate")
+            return {'CANCELLED'}
+        _last_footprint = estimate
+        for warning in estimate.warnings:
+            self.report({'WARNING'}, warning)
+        self.report({'INFO'}, estimate.summary())
+        return {'FINISHED'}
+
+class CalibrateFootprint(bpy.types.Operator):
+    bl_idname = "nodes.calibrate_footprint"
+    bl_label = "Calibrate Footprint"
+    bl_description = "Measure the compression ratio of each codec from frames already rendered by the File Output nodes"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        settings = context.scene.compositing_settings
+        ratios = calibrate_compression_ratios(context.scene)
+        if not ratios:
+            self.report({'WARNING'}, "No rendered frames found to calibrate from")
+            return {'CANCELLED'}
+        path = write_footprint_calibration(ratios, settings.footprint_calibration)
+        self.report({'INFO'}, f"Calibration written to {path} ({', '.join(f'{k} x{v:.2f}' for k, v in ratios.items())})")
+        return {'FINISHED'}
+
+# -------------------------------------------------------
+# RENDER TELEMETRY - Per-frame timings and output sizes from the render handlers
+# -------------------------------------------------------
+
+# Frames in the rolling window used for frames per hour and the ETA
+TELEMETRY_WINDOW = 12
+
+TELEMETRY_CSV_FIELDS = (
+    "frame", "view_layer", "node", "bytes", "layer_render_s", "render_s",
+    "composite_s", "render_write_s", "frame_s", "frames_per_hour", "eta",
+)
+
+class RenderTelemetry:
+    """Collect timestamps from the render handlers and append one record per finished frame."""
+
+    def __init__(self):
+        self.path = None
+        self.patterns = []
+        self.view_layer_names = frozenset()
+        self.frame_end = 0
+        self.frame_step = 1
+        self.frame = None
+        self.marks = {}
+        self.layer_marks = {}
+        self.finished = deque(maxlen=TELEMETRY_WINDOW)
+        self.last = None
+
+    def start(self, scene):
+        settings = scene.compositing_settings
+        self.path = None
+        if not settings.telemetry_enabled:
+            return
+        self.path = resolve_report_path(settings.telemetry_path or "//render_telemetry.jsonl")
+        self.patterns = get_output_patterns(scene, written=True)
+        self.view_layer_names = frozenset(vl.name for vl in scene.view_layers)
+        self.frame_end = scene.frame_end
+        self.frame_step = max(1, scene.frame_step)
+        self.frame = None
+        self.finished.clear()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def begin_frame(self, scene):
+        if self.path is None:
+            return
+        if self.frame is not None:
+            self.end_frame()
+        self.frame = scene.frame_current
+        self.marks = {"pre": time.perf_counter()}
+        self.layer_marks = {}
+
+    def update_stats(self, stats):
+        """Note when each view layer and the compositor first show up in the render stats."""
+        if self.path is None or self.frame is None:
+            return
+        now = time.perf_counter()
+        for field in stats.split("|"):
+            field = field.strip()
+            if field.startswith("Compositing"):
+                self.marks.setdefault("composite", now)
+                return
+            # Multi-layer renders show "Scene, View Layer"
+            name = field.rsplit(", ", 1)[-1]
+            if name in self.view_layer_names and name not in self.layer_marks:
+                self.layer_marks[name] = now
+                return
+
+    def mark(self, name):
+        if self.path is not None and self.frame is not None:
+            self.marks[name] = time.perf_counter()
+
+    def get_layer_times(self, render_end):
+        starts = sorted(self.layer_marks.items(), key=lambda item: item[1])
+        ends = [start for _, start in starts[1:]] + [render_end]
+        return {name: end - start for (name, start), end in zip(starts, ends)}
+
+    def get_output_bytes(self):
+        """Bytes written this frame per File Output node, and which view layers feed it."""
+        nodes = {}
+        for pattern in self.patterns:
+            path = os.path.join(pattern.directory, pattern.file_name(self.frame))
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            entry = nodes.setdefault(pattern.node, {"bytes": 0, "view_layers": list(pattern.view_layers)})
+            entry["bytes"] += size
+        return nodes
+
+    def end_frame(self):
+        marks = self.marks
+        now = time.perf_counter()
+        post = marks.get("post", now)
+        composite = marks.get("composite")
+        render_end = composite if composite is not None else post
+        write = marks.get("write")
+
+        self.finished.append(now)
+        frames_per_hour = None
+        eta = None
+        if len(self.finished) > 1 and self.finished[-1] > self.finished[0]:
+            frames_per_hour = (len(self.finished) - 1) * 3600.0 / (self.finished[-1] - self.finished[0])
+            remaining = max(0, (self.frame_end - self.frame) // self.frame_step)
+            eta = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() + remaining * 3600.0 / frames_per_hour))
+
+        # File Output nodes write while compositing, so their writes are part of composite_s.
+        # render_write_s only covers the main render output (render_post to render_write).
+        record = {
+            "frame": self.frame,
+            "render_s": round(render_end - marks["pre"], 4),
+            "composite_s": round(post - composite, 4) if composite is not None else None,
+            "render_write_s": round(write - post, 4) if write is not None else None,
+            "frame_s": round(now - marks["pre"], 4),
+            "view_layers_s": {name: round(value, 4) for name, value in self.get_layer_times(render_end).items()},
+            "outputs": self.get_output_bytes(),
+            "frames_per_hour": round(frames_per_hour, 2) if frames_per_hour else None,
+            "eta": eta,
+        }
+        self.frame = None
+        self.last = record
+        try:
+            self.write_record(record)
+        except OSError as exc:
+            print(f"Could not write render telemetry {self.path}: {exc}")
+
+    def write_record(self, record):
+        if not self.path.lower().endswith(".csv"):
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, TELEMETRY_CSV_FIELDS)
+            if new_file:
+                writer.writeheader()
+            row = {field: record[field] for field in TELEMETRY_CSV_FIELDS if field in record}
+            outputs = record["outputs"] or {"": {"bytes": 0, "view_layers": [""]}}
+            for node, output in outputs.items():
+                for view_layer in output["view_layers"] or [""]:
+                    writer.writerow(dict(row, view_layer=view_layer, node=node, bytes=output["bytes"],
+                                         layer_render_s=record["view_layers_s"].get(view_layer)))
+
+    def stop(self):
+        if self.path is not None and self.frame is not None:
+            self.end_frame()
+        self.path = None
+
+_telemetry = RenderTelemetry()
+
+@persistent
+def telemetry_render_init(scene, *args):
+    _telemetry.start(scene)
+
+@persistent
+def telemetry_render_pre(scene, *args):
+    _telemetry.begin_frame(scene)
+
+@persistent
+def telemetry_render_stats(stats, *args):
+    _telemetry.update_stats(stats)
+
+@persistent
+def telemetry_render_post(scene, *args):
+    _telemetry.mark("post")
+
+@persistent
+def telemetry_render_write(scene, *args):
+    _telemetry.mark("write")
+    if _telemetry.path is not None and _telemetry.frame is not None:
+        _telemetry.end_frame()
+
+@persistent
+def telemetry_render_complete(scene, *args):
+    _telemetry.stop()
+
+# Handler list name -> telemetry handler
+TELEMETRY_HANDLERS = (
+    ("render_init", telemetry_render_init),
+    ("render_pre", telemetry_render_pre),
+    ("render_stats", telemetry_render_stats),
+    ("render_post", telemetry_render_post),
+    ("render_write", telemetry_render_write),
+    ("render_complete", telemetry_render_complete),
+    ("render_cancel", telemetry_render_complete),
+)
+
+# -------------------------------------------------------
+# DEFERRED COMPRESSION - Recompress fast-written PNGs off the render thread
+# -------------------------------------------------------
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def get_zlib_level(compression):
+    """zlib level Blender uses for a PNG compression percentage."""
+    return min(9, int(compression / 11.1111))
+
+def write_png_chunk(handle, chunk_type, body):
+    handle.write(len(body).to_bytes(4, "big"))
+    handle.write(chunk_type)
+    handle.write(body)
+    handle.write(zlib.crc32(chunk_type + body).to_bytes(4, "big"))
+
+def recompress_png(path, level):
+    """
+    Re-deflate the image data of a PNG at another zlib level, pixels are untouched.
+    The file is replaced atomically. Returns (bytes before, bytes after).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError(f"Not a PNG file: {path}")
+
+    before, idat, after = [], [], []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if chunk_type == b"IDAT":
+            idat.append(body)
+        else:
+            (after if idat else before).append((chunk_type, body))
+    packed = zlib.compress(zlib.decompress(b"".join(idat)), level)
+
+    temp_path = f"{path}.recompress"
+    with open(temp_path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        for chunk_type, body in before:
+            write_png_chunk(f, chunk_type, body)
+        write_png_chunk(f, b"IDAT", packed)
+        for chunk_type, body in after:
+            write_png_chunk(f, chunk_type, body)
+    os.replace(temp_path, path)
+    return len(data), os.path.getsize(path)
+
+class PngRecompressor:
+    """Bounded thread pool recompressing PNG files (zlib releases the GIL, so threads run in parallel)."""
+
+    def __init__(self, level, threads, queue_size):
+        self.level = level
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="png-recompress")
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.lock = threading.Lock()
+        self.futures = set()
+        self.files = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.seconds = 0.0
+        self.errors = []
+        self.on_done = None  # called with each path once it is processed, on the pool thread
+
+    def submit(self, path):
+        # Blocks the caller when the queue is full, so a slow disk cannot pile up unbounded work
+        self.slots.acquire()
+        future = self.pool.submit(self.recompress, path)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self.finished)
+
+    def recompress(self, path):
+        start = time.perf_counter()
+        try:
+            before, after = recompress_png(path, self.level)
+        except (OSError, ValueError, zlib.error) as exc:
+            with self.lock:
+                self.errors.append(f"{path}: {exc}")
+        else:
+            with self.lock:
+                self.files += 1
+                self.bytes_before += before
+                self.bytes_after += after
+                self.seconds += time.perf_counter() - start
+        if self.on_done is not None:
+            self.on_done(path)
+
+    def finished(self, future):
+        with self.lock:
+            self.futures.discard(future)
+        self.slots.release()
+
+    def flush(self):
+        """Wait for every queued file and stop the pool."""
+        self.pool.shutdown(wait=True)
+        return self.summary()
+
+    def summary(self):
+        return (f"recompressed {self.files} PNGs, {self.bytes_before / 1e6:.1f} MB -> {self.bytes_after / 1e6:.1f} MB "
+                f"in {self.seconds:.1f} thread-seconds, {len(self.errors)} errors")
+
+class DeferredCompression:
+    """Hand the PNGs of each rendered frame to a PngRecompressor, flush when the render ends."""
+
+    def __init__(self):
+        self.recompressor = None
+        self.patterns = []
+        self.last_summary = None
+
+    def start(self, scene):
+        self.stop()
+        settings = scene.compositing_settings
+        if not settings.deferred_compression or scene.node_tree is None:
+            return
+        nodes = scene.node_tree.nodes
+        self.patterns = [pattern for pattern in get_output_patterns(scene, written=True)
+                         if nodes[pattern.node].format.file_format == 'PNG']
+        if not self.patterns:
+            return
+        # The level the PNG outputs would have without deferring
+        final = get_encoded_format(PNG_FORMAT, "PNG", load_encoding_profile(settings.encoding_profile))
+        self.recompressor = PngRecompressor(get_zlib_level(final.compression),
+                                            settings.recompress_threads, settings.recompress_queue)
+        # Recompressed files are final, the output stager moves them once deduplication has hashed them
+        self.recompressor.on_done = _output_stager.recompressed_file
+
+    def frame_written(self, scene):
+        if self.recompressor is None:
+            return
+        frame = scene.frame_current
+        for pattern in self.patterns:
+            path = os.path.join(pattern.directory, pattern.file_name(frame))
+            if os.path.exists(path):
+                self.recompressor.submit(path)
+
+    def stop(self):
+        if self.recompressor is None:
+            return
+        recompressor, self.recompressor = self.recompressor, None
+        self.last_summary = recompressor.flush()
+        print(f"Deferred compression: {self.last_summary}")
+        for error in recompressor.errors:
+            print(f"    {error}")
+
+_deferred_compression = DeferredCompression()
+
+@persistent
+def deferred_compression_render_init(scene, *args):
+    _deferred_compression.start(scene)
+
+@persistent
+def deferred_compression_render_post(scene, *args):
+    # File Output nodes have written the frame by render_post, render_write only fires for animations
+    _deferred_compression.frame_written(scene)
+
+@persistent
+def deferred_compression_render_complete(scene, *args):
+    _deferred_compression.stop()
+
+DEFERRED_COMPRESSION_HANDLERS = (
+    ("render_init", deferred_compression_render_init),
+    ("render_post", deferred_compression_render_post),
+    ("render_complete", deferred_compression_render_complete),
+    ("render_cancel", deferred_compression_render_complete),
+)
+
+# -------------------------------------------------------
+# CRYPTOMATTE MANIFEST INDEX - Manifests read from EXR headers, deduplicated across frames
+# -------------------------------------------------------
+
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+EXR_MULTIPART_FLAG = 0x1000
+CRYPTOMATTE_INDEX_VERSION = 1
+
+def read_exr_string(handle):
+    """Read a null terminated attribute/type name from an EXR header."""
+    chars = bytearray()
+    while True:
+        char = handle.read(1)
+        if not char:
+            raise ValueError("Truncated EXR header")
+        if char == b"\0":
+            return chars.decode("latin-1")
+        chars += char
+
+def iter_exr_attributes(handle):
+    """
+    Yield (name, type, size) for every header attribute with the handle at its value.
+    Values not read are skipped; when the generator ends the handle is at the end of the header(s).
+    """
+    if handle.read(4) != EXR_MAGIC:
+        raise ValueError(f"Not an EXR file: {handle.name}")
+    multipart = bool(int.from_bytes(handle.read(4), "little") & EXR_MULTIPART_FLAG)
+    attributes = 0
+    while True:
+        name = read_exr_string(handle)
+        if not name:
+            # End of a header; a multipart file ends its header list with an empty header
+            if not multipart or not attributes:
+                return
+            attributes = 0
+            continue
+        attr_type = read_exr_string(handle)
+        size = int.from_bytes(handle.read(4), "little")
+        attributes += 1
+        start = handle.tell()
+        yield name, attr_type, size
+        handle.seek(start + size)
+
+def read_cryptomatte_metadata(path):
+    """
+    Parse only the EXR header(s) of a file and return {layer name: manifest JSON string}
+    from the cryptomatte/<id>/name and cryptomatte/<id>/manifest attributes.
+    """
+    entries = {}
+    with open(path, "rb") as handle:
+        for name, attr_type, size in iter_exr_attributes(handle):
+            if attr_type == "string" and name.startswith("cryptomatte/"):
+                _, key, field = name.split("/", 2)
+                entries.setdefault(key, {})[field] = handle.read(size).decode("utf-8")
+    return {entry["name"]: entry.get("manifest", "{}") for entry in entries.values() if "name" in entry}
+
+def get_cryptomatte_index_path(pattern, extension=".json"):
+    return os.path.join(pattern.directory, f"{pattern.prefix.rstrip('_.')}_manifest{extension}")
+
+def frames_to_runs(frames):
+    """{frame: digest} -> [[first, last, digest], ...] over consecutive frames sharing a manifest."""
+    runs = []
+    for frame in sorted(frames):
+        digest = frames[frame]
+        if runs and runs[-1][1] == frame - 1 and runs[-1][2] == digest:
+            runs[-1][1] = frame
+        else:
+            runs.append([frame, frame, digest])
+    return runs
+
+def runs_to_frames(runs):
+    return {frame: digest for first, last, digest in runs for frame in range(first, last + 1)}
+
+def load_cryptomatte_index(path):
+    """Layers of an existing JSON index as {layer: {"manifests": {...}, "frames": {frame: digest}}}."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CRYPTOMATTE_INDEX_VERSION:
+        return {}
+    return {name: {"manifests": layer["manifests"], "frames": runs_to_frames(layer["frames"])}
+            for name, layer in data.get("layers", {}).items()}
+
+def index_cryptomatte_sequence(pattern, frames, layers=None):
+    """Add the given frames of a sequence to the index layers, returns (layers, headers read)."""
+    layers = {} if layers is None else layers
+    read = 0
+    for frame in frames:
+        path = os.path.join(pattern.directory, pattern.file_name(frame))
+        try:
+            metadata = read_cryptomatte_metadata(path)
+        except (OSError, ValueError):
+            continue
+        read += 1
+        for layer_name, manifest in metadata.items():
+            layer = layers.setdefault(layer_name, {"manifests": {}, "frames": {}})
+            digest = hashlib.sha1(manifest.encode("utf-8")).hexdigest()[:16]
+            # Identical manifests are stored once and referenced by digest
+            if digest not in layer["manifests"]:
+                layer["manifests"][digest] = json.loads(manifest)
+            layer["frames"][frame] = digest
+    return layers, read
+
+def write_cryptomatte_index(layers, pattern, path):
+    if path.endswith((".sqlite", ".db")):
+        write_cryptomatte_sqlite(layers, path)
+        return
+    data = {
+        "version": CRYPTOMATTE_INDEX_VERSION,
+        "sequence": os.path.join(pattern.directory, f"{pattern.prefix}{'#' * pattern.padding}{pattern.suffix}"),
+        "layers": {name: {"manifests": layer["manifests"], "frames": frames_to_runs(layer["frames"])}
+                   for name, layer in layers.items()},
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+def write_cryptomatte_sqlite(layers, path):
+    """Same content as the JSON index, with indexed name and hash lookups."""
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript("""
+            CREATE TABLE entries (layer TEXT, digest TEXT, name TEXT, hash TEXT);
+            CREATE TABLE frames (layer TEXT, frame INTEGER, digest TEXT, PRIMARY KEY (layer, frame));
+            CREATE INDEX entries_name ON entries (layer, name);
+            CREATE INDEX entries_hash ON entries (hash);
+        """)
+        for layer_name, layer in layers.items():
+            connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?)",
+                ((layer_name, digest, name, hash_value)
+                 for digest, manifest in layer["manifests"].items() for name, hash_value in manifest.items()),
+            )
+            connection.executemany(
+                "INSERT INTO frames VALUES (?, ?, ?)",
+                ((layer_name, frame, digest) for frame, digest in layer["frames"].items()),
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+
+def get_cryptomatte_patterns(scene):
+    """Sequences that can carry cryptomatte: the Cryptomatte outputs and combined EXRs."""
+    prefixes = (OUTPUT_TARGETS["Cryptomatte"].node_prefix, OUTPUT_TARGETS["Combined"].node_prefix)
+    return [pattern for pattern in get_output_patterns(scene) if pattern.node.startswith(prefixes)]
+
+def get_mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def update_cryptomatte_indexes(scene, frames, extension=".json", rebuild=False):
+    """
+    Index the frames of every cryptomatte sequence, JSON indexes are updated incrementally:
+    frames already indexed are only read again when their file is not older than the index.
+    """
+    results = []
+    for pattern in get_cryptomatte_patterns(scene):
+        path = get_cryptomatte_index_path(pattern, extension)
+        layers = {} if rebuild or extension != ".json" else load_cryptomatte_index(path)
+        indexed = set().union(*(layer["frames"] for layer in layers.values())) if layers else set()
+        if indexed:
+            # A re-rendered frame may carry a changed manifest (objects renamed, added or removed)
+            indexed_at = get_mtime_ns(path)
+            rewritten = set()
+            for frame in indexed:
+                mtime = get_mtime_ns(os.path.join(pattern.directory, pattern.file_name(frame)))
+                if indexed_at is None or (mtime is not None and mtime >= indexed_at):
+                    rewritten.add(frame)
+            for layer in layers.values():
+                for frame in rewritten:
+                    layer["frames"].pop(frame, None)
+            indexed -= rewritten
+        start = time.perf_counter()
+        layers, read = index_cryptomatte_sequence(pattern, [f for f in frames if f not in indexed], layers)
+        # Manifests and layers no frame refers to any more
+        for layer_name, layer in list(layers.items()):
+            used = set(layer["frames"].values())
+            layer["manifests"] = {digest: manifest for digest, manifest in layer["manifests"].items() if digest in used}
+            if not used:
+                del layers[layer_name]
+        if not layers:
+            continue
+        write_cryptomatte_index(layers, pattern, path)
+        manifests = sum(len(layer["manifests"]) for layer in layers.values())
+        results.append((path, read, manifests, time.perf_counter() - start))
+    return results
+
+@persistent
+def cryptomatte_index_render_complete(scene, *args):
+    if not scene.compositing_settings.index_cryptomatte:
+        return
+    for path, read, manifests, seconds in update_cryptomatte_indexes(scene, get_scene_frames(scene)):
+        print(f"Cryptomatte index {path}: {read} headers read, {manifests} unique manifests, {seconds:.2f}s")
+
+CRYPTOMATTE_INDEX_HANDLERS = (
+    ("render_complete", cryptomatte_index_render_complete),
+)
+
+# -------------------------------------------------------
+# FRAME DEDUPLICATION - Identical consecutive frames of a slot share one file
+# -------------------------------------------------------
+
+def hash_png_pixels(path):
+    """Digest of the decompressed PNG image data, independent of the compression level and text chunks."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError(f"Not a PNG file: {path}")
+    digest = hashlib.blake2b(digest_size=20)
+    # IHDR (size, depth, color type) is part of the image, other metadata is not
+    inflater = zlib.decompressobj()
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if chunk_type == b"IHDR":
+            digest.update(body)
+        elif chunk_type == b"IDAT":
+            digest.update(inflater.decompress(body))
+    digest.update(inflater.flush())
+    return digest.hexdigest()
+
+def hash_exr_data(path):
+    """
+    Digest of the EXR pixel chunks. The header(s) are metadata, and the offset tables hold absolute
+    file positions that move with the header length, so both are excluded.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as handle:
+        for _ in iter_exr_attributes(handle):
+            pass
+        # The offset tables (8 bytes per chunk) end where the first chunk starts, at their smallest offset
+        first_chunk = None
+        while first_chunk is None or handle.tell() < first_chunk:
+            entry = handle.read(8)
+            if len(entry) < 8:
+                break
+            offset = int.from_bytes(entry, "little")
+            # 0 marks a chunk that was never written
+            if offset and (first_chunk is None or offset < first_chunk):
+                first_chunk = offset
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_output_file(path):
+    if path.lower().endswith(".png"):
+        return hash_png_pixels(path)
+    if path.lower().endswith(".exr"):
+        return hash_exr_data(path)
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+def replace_with_hardlink(source, path):
+    """Atomically replace path with a hardlink to source, False when the filesystem does not allow it."""
+    temp_path = f"{path}.dedupe"
+    try:
+        os.link(source, temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+    return True
+
+def break_hardlink(path):
+    """Give path a copy of its own when it shares its inode with other files, True if it did."""
+    try:
+        if os.stat(path).st_nlink < 2:
+            return False
+    except OSError:
+        return False
+    temp_path = f"{path}.dedupe"
+    try:
+        shutil.copy2(path, temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+def get_dedupe_manifest_path(pattern):
+    return os.path.join(pattern.directory, f"{pattern.prefix.rstrip('_.')}_dedupe.json")
+
+def break_frame_hardlinks(patterns, frames):
+    """
+    File Output writers truncate an existing file in place, so a frame rendered again would overwrite
+    every frame hardlinked to it: copy the linked frames of the range apart first.
+    Returns (files copied, errors).
+    """
+    frames = set(frames)
+    copied = 0
+    errors = []
+    for pattern in patterns:
+        try:
+            with open(get_dedupe_manifest_path(pattern), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not manifest.get("hardlinked"):
+            continue
+        # Both the duplicates and the frames they were linked to share an inode
+        linked = set()
+        for first, last, source in manifest.get("duplicates", []):
+            linked.update(range(first, last + 1))
+            linked.add(source)
+        for frame in sorted(linked & frames):
+            path = os.path.join(pattern.directory, pattern.file_name(frame))
+            try:
+                copied += break_hardlink(path)
+            except OSError as exc:
+                errors.append(f"{path}: {exc}")
+    return copied, errors
+
+class FrameDeduplicator:
+    """Hash each frame's output files after they are written and share the ones equal to the previous frame."""
+
+    def __init__(self):
+        self.last_summary = None
+        self.reset()
+
+    def reset(self):
+        self.patterns = []
+        self.hardlink = True
+        self.deferred = False
+        self.staging = {}     # {staged base: base path} while the outputs are staged
+        self.sources = {}     # staged path -> staged source path, linked by the output stager
+        self.frames = set()   # frames rendered since start
+        self.last = {}        # pattern -> (digest, source frame, source path)
+        self.duplicates = {}  # pattern -> {frame: source frame}
+        self.pending = []     # (pattern, frame, source path, path) linked when the render ends
+        self.saved = {}       # pattern -> bytes saved
+        self.errors = []
+
+    def start(self, scene):
+        self.stop()
+        settings = scene.compositing_settings
+        if scene.node_tree is None:
+            return
+        # Links left by earlier renders are broken even with deduplication turned off since
+        patterns = get_output_patterns(scene, written=True)
+        copied, errors = break_frame_hardlinks(patterns, get_scene_frames(scene))
+        if copied or errors:
+            print(f"Frame deduplication: copied {copied} hardlinked frames apart before rendering them again")
+            for error in errors:
+                print(f"    {error}")
+        if not settings.deduplicate_frames:
+            return
+        self.patterns = patterns
+        self.hardlink = settings.dedupe_mode == 'HARDLINK'
+        # Recompression replaces the files, links are made once it has finished
+        self.deferred = settings.deferred_compression
+        # Staged files leave the scratch folder, the stager links them at the destination instead
+        self.staging = get_staging(scene) if settings.use_staging else {}
+
+    def frame_written(self, scene):
+        frame = scene.frame_current
+        self.frames.add(frame)
+        for pattern in self.patterns:
+            path = os.path.join(pattern.directory, pattern.file_name(frame))
+            try:
+                digest = hash_output_file(path)
+            except (OSError, ValueError, zlib.error) as exc:
+                if os.path.exists(path):
+                    self.errors.append(f"{path}: {exc}")
+                self.last.pop(pattern, None)
+                continue
+            last = self.last.get(pattern)
+            if last is None or last[0] != digest:
+                self.last[pattern] = (digest, frame, path)
+                continue
+            _, source_frame, source_path = last
+            self.duplicates.setdefault(pattern, {})[frame] = source_frame
+            if not self.hardlink:
+                self.saved[pattern] = self.saved.get(pattern, 0) + os.path.getsize(path)
+            elif self.staging:
+                self.sources[path] = source_path
+                self.saved[pattern] = self.saved.get(pattern, 0) + os.path.getsize(path)
+            elif self.deferred:
+                self.pending.append((pattern, frame, source_path, path))
+            else:
+                self.link(pattern, frame, source_path, path)
+
+    def link(self, pattern, frame, source_path, path):
+        size = os.path.getsize(path)
+        if os.path.samefile(source_path, path) or replace_with_hardlink(source_path, path):
+            self.saved[pattern] = self.saved.get(pattern, 0) + size
+        else:
+            self.errors.append(f"{path}: hardlink not supported, recorded in the manifest only")
+
+    def write_manifest(self, pattern, duplicates):
+        """Merge the duplicates into <sequence>_dedupe.json: [first, last, source frame] runs."""
+        path = get_dedupe_manifest_path(pattern)
+        try:
+            # While staging, the manifest of earlier renders is at the destination
+            with open(map_staged_path(path, self.staging), "r", encoding="utf-8") as f:
+                existing = runs_to_frames(json.load(f).get("duplicates", []))
+        except (OSError, ValueError):
+            existing = {}
+        if not duplicates and not existing:
+            return
+        # Frames rendered again replace their old entries
+        existing = {frame: source for frame, source in existing.items() if frame not in self.frames}
+        existing.update(duplicates)
+        data = {
+            "sequence": os.path.join(pattern.directory, f"{pattern.prefix}{'#' * pattern.padding}{pattern.suffix}"),
+            "hardlinked": self.hardlink,
+            "duplicates": frames_to_runs(existing),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def stop(self):
+        if not self.patterns:
+            return
+        for pattern, frame, source_path, path in self.pending:
+            if os.path.exists(source_path) and os.path.exists(path):
+                self.link(pattern, frame, source_path, path)
+        for pattern in self.patterns:
+            try:
+                self.write_manifest(pattern, self.duplicates.get(pattern, {}))
+            except OSError as exc:
+                self.errors.append(f"{get_dedupe_manifest_path(pattern)}: {exc}")
+        files = sum(len(duplicates) for duplicates in self.duplicates.values())
+        saved = sum(self.saved.values())
+        self.last_summary = f"{files} duplicate files in {len(self.duplicates)} slots, {saved / 1e6:.1f} MB saved"
+        print(f"Frame deduplication: {self.last_summary}")
+        for pattern, size in sorted(self.saved.items(), key=lambda item: item[1], reverse=True):
+            print(f"    {pattern.prefix}{'#' * pattern.padding}{pattern.suffix}: "
+                  f"{len(self.duplicates[pattern])} frames, {size / 1e6:.1f} MB")
+        for error in self.errors:
+            print(f"    {error}")
+        self.reset()
+
+_frame_deduplicator = FrameDeduplicator()
+
+@persistent
+def frame_dedupe_render_init(scene, *args):
+    _frame_deduplicator.start(scene)
+
+@persistent
+def frame_dedupe_render_post(scene, *args):
+    if _frame_deduplicator.patterns:
+        _frame_deduplicator.frame_written(scene)
+
+@persistent
+def frame_dedupe_render_complete(scene, *args):
+    _frame_deduplicator.stop()
+
+# Registered after DEFERRED_COMPRESSION_HANDLERS, so recompression has flushed when the links are made
+FRAME_DEDUPE_HANDLERS = (
+    ("render_init", frame_dedupe_render_init),
+    ("render_post", frame_dedupe_render_post),
+    ("render_complete", frame_dedupe_render_complete),
+    ("render_cancel", frame_dedupe_render_complete),
+)
+
+# -------------------------------------------------------
+# OUTPUT STAGING - Move frames written to local scratch to base_path on background threads
+# -------------------------------------------------------
+
+# Temp files of the post-write stages, never moved
+STAGING_TEMP_SUFFIXES = (".staging", ".recompress", ".dedupe", ".tmp")
+
+def copy_verified(path, destination):
+    """Copy through a temp file, check size and checksum of the written copy, then move it in place."""
+    temp_path = f"{destination}{STAGING_TEMP_SUFFIXES[0]}"
+    digest = hashlib.blake2b(digest_size=20)
+    size = 0
+    with open(path, "rb") as source, open(temp_path, "wb") as target:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+            target.write(block)
+            size += len(block)
+    with open(temp_path, "rb") as copied:
+        check = hashlib.file_digest(copied, lambda: hashlib.blake2b(digest_size=20))
+    try:
+        if os.path.getsize(temp_path) != size or check.digest() != digest.digest():
+            raise OSError(f"verification failed for {destination}")
+        os.replace(temp_path, destination)
+    except OSError:
+        os.remove(temp_path)
+        raise
+    return size
+
+class OutputStager:
+    """Moves staged output files to their final folder in batches, one frame behind the render."""
+
+    def __init__(self):
+        self.last_summary = None
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pool = None
+        self.staging = {}
+        self.patterns = []
+        self.previous_frame = None
+        self.frames = set()         # frames rendered since start
+        self.batch = []
+        self.queued = set()
+        self.recompressed = set()   # recompressed files waiting for their frame to pass deduplication
+        self.released = set()       # files whose frame passed deduplication, moved once recompressed
+        self.retries = 3
+        self.batch_size = 16
+        self.files = 0
+        self.linked = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.errors = []
+
+    def start(self, scene):
+        self.stop()
+        settings = scene.compositing_settings
+        if not settings.use_staging:
+            return
+        self.staging = get_staging(scene)
+        if not self.staging:
+            return
+        self.patterns = get_output_patterns(scene, written=True)
+        self.retries = settings.staging_retries
+        self.batch_size = settings.staging_batch
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.staging_threads, thread_name_prefix="output-stager")
+
+    def frame_written(self, scene):
+        # The previous frame is through every post-write stage by now, except deferred recompression
+        if self.previous_frame is not None:
+            self.queue_frame(self.previous_frame)
+        self.previous_frame = scene.frame_current
+        self.frames.add(scene.frame_current)
+
+    def queue_frame(self, frame):
+        recompressed = set(_deferred_compression.patterns) if _deferred_compression.recompressor is not None else set()
+        for pattern in self.patterns:
+            path = os.path.join(pattern.directory, pattern.file_name(frame))
+            if pattern in recompressed:
+                # Moved by recompressed_file() once the recompressor is done with it, unless it already is
+                with self.lock:
+                    ready = path in self.recompressed
+                    self.recompressed.discard(path)
+                    if not ready:
+                        self.released.add(path)
+                if not ready:
+                    continue
+            if os.path.exists(path):
+                self.submit(path)
+        self.submit_batch()
+
+    def recompressed_file(self, path):
+        """Recompressor callback: queue the file if deduplication has hashed its frame, hold it otherwise."""
+        with self.lock:
+            if path not in self.released:
+                self.recompressed.add(path)
+                return
+            self.released.discard(path)
+        self.submit(path)
+
+    def submit(self, path):
+        """Queue one staged file, called from the render thread and the recompression threads."""
+        with self.lock:
+            if self.pool is None or path in self.queued:
+                return
+            self.queued.add(path)
+            self.batch.append(path)
+            if len(self.batch) < self.batch_size:
+                return
+            batch, self.batch = self.batch, []
+        self.pool.submit(self.transfer_batch, batch)
+
+    def submit_batch(self):
+        with self.lock:
+            batch, self.batch = self.batch, []
+        if batch:
+            self.pool.submit(self.transfer_batch, batch)
+
+    def transfer_batch(self, paths):
+        for path in paths:
+            error = None
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(min(8.0, 0.5 * 2 ** (attempt - 1)))
+                try:
+                    self.transfer(path)
+                    break
+                except OSError as exc:
+                    error = exc
+            else:
+                # The file stays in the scratch folder, the final flush tries again
+                with self.lock:
+                    self.errors.append(f"{path}: {error}")
+                    self.queued.discard(path)
+
+    def transfer(self, path):
+        destination = map_staged_path(path, self.staging)
+        if destination == path or not os.path.exists(path):
+            return
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        source = _frame_deduplicator.sources.get(path)
+        source_destination = map_staged_path(source, self.staging) if source else None
+        if source_destination and os.path.exists(source_destination) and replace_with_hardlink(source_destination, destination):
+            size = 0
+            linked = 1
+        else:
+            size = copy_verified(path, destination)
+            linked = 0
+        os.remove(path)
+        with self.lock:
+            self.files += 1
+            self.linked += linked
+            self.bytes += size
+            self.seconds += time.perf_counter() - start
+
+    def is_staged(self, path):
+        return any(path == staged or path.startswith(staged + os.sep) for staged in self.staging)
+
+    def stop(self):
+        """Final flush: move what is left (last frame, dedupe manifests, earlier failures) and wait for it."""
+        if self.pool is None:
+            return
+        if self.previous_frame is not None:
+            self.queue_frame(self.previous_frame)
+        # Only the files of this render: a staged base is shared by every render of the same base_path,
+        # other workers on this host may still be writing theirs
+        paths = [os.path.join(pattern.directory, pattern.file_name(frame))
+                 for frame in sorted(self.frames) for pattern in self.patterns]
+        paths += [get_dedupe_manifest_path(pattern) for pattern in self.patterns]
+        for path in paths:
+            if os.path.exists(path):
+                self.submit(path)
+        self.submit_batch()
+        start = time.perf_counter()
+        self.pool.shutdown(wait=True)
+        waited = time.perf_counter() - start
+        # Folders this render left empty, up to the staged base
+        for directory in sorted({os.path.dirname(path) for path in paths}, key=len, reverse=True):
+            while self.is_staged(directory):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        self.last_summary = (f"moved {self.files} files ({self.linked} as hardlinks), {self.bytes / 1e6:.1f} MB "
+                             f"in {self.seconds:.1f} thread-seconds, final flush {waited:.1f}s, {len(self.errors)} errors")
+        print(f"Output staging: {self.last_summary}")
+        for error in self.errors:
+            print(f"    {error}")
+        self.reset()
+
+_output_stager = OutputStager()
+
+@persistent
+def output_staging_render_init(scene, *args):
+    _output_stager.start(scene)
+
+@persistent
+def output_staging_render_post(scene, *args):
+    if _output_stager.pool is not None:
+        _output_stager.frame_written(scene)
+
+@persistent
+def output_staging_render_complete(scene, *args):
+    _output_stager.stop()
+
+# After DEFERRED_COMPRESSION_HANDLERS and FRAME_DEDUPE_HANDLERS: files move once those stages are done with them
+OUTPUT_STAGING_HANDLERS = (
+    ("render_init", output_staging_render_init),
+    ("render_post", output_staging_render_post),
+    ("render_complete", output_staging_render_complete),
+    ("render_cancel", output_staging_render_complete),
+)
+
+# -------------------------------------------------------
+# UPDATE CHECK - version.json fetched on a background thread, cached on disk
+# -------------------------------------------------------
+
+# Overridable with COMPOSITING_UPDATE_URL (a URL or a local file path, empty disables the check).
+# latest_version in version.json follows bl_info["version"]: (1, 38) is published as "1.38".
+UPDATE_URL = "https://raw.githubusercontent.com/galihb2233/PNG-EXR-Blender-Exporter/main/version.json"
+UPDATE_CACHE_FILE = "compositing_update_check.json"
+UPDATE_CACHE_TTL = 24 * 3600
+UPDATE_TIMEOUT = 3.0
+
+def parse_version(version):
+    """'1.2.0' or (1, 2, 0) -> (1, 2, 0), non numeric parts are dropped."""
+    parts = version.split(".") if isinstance(version, str) else version
+    return tuple(int(part) for part in parts if str(part).strip().isdigit())
+
+def is_newer_version(latest, current):
+    length = max(len(latest), len(current))
+    return latest + (0,) * (length - len(latest)) > current + (0,) * (length - len(current))
+
+def fetch_version_info(url, timeout=UPDATE_TIMEOUT):
+    """Read version.json from a URL (http, https, file) or a local path."""
+    if os.path.exists(url):
+        with open(url, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = json.loads(response.read().decode("utf-8"))
+    return {"latest_version": str(data["latest_version"]), "download_url": str(data.get("download_url", ""))}
+
+class UpdateChecker:
+    """Fetches version.json once per TTL on a daemon thread, the panel reads the last result."""
+
+    def __init__(self):
+        self.result = None  # {"latest_version", "download_url", "update_available"} once known
+        self.thread = None
+
+    def evaluate(self, info, current_version):
+        self.result = {
+            **info,
+            "update_available": is_newer_version(parse_version(info["latest_version"]), parse_version(current_version)),
+        }
+
+    def read_cache(self, cache_path, url, ttl):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("url") != url or time.time() - cache.get("checked", 0) > ttl:
+            return None
+        return cache.get("info")
+
+    def start(self, url, cache_path, current_version, ttl=UPDATE_CACHE_TTL, timeout=UPDATE_TIMEOUT, force=False):
+        """Use the cached result while it is fresh, otherwise fetch in the background. Never raises."""
+        if not url or (self.thread is not None and self.thread.is_alive()):
+            return
+        info = None if force else self.read_cache(cache_path, url, ttl)
+        if info is not None:
+            self.evaluate(info, current_version)
+            return
+        self.thread = threading.Thread(
+            target=self.run, args=(url, cache_path, current_version, timeout), name="compositing-update-check", daemon=True,
+        )
+        self.thread.start()
+
+    def run(self, url, cache_path, current_version, timeout):
+        try:
+            info = fetch_version_info(url, timeout)
+        except (OSError, ValueError, KeyError, TypeError):
+            # Offline or a broken file: no result, no message
+            return
+        self.evaluate(info, current_version)
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "checked": time.time(), "info": info}, f)
+        except OSError:
+            pass
+
+_update_checker = UpdateChecker()
+
+def get_update_url():
+    return os.environ.get("COMPOSITING_UPDATE_URL", UPDATE_URL)
+
+def get_update_cache_path():
+    return os.path.join(bpy.utils.user_resource('CONFIG'), UPDATE_CACHE_FILE)
+
+def redraw_node_editors():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'NODE_EDITOR':
+                area.tag_redraw()
+
+def start_update_check(force=False):
+    """Timer callback: start the check after register(), then poll until the thread is done to redraw the panel."""
+    _update_checker.start(get_update_url(), get_update_cache_path(), bl_info["version"], force=force)
+    if not bpy.app.timers.is_registered(poll_update_check):
+        bpy.app.timers.register(poll_update_check, first_interval=0.5)
+    return None
+
+def poll_update_check():
+    if _update_checker.thread is not None and _update_checker.thread.is_alive():
+        return 0.5
+    if _update_checker.result is not None:
+        redraw_node_editors()
+    return None
+
+class CheckForUpdate(bpy.types.Operator):
+    bl_idname = "nodes.check_for_update"
+    bl_label = "Check for Update"
+    bl_description = "Fetch version.json again, ignoring the cached result"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        start_update_check(force=True)
+        return {'FINISHED'}
+
+class COMPOSITING_PT_AutoSetupPanel(bpy.types.Panel):
+    bl_label = "Set Alpha & Denoise"
+    bl_idname = "COMPOSITING_PT_auto_setup"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Galih@2025"
+
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.compositing_settings
+
+        update = _update_checker.result
+        if update is not None and update["update_available"]:
+            row = layout.row(align=True)
+            row.label(text=f"Update available: {update['latest_version']}", icon='INFO')
+            if update["download_url"]:
+                row.operator("wm.url_open", text="", icon='URL').url = update["download_url"]
+            row.operator(CheckForUpdate.bl_idname, text="", icon='FILE_REFRESH')
+        
+        layout.prop(settings, "selected_view_layer", text="View Layer")
+
+        # -------------------------------------------------------
+        # UPDATED PREFETCH BUTTON - Now creates Render Layers nodes for all view layers
+        # -------------------------------------------------------
+        layout.operator("nodes.prefetch_passes", text="Prefetch Passes", icon='FILE_REFRESH')
+
+        # Default to active view layer if none selected (never write settings from draw)
+        view_layer = context.scene.view_layers.get(settings.selected_view_layer) or context.view_layer
+        enabled_passes = get_enabled_passes(context.scene, view_layer) if view_layer else frozenset()
+
+        grid = layout.grid_flow(row_major=True, columns=5, align=True)
+        grid.label(text="Pass")
+        grid.label(text="Set Alpha")
+        grid.label(text="Denoise")
+        grid.label(text="Albedo")
+        grid.label(text="Normal")
+
+        for i, pass_name in enumerate(DEFAULT_PASSES):
+            if pass_name in enabled_passes:
+                grid.label(text=pass_name)
+                grid.prop(settings, "set_alpha_passes", index=i, text="")
+                grid.prop(settings, "denoise_passes", index=i, text="")
+                grid.prop(settings, "use_denoise_albedo", index=i, text="")
+                grid.prop(settings, "use_denoise_normal", index=i, text="")
+
+        row = layout.row(align=True)
+        row.operator(ToggleAllSetAlpha.bl_idname, text="Set Alpha")
+        row.operator(ToggleAllDenoise.bl_idname, text="Denoise")
+        row.operator(ToggleAllAlbedo.bl_idname, text="Albedo")
+        row.operator(ToggleAllNormal.bl_idname, text="Normal")
+
+        layout.separator()
+        row = layout.row(align=True)
+        row.operator(UncheckAllPasses.bl_idname, text="Uncheck All")
+        row.operator(RestoreDefaultSettings.bl_idname, text="Default")
+        row = layout.row(align=True)
+        row.operator(AnalyzeDenoiseNoise.bl_idname, text="Analyze Noise", icon='VIEWZOOM')
+        row.prop(settings, "noise_threshold", text="Threshold")
+        
+        # Output Path Settings
+        layout.separator()
+        box = layout.box()
+        box.label(text="Output Path Settings", icon='FILE_FOLDER')
+        box.prop(settings, "base_path", text="Base Path")
+        box.prop(settings, "use_staging")
+        if settings.use_staging:
+            box.prop(settings, "staging_root", text="Scratch")
+            row = box.row(align=True)
+            row.prop(settings, "staging_threads", text="Threads")
+            row.prop(settings, "staging_retries", text="Retries")
+            row.prop(settings, "staging_batch", text="Batch")
+            if _output_stager.last_summary:
+                box.label(text=_output_stager.last_summary, icon='EXPORT')
+        row = box.row(align=True)
+        row.prop(settings, "encoding_profile", text="Encoding")
+        row.operator(BenchmarkEncoding.bl_idname, text="", icon='SORTTIME')
+        row = box.row(align=True)
+        row.prop(settings, "output_layout", text="Layout")
+        row.operator(CompareOutputLayouts.bl_idname, text="", icon='TIME')
+        if settings.output_layout == 'CONSOLIDATED':
+            box.prop(settings, "merge_cryptomatte")
+        
+        layout.prop(settings, "keep_existing_path")
+        layout.prop(settings, "reconcile_existing")
+        layout.prop(settings, "denoise_mode", text="Denoise Mode")
+        row = layout.row(align=True)
+        row.prop(settings, "shared_prefilter")
+        row.operator(CompareDenoiseLayouts.bl_idname, text="", icon='TIME')
+        layout.prop(settings, "use_node_groups")
+        if _last_group_stats is not None:
+            loose_nodes, loose_links = _last_group_stats["loose"]
+            grouped_nodes, grouped_links = _last_group_stats["grouped"]
+            col = layout.column(align=True)
+            col.label(text=f"Loose: {loose_nodes} nodes, {loose_links} links")
+            col.label(text=f"Grouped: {grouped_nodes} nodes, {grouped_links} links ({_last_group_stats['groups']} groups)")
+        layout.prop(settings, "use_prefix")
+        if settings.use_prefix:
+            layout.prop(settings, "prefix_text", text="Prefix")
+        layout.prop(settings, "use_suffix")
+        if settings.use_suffix:
+            layout.prop(settings, "suffix_text", text="Suffix")
+        layout.separator()
+        layout.operator(AutoCompositingSetup.bl_idname, text="GENERATE NODES", icon='NODE_COMPOSITING')
+        layout.operator(CheckOutputCompleteness.bl_idname, text="Check Outputs", icon='CHECKMARK')
+        row = layout.row(align=True)
+        row.operator(EstimateFootprint.bl_idname, text="Estimate Footprint", icon='MEMORY')
+        row.operator(CalibrateFootprint.bl_idname, text="", icon='DRIVER_DISTANCE')
+        row = layout.row(align=True)
+        row.prop(settings, "memory_budget_gb", text="RAM GB")
+        row.prop(settings, "disk_budget_gb", text="Disk GB")
+        if _last_footprint is not None:
+            col = layout.column(align=True)
+            col.label(text=f"Peak {format_bytes(_last_footprint.peak_memory)}/frame, "
+                           f"disk {format_bytes(_last_footprint.sequence_bytes)}")
+            # The largest sequences first
+            outputs = sorted(_last_footprint.outputs, key=lambda output: output["sequence_bytes"], reverse=True)
+            for output in outputs[:5]:
+                col.label(text=(f"{output['node']}: {format_bytes(output['frame_bytes'])}/frame, "
+                                f"{format_bytes(output['sequence_bytes'])} ({output['codec']} x{output['ratio']:.2f})"))
+            for warning in _last_footprint.warnings:
+                col.label(text=warning, icon='ERROR')
+        row = layout.row(align=True)
+        row.prop(settings, "preview_mode", toggle=True, icon='HIDE_OFF' if settings.preview_mode else 'SHADING_RENDERED')
+        row.prop(settings, "preview_resolution", text="")
+
+        layout.prop(settings, "profile_build")
+        if settings.profile_build:
+            layout.prop(settings, "profile_report_path", text="Report")
+            if _last_build_report is not None:
+                draw_build_report(layout, _last_build_report)
+
+        layout.prop(settings, "deferred_compression")
+        if settings.deferred_compression:
+            row = layout.row(align=True)
+            row.prop(settings, "recompress_threads", text="Threads")
+            row.prop(settings, "recompress_queue", text="Queue")
+            if _deferred_compression.last_summary:
+                layout.label(text=_deferred_compression.last_summary, icon='FILE_IMAGE')
+
+        row = layout.row(align=True)
+        row.prop(settings, "deduplicate_frames")
+        if settings.deduplicate_frames:
+            row.prop(settings, "dedupe_mode", text="")
+            if _frame_deduplicator.last_summary:
+                layout.label(text=_frame_deduplicator.last_summary, icon='LINKED')
+
+        layout.prop(settings, "index_cryptomatte")
+
+        layout.prop(settings, "telemetry_enabled")
+        if settings.telemetry_enabled:
+            layout.prop(settings, "telemetry_path", text="Log")
+            last = _telemetry.last
+            if last is not None:
+                col = layout.column(align=True)
+                col.label(text=f"Frame {last['frame']}: {last['frame_s']:.1f} s", icon='RENDER_ANIMATION')
+                if last["frames_per_hour"]:
+                    col.label(text=f"{last['frames_per_hour']:.0f} frames/h, ETA {last['eta']}")
+
+def draw_build_report(layout, report):
+    """Summarize the last build profile in the sidebar."""
+    box = layout.box()
+    box.label(text=f"{report['label']}: {report['total_s'] * 1000:.1f} ms", icon='SORTTIME')
+    counters = report["counters"]
+    col = box.column(align=True)
+    col.label(text=(f"Nodes +{counters.get('nodes_added', 0)}  "
+                    f"Slots +{counters.get('slots_added', 0)}  "
+                    f"Links +{counters.get('links_added', 0)}"))
+    if "plan_cache.hit" in counters or "plan_cache.miss" in counters:
+        col.label(text="Plan: cached" if counters.get("plan_cache.hit") else "Plan: compiled")
+    lookups = [f"{level} {counters[f'socket_lookup.{level}']}"
+               for level in SOCKET_LOOKUP_LEVELS + ("miss",) if f"socket_lookup.{level}" in counters]
+    if lookups:
+        col.label(text="Lookups: " + ", ".join(lookups))
+    if "sockets.scanned" in counters:
+        col.label(text=(f"Sockets: scanned {counters['sockets.scanned']}, routed {counters.get('sockets.routed', 0)}, "
+                        f"AOV {counters.get('sockets.aov', 0)}, light groups {counters.get('sockets.lightgroup', 0)}"))
+    stages = sorted(report["stages_s"].items(), key=lambda item: item[1], reverse=True)
+    for name, seconds in stages[:5]:
+        col.label(text=f"{name}: {seconds * 1000:.1f} ms")
+
+# -------------------------------------------------------
+# HEADLESS RENDER SCHEDULER - blender -b file.blend --python galih_compositing/cli.py -- render [options]
+# -------------------------------------------------------
+
+# Prefix of the progress lines workers print, parsed by the coordinator
+PROGRESS_TAG = "[compositing-worker]"
+# Script the workers run with --python, it imports this package and calls run_cli
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+
+def parse_frame_spec(spec):
+    """Parse '1-100,120,130-140x2' into a sorted list of frame numbers."""
+    frames = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        step = 1
+        if "x" in part:
+            part, step_text = part.split("x", 1)
+            step = max(1, int(step_text))
+        if "-" in part[1:]:
+            split_at = part.index("-", 1)
+            start, end = int(part[:split_at]), int(part[split_at + 1:])
+            frames.update(range(start, end + 1, step))
+        else:
+            frames.add(int(part))
+    return sorted(frames)
+
+def format_frame_spec(frames):
+    """Inverse of parse_frame_spec, collapsing contiguous runs (any constant step)."""
+    runs = []
+    for frame in sorted(frames):
+        if runs:
+            start, end, step = runs[-1]
+            if start == end and frame > end:
+                runs[-1] = (start, frame, frame - end)
+                continue
+            if frame - end == step:
+                runs[-1] = (start, frame, step)
+                continue
+        runs.append((frame, frame, 1))
+    parts = []
+    for start, end, step in runs:
+        if start == end:
+            parts.append(str(start))
+        elif step == 1:
+            parts.append(f"{start}-{end}")
+        elif end - start == step:
+            parts.append(f"{start},{end}")
+        else:
+            parts.append(f"{start}-{end}x{step}")
+    return ",".join(parts)
+
+def chunk_frames(frames, chunk_size):
+    """Split a frame list into consecutive chunks of at most chunk_size frames."""
+    return [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+
+def get_output_view_layers(node_tree, node_types=('OUTPUT_FILE',)):
+    """Map each File Output node name (or node of node_types) to the set of view layers feeding it."""
+    upstream = {}
+    for link in node_tree.links:
+        upstream.setdefault(link.to_node.name, []).append(link.from_node)
+
+    # View layers per node, each node is resolved once from its inputs (post-order walk)
+    memo = {}
+    entered = set()
+    result = {}
+    for node in node_tree.nodes:
+        if node.type not in node_types:
+            continue
+        stack = [(node, False)]
+        while stack:
+            current, inputs_done = stack.pop()
+            if current.name in memo:
+                continue
+            if not inputs_done:
+                # A node entered twice is in a cycle, it resolves with the inputs known so far
+                if current.name in entered:
+                    continue
+                entered.add(current.name)
+                stack.append((current, True))
+                stack.extend((source, False) for source in upstream.get(current.name, ()))
+                continue
+            layers = {current.layer} if current.type == 'R_LAYERS' else set()
+            for source in upstream.get(current.name, ()):
+                layers.update(memo.get(source.name, ()))
+            memo[current.name] = frozenset(layers)
+        result[node.name] = memo[node.name]
+    return result
+
+class RenderJob:
+    """One worker invocation: a frame chunk for a set of view layers."""
+    __slots__ = ("index", "frames", "view_layers", "attempts", "done_frames", "returncode", "seconds")
+
+    def __init__(self, index, frames, view_layers):
+        self.index = index
+        self.frames = frames
+        self.view_layers = view_layers
+        self.attempts = 0
+        self.done_frames = set()
+        self.returncode = None
+        self.seconds = 0.0
+
+    def describe(self):
+        layers = ",".join(self.view_layers) if self.view_layers else "all layers"
+        return f"job {self.index} frames {format_frame_spec(self.frames)} ({layers})"
+
+class RenderScheduler:
+    """Run RenderJobs on a pool of background Blender processes with retries and progress."""
+
+    def __init__(self, blend_path, scene_name, jobs, workers, threads, retries, script_path=None, blender_path=None):
+        self.blend_path = blend_path
+        self.scene_name = scene_name
+        self.jobs = jobs
+        self.workers = workers
+        self.threads = threads
+        self.retries = retries
+        self.script_path = script_path or CLI_SCRIPT
+        self.blender_path = blender_path or bpy.app.binary_path
+        self.lock = threading.Lock()
+        self.total_units = sum(len(job.frames) for job in jobs)
+        self.done_units = 0
+        self.start_time = None
+
+    def worker_command(self, job):
+        command = [self.blender_path, "-b", self.blend_path]
+        if self.threads:
+            command += ["-t", str(self.threads)]
+        command += [
+            "--python-exit-code", "1",
+            "--python", self.script_path,
+            "--",
+            "render-worker",
+            "--scene", self.scene_name,
+            "--frames", format_frame_spec(job.frames),
+        ]
+        if job.view_layers:
+            command += ["--layers", ",".join(job.view_layers)]
+        return command
+
+    def report_progress(self, job, frame):
+        with self.lock:
+            if frame in job.done_frames:
+                return
+            job.done_frames.add(frame)
+            self.done_units += 1
+            elapsed = time.perf_counter() - self.start_time
+            rate = self.done_units / elapsed if elapsed else 0.0
+            remaining = (self.total_units - self.done_units) / rate if rate else 0.0
+            print(f"[{self.done_units}/{self.total_units}] frame {frame} of {job.describe()} "
+                  f"- elapsed {elapsed:.0f}s, ETA {remaining:.0f}s", flush=True)
+
+    def run_job(self, job):
+        while job.attempts <= self.retries:
+            job.attempts += 1
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                self.worker_command(job),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+            )
+            tail = []
+            for line in process.stdout:
+                if line.startswith(PROGRESS_TAG):
+                    self.report_progress(job, int(line.split()[-1]))
+                else:
+                    tail = (tail + [line.rstrip()])[-20:]
+            job.returncode = process.wait()
+            job.seconds += time.perf_counter() - start
+            if job.returncode == 0:
+                return job
+
+            print(f"{job.describe()} failed with exit code {job.returncode} "
+                  f"(attempt {job.attempts}/{self.retries + 1})", flush=True)
+            for line in tail:
+                print(f"    {line}", flush=True)
+            # Retry only what is still missing
+            remaining = [f for f in job.frames if f not in job.done_frames]
+            if not remaining:
+                job.returncode = 0
+                return job
+            job.frames = remaining
+        return job
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            finished = list(pool.map(self.run_job, self.jobs))
+        failed = [job for job in finished if job.returncode != 0]
+        elapsed = time.perf_counter() - self.start_time
+        print(f"Rendered {self.done_units}/{self.total_units} frame units with {self.workers} workers "
+              f"in {elapsed:.1f}s, {len(failed)} failed jobs", flush=True)
+        for job in failed:
+            print(f"    FAILED {job.describe()}", flush=True)
+        return failed
+
+def cli_render(args):
+    """Coordinator: split the scene's frames (and optionally view layers) across worker processes."""
+    if not bpy.data.filepath:
+        print("The blend file must be saved before it can be rendered by workers")
+        return 1
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        print(f"Scene not found: {args.scene}")
+        return 1
+
+    frames = parse_frame_spec(args.frames) if args.frames else get_scene_frames(scene)
+    view_layers = [vl.name for vl in scene.view_layers if vl.use]
+    if args.layers:
+        wanted = args.layers.split(",")
+        view_layers = [name for name in view_layers if name in wanted]
+
+    # Frames still to render per view layer
+    layer_frames = {view_layer: frames for view_layer in view_layers}
+    if args.skip_complete:
+        report = scan_output_completeness(get_output_patterns(scene), frames, verify=args.verify)
+        print(f"Existing outputs: {report.summary()}", flush=True)
+        layer_frames = {view_layer: report.incomplete_frames(view_layer) for view_layer in view_layers}
+    if not any(layer_frames.values()):
+        print("Nothing to render")
+        return 0
+
+    jobs = []
+    if args.split_layers:
+        for view_layer, pending in layer_frames.items():
+            for chunk in chunk_frames(pending, args.chunk):
+                jobs.append(RenderJob(len(jobs), chunk, [view_layer]))
+    else:
+        pending = sorted(set().union(*layer_frames.values()))
+        for chunk in chunk_frames(pending, args.chunk):
+            jobs.append(RenderJob(len(jobs), chunk, view_layers if args.layers else []))
+
+    workers = args.workers or max(1, (os.cpu_count() or 1) // 8)
+    threads = args.threads if args.threads is not None else max(1, (os.cpu_count() or 1) // workers)
+    print(f"Rendering {sum(len(job.frames) for job in jobs)} frame units of {len(view_layers)} view layers as {len(jobs)} jobs "
+          f"on {workers} workers ({threads} threads each)", flush=True)
+    scheduler = RenderScheduler(bpy.data.filepath, scene.name, jobs, workers, threads, args.retries)
+    failed = scheduler.run()
+    return 1 if failed else 0
+
+def cli_scan(args):
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        print(f"Scene not found: {args.scene}")
+        return 1
+    frames = parse_frame_spec(args.frames) if args.frames else get_scene_frames(scene)
+    report = scan_output_completeness(get_output_patterns(scene), frames, args.verify, args.workers)
+    data = report.to_dict()
+    for sequence in data["sequences"]:
+        if sequence["missing"] or sequence["truncated"]:
+            print(f"{sequence['pattern']}: missing {sequence['missing'] or '-'}, truncated {sequence['truncated'] or '-'}")
+    print(report.summary())
+    print(f"Re-render: {data['rerender'] or 'nothing'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    return 0
+
+def cli_estimate(args):
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        print(f"Scene not found: {args.scene}")
+        return 1
+    settings = scene.compositing_settings
+    if args.calibrate:
+        ratios = calibrate_compression_ratios(scene)
+        if ratios:
+            print(f"Calibration written to {write_footprint_calibration(ratios, settings.footprint_calibration)}")
+    estimate = estimate_footprint(
+        scene,
+        load_footprint_calibration(settings.footprint_calibration),
+        int((args.memory_budget if args.memory_budget is not None else settings.memory_budget_gb) * GIB),
+        int((args.disk_budget if args.disk_budget is not None else settings.disk_budget_gb) * GIB),
+    )
+    for view_layer, size in sorted(estimate.memory.items()):
+        print(f"{view_layer}: {format_bytes(size)} per frame")
+    for output in estimate.outputs:
+        print(f"{output['node']}: {format_bytes(output['frame_bytes'])}/frame, {format_bytes(output['sequence_bytes'])} total "
+              f"({output['codec']} x{output['ratio']:.2f}{'' if output['calibrated'] else ', default ratio'})")
+    print(estimate.summary())
+    for warning in estimate.warnings:
+        print(f"WARNING: {warning}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(estimate.to_dict(), f, indent=2)
+    return 2 if estimate.warnings else 0
+
+def cli_crypto_index(args):
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        print(f"Scene not found: {args.scene}")
+        return 1
+    frames = parse_frame_spec(args.frames) if args.frames else get_scene_frames(scene)
+    results = update_cryptomatte_indexes(scene, frames, f".{args.format}", args.rebuild)
+    for path, read, manifests, seconds in results:
+        print(f"{path}: {read} headers read, {manifests} unique manifests, {seconds:.2f}s")
+    if not results:
+        print("No cryptomatte outputs found")
+    return 0
+
+def cli_render_worker(args):
+    """Worker: render the given frames, only writing the File Outputs of the given view layers."""
+    scene = bpy.data.scenes[args.scene]
+
+    if args.layers:
+        selected = set(args.layers.split(","))
+        for view_layer in scene.view_layers:
+            view_layer.use = view_layer.name in selected
+        # Outputs fed by layers that are not rendered here would overwrite other workers' files
+        if scene.node_tree:
+            output_layers = get_output_view_layers(scene.node_tree)
+            for node in scene.node_tree.nodes:
+                layers = output_layers.get(node.name)
+                if layers:
+                    node.mute = not layers <= selected
+
+    def print_progress(scene, *args):
+        print(f"{PROGRESS_TAG} frame {scene.frame_current}", flush=True)
+
+    # Workers splitting the view layers render the same frames: the main output (a composite of only
+    # some of the layers) goes to a scratch folder of this worker instead of render.filepath
+    scratch = tempfile.TemporaryDirectory(prefix="compositing_worker_") if args.layers else nullcontext()
+    bpy.app.handlers.render_post.append(print_progress)
+    try:
+        with scratch as scratch_dir:
+            if scratch_dir is not None:
+                scene.render.filepath = os.path.join(scratch_dir, "")
+            # Render each contiguous run as one animation so scene sync happens once per run
+            for part in format_frame_spec(parse_frame_spec(args.frames)).split(","):
+                run = parse_frame_spec(part)
+                scene.frame_start = run[0]
+                scene.frame_end = run[-1]
+                scene.frame_step = run[1] - run[0] if len(run) > 1 else 1
+                bpy.ops.render.render(animation=True, scene=scene.name)
+    finally:
+        bpy.app.handlers.render_post.remove(print_progress)
+    return 0
+
+def cli_benchmark_encoding(args):
+    profile = run_encoding_benchmark(
+        bpy.context.scene, args.width, args.height, args.repeats, args.source, args.storage_mb_per_s, args.decode_weight,
+    )
+    path = write_encoding_profile(profile, args.output)
+    for result in profile["results"]:
+        print(f"{result['role']:<12} {result['pass']:<12} {json.dumps(result['settings']):<24} "
+              f"{result['bytes']:>12} B  enc {result['encode_seconds']:.4f}s  dec {result['decode_seconds']:.4f}s")
+    print(f"Chosen: {json.dumps(profile['outputs'])}")
+    print(f"Profile written to {path}")
+    return 0
+
+# -------------------------------------------------------
+# BATCH SETUP - Apply GENERATE NODES to many .blend files with a settings preset
+# -------------------------------------------------------
+
+# Prefix of the result line printed by setup workers
+BATCH_RESULT_TAG = "[compositing-setup]"
+
+# CompositingSettings fields stored in a preset, pass toggles are stored as lists of pass names
+PRESET_PASS_FIELDS = ("set_alpha_passes", "denoise_passes", "use_denoise_albedo", "use_denoise_normal")
+PRESET_FIELDS = (
+    "denoise_mode", "shared_prefilter", "use_node_groups", "output_layout", "merge_cryptomatte", "base_path", "use_prefix", "prefix_text",
+    "use_suffix", "suffix_text", "encoding_profile", "keep_existing_path", "reconcile_existing", "deferred_compression",
+    "use_staging", "staging_root",
+)
+
+def settings_to_preset(settings):
+    preset = {field: getattr(settings, field) for field in PRESET_FIELDS}
+    for field in PRESET_PASS_FIELDS:
+        preset[field] = [pass_name for pass_name, enabled in zip(DEFAULT_PASSES, getattr(settings, field)) if enabled]
+    return preset
+
+def apply_settings_preset(settings, preset):
+    """Set the CompositingSettings from a preset, fields missing from the preset are left alone."""
+    unknown = set(preset) - set(PRESET_FIELDS) - set(PRESET_PASS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown preset fields: {', '.join(sorted(unknown))}")
+    for field in PRESET_FIELDS:
+        if field in preset:
+            setattr(settings, field, preset[field])
+    for field in PRESET_PASS_FIELDS:
+        if field not in preset:
+            continue
+        value = preset[field]
+        # Either a list of pass names or one flag per DEFAULT_PASSES entry
+        if all(isinstance(item, bool) for item in value) and len(value) == len(DEFAULT_PASSES):
+            setattr(settings, field, list(value))
+            continue
+        missing = set(value) - set(DEFAULT_PASSES)
+        if missing:
+            raise ValueError(f"Unknown passes in {field}: {', '.join(sorted(missing))}")
+        setattr(settings, field, [pass_name in value for pass_name in DEFAULT_PASSES])
+
+def load_settings_preset(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def get_current_plan(scene):
+    """The GraphPlan GENERATE NODES would apply now, None if a Render Layers node is missing."""
+    node_tree = scene.node_tree
+    if node_tree is None:
+        return None
+    layers = []
+    for view_layer in scene.view_layers:
+        if not view_layer.use:
+            continue
+        render_layers = node_tree.nodes.get(f"RenderLayers_{view_layer.name}")
+        if render_layers is None or render_layers.type != 'R_LAYERS':
+            return None
+        layers.append(get_layer_inputs(view_layer, render_layers))
+    return get_graph_plan(snapshot_settings(scene.compositing_settings), layers)
+
+def expand_blend_paths(inputs, recursive=False):
+    """Resolve folders and glob patterns to a sorted list of .blend files."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*.blend") if recursive else os.path.join(item, "*.blend")
+            matches = glob.glob(pattern, recursive=recursive)
+        else:
+            matches = glob.glob(item, recursive=recursive)
+        paths.update(os.path.abspath(path) for path in matches if path.endswith(".blend"))
+    return sorted(paths)
+
+def get_file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+class BatchSetup:
+    """Run setup workers over .blend files, skipping files unchanged since the last run with the same preset."""
+
+    def __init__(self, paths, preset_path, workers, state_path, force=False, script_path=None, blender_path=None):
+        self.paths = paths
+        self.preset_path = os.path.abspath(preset_path)
+        self.workers = workers
+        self.state_path = state_path
+        self.force = force
+        self.script_path = script_path or CLI_SCRIPT
+        self.blender_path = blender_path or bpy.app.binary_path
+        with open(self.preset_path, "rb") as f:
+            preset_bytes = f.read()
+        # A new preset or add-on version invalidates the state of every file
+        key = repr((bl_info["version"], PLAN_VERSION, preset_bytes))
+        self.preset_digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        self.state = self.load_state()
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+    def is_unchanged(self, path):
+        entry = self.state.get(path)
+        return (not self.force and entry is not None and entry.get("preset") == self.preset_digest
+                and entry.get("stamp") == get_file_stamp(path))
+
+    def worker_command(self, path):
+        command = [
+            self.blender_path, "-b", path,
+            "--python-exit-code", "1",
+            "--python", self.script_path,
+            "--",
+            "setup-worker",
+            "--preset", self.preset_path,
+        ]
+        if self.force:
+            command.append("--force")
+        return command
+
+    def run_file(self, path):
+        if self.is_unchanged(path):
+            return {"file": path, "status": "skipped", "seconds": 0.0, "warnings": []}
+        start = time.perf_counter()
+        process = subprocess.run(self.worker_command(path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 text=True, errors="replace")
+        result = None
+        for line in process.stdout.splitlines():
+            if line.startswith(BATCH_RESULT_TAG):
+                result = json.loads(line[len(BATCH_RESULT_TAG):])
+        if process.returncode != 0 or result is None:
+            tail = process.stdout.splitlines()[-20:]
+            result = {"file": path, "status": "failed", "warnings": [], "log": tail}
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        return result
+
+    def run(self):
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for result in pool.map(self.run_file, self.paths):
+                results.append(result)
+                print(f"{result['status']:<10} {result['seconds']:>7.1f}s  {len(result['warnings'])} warnings  "
+                      f"{result['file']}", flush=True)
+                for line in result.get("log", ()):
+                    print(f"    {line}", flush=True)
+                if result["status"] in ("updated", "up to date"):
+                    self.state[result["file"]] = {"preset": self.preset_digest, "stamp": get_file_stamp(result["file"])}
+        self.save_state()
+        return results
+
+def cli_batch(args):
+    """Coordinator: run GENERATE NODES with a settings preset on every matching .blend file."""
+    paths = expand_blend_paths(args.inputs, args.recursive)
+    if not paths:
+        print("No .blend files found")
+        return 1
+    workers = args.workers or max(1, (os.cpu_count() or 1) // 2)
+    state_path = args.state or os.path.join(os.path.commonpath([os.path.dirname(path) for path in paths]),
+                                            ".compositing_batch.json")
+    print(f"Applying {args.preset} to {len(paths)} files on {workers} workers", flush=True)
+    start = time.perf_counter()
+    batch = BatchSetup(paths, args.preset, workers, state_path, args.force)
+    results = batch.run()
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(f"Done in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())), flush=True)
+    for result in results:
+        for warning in result["warnings"]:
+            print(f"    {os.path.basename(result['file'])}: {warning}")
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if counts.get("failed") else 0
+
+def cli_setup_worker(args):
+    """Worker: apply the preset, run GENERATE NODES unless the plan is already applied, save."""
+    scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+    apply_settings_preset(scene.compositing_settings, load_settings_preset(args.preset))
+
+    plan = get_current_plan(scene)
+    status = "up to date"
+    if args.force or plan is None or scene.get(SETUP_FINGERPRINT_PROP) != plan.fingerprint:
+        with bpy.context.temp_override(scene=scene):
+            bpy.ops.nodes.auto_compositing_setup()
+        plan = get_current_plan(scene)
+        bpy.ops.wm.save_mainfile()
+        status = "updated"
+
+    result = {
+        "file": bpy.data.filepath,
+        "scene": scene.name,
+        "status": status,
+        "nodes": len(scene.node_tree.nodes),
+        "warnings": [warning for layer_plan in plan.layers for warning in layer_plan.warnings] if plan else [],
+    }
+    print(f"{BATCH_RESULT_TAG}{json.dumps(result)}", flush=True)
+    return 0
+
+def cli_export_preset(args):
+    scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(settings_to_preset(scene.compositing_settings), f, indent=2)
+    print(f"Preset written to {args.output}")
+    return 0
+
+# -------------------------------------------------------
+# GENERATION BENCHMARK - Node generation cost on synthetic scenes, tracked against a baseline
+# -------------------------------------------------------
+
+# View layer flags enabled on benchmark layers, set on the view layer or its Cycles settings
+BENCHMARK_PASS_FLAGS = (
+    "use_pass_combined", "use_pass_z", "use_pass_mist", "use_pass_normal", "use_pass_position",
+    "use_pass_vector", "use_pass_uv", "use_pass_diffuse_direct", "use_pass_diffuse_indirect",
+    "use_pass_diffuse_color", "use_pass_glossy_direct", "use_pass_glossy_indirect", "use_pass_glossy_color",
+    "use_pass_transmission_direct", "use_pass_transmission_indirect", "use_pass_transmission_color",
+    "use_pass_volume_direct", "use_pass_volume_indirect", "use_pass_emit", "use_pass_environment",
+    "use_pass_ambient_occlusion", "use_pass_shadow_catcher", "denoising_store_passes",
+)
+
+# Timings compared against the baseline with a tolerance, counts must match exactly
+BENCHMARK_TIMINGS = ("generate_s", "regenerate_s", "panel_cold_s", "panel_warm_s", "socket_lookup_s")
+BENCHMARK_COUNTS = ("nodes", "links")
+
+def build_benchmark_scene(view_layer_count, crypto_depth):
+    """A new Cycles scene with every pass the add-on handles enabled on each view layer."""
+    scene = bpy.data.scenes.new(f"Benchmark_{view_layer_count}_{crypto_depth}")
+    scene.render.engine = 'CYCLES'
+    while len(scene.view_layers) < view_layer_count:
+        scene.view_layers.new(f"Layer{len(scene.view_layers):03d}")
+    for view_layer in scene.view_layers:
+        for flag in BENCHMARK_PASS_FLAGS:
+            if hasattr(view_layer, flag):
+                setattr(view_layer, flag, True)
+            elif hasattr(view_layer.cycles, flag):
+                setattr(view_layer.cycles, flag, True)
+        for _crypto_type, prop in CRYPTOMATTE_TYPES:
+            setattr(view_layer, prop, crypto_depth > 0)
+        if crypto_depth > 0:
+            view_layer.pass_cryptomatte_depth = max(2, crypto_depth)
+    scene.compositing_settings.base_path = os.path.join(tempfile.gettempdir(), "compositing_benchmark")
+    return scene
+
+def benchmark_generation(view_layer_count, crypto_depth, repeats=3):
+    """Time GENERATE NODES, a no-op regenerate, the panel pass lookup and get_output_socket on one scene."""
+    scene = build_benchmark_scene(view_layer_count, crypto_depth)
+    settings = scene.compositing_settings
+    timings = {name: [] for name in BENCHMARK_TIMINGS}
+    try:
+        for _ in range(repeats):
+            settings.reconcile_existing = False
+            clear_plan_cache()
+            start = time.perf_counter()
+            with bpy.context.temp_override(scene=scene):
+                bpy.ops.nodes.auto_compositing_setup()
+            timings["generate_s"].append(time.perf_counter() - start)
+
+            settings.reconcile_existing = True
+            start = time.perf_counter()
+            with bpy.context.temp_override(scene=scene):
+                bpy.ops.nodes.auto_compositing_setup()
+            timings["regenerate_s"].append(time.perf_counter() - start)
+
+            # What the sidebar does on the first draw after a change, then on every redraw
+            invalidate_pass_cache()
+            for key in ("panel_cold_s", "panel_warm_s"):
+                start = time.perf_counter()
+                for view_layer in scene.view_layers:
+                    get_enabled_passes(scene, view_layer)
+                timings[key].append(time.perf_counter() - start)
+
+            render_layers = [node for node in scene.node_tree.nodes if node.type == 'R_LAYERS']
+            start = time.perf_counter()
+            for node in render_layers:
+                for pass_name in DEFAULT_PASSES + EXR_PASSES + ["Shadow Catcher"]:
+                    get_output_socket(node, pass_name)
+            timings["socket_lookup_s"].append(time.perf_counter() - start)
+
+        # Peak memory in a separate run, tracemalloc would distort the timings
+        settings.reconcile_existing = False
+        clear_plan_cache()
+        tracemalloc.start()
+        try:
+            with bpy.context.temp_override(scene=scene):
+                bpy.ops.nodes.auto_compositing_setup()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "view_layers": view_layer_count,
+            "cryptomatte_depth": crypto_depth,
+            "nodes": len(scene.node_tree.nodes),
+            "links": len(scene.node_tree.links),
+            "python_peak_kb": round(peak / 1024, 1),
+        }
+        # Best of the repeats, the least disturbed by other work on the machine
+        result.update({name: round(min(values), 6) for name, values in timings.items()})
+        return result
+    finally:
+        bpy.data.scenes.remove(scene)
+
+def compare_benchmark(results, baseline, tolerance):
+    """Differences against a baseline: slower timings (beyond tolerance) and changed node/link counts."""
+    previous = {(entry["view_layers"], entry["cryptomatte_depth"]): entry for entry in baseline.get("results", [])}
+    messages = []
+    for result in results:
+        key = (result["view_layers"], result["cryptomatte_depth"])
+        before = previous.get(key)
+        if before is None:
+            continue
+        case = f"{key[0]} layers, crypto depth {key[1]}"
+        for name in BENCHMARK_TIMINGS:
+            # Ignore sub-millisecond noise
+            if name in before and result[name] > before[name] * tolerance and result[name] - before[name] > 0.001:
+                messages.append(f"{case}: {name} {before[name]:.4f}s -> {result[name]:.4f}s")
+        for name in BENCHMARK_COUNTS:
+            if name in before and result[name] != before[name]:
+                messages.append(f"{case}: {name} {before[name]} -> {result[name]}")
+    return messages
+
+def make_benchmark_report(results):
+    """Results with the Blender and add-on versions they were measured with, the baseline file format."""
+    return {
+        "version": 1,
+        "blender": ".".join(str(part) for part in bpy.app.version),
+        "addon": ".".join(str(part) for part in bl_info["version"]),
+        "results": results,
+    }
+
+def cli_benchmark_generate(args):
+    layer_counts = [int(value) for value in args.layers.split(",")]
+    crypto_depths = [int(value) for value in args.crypto.split(",")]
+    results = []
+    for view_layer_count in layer_counts:
+        for crypto_depth in crypto_depths:
+            result = benchmark_generation(view_layer_count, crypto_depth, args.repeats)
+            results.append(result)
+            print(f"{view_layer_count:>4} layers  crypto {crypto_depth:>2}  {result['nodes']:>6} nodes {result['links']:>6} links  "
+                  f"generate {result['generate_s'] * 1000:9.1f} ms  regenerate {result['regenerate_s'] * 1000:8.1f} ms  "
+                  f"panel {result['panel_cold_s'] * 1000:6.2f}/{result['panel_warm_s'] * 1000:6.2f} ms  "
+                  f"peak {result['python_peak_kb']:9.1f} KB", flush=True)
+
+    report = make_benchmark_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    messages = compare_benchmark(results, baseline, args.tolerance)
+    for message in messages:
+        print(f"CHANGED {message}")
+    print(f"{len(messages)} differences against {args.baseline} (add-on {baseline.get('addon')}, Blender {baseline.get('blender')})")
+    return 1 if messages else 0
+
+# -------------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------------
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="blender -b file.blend --python galih_compositing/cli.py --",
+        description="Headless tools for the Galih compositing add-on",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="Render the scene with a pool of background Blender workers")
+    render.add_argument("--scene", help="Scene name (default: active scene)")
+    render.add_argument("--frames", help="Frames like '1-100,120,130-140x2' (default: scene range)")
+    render.add_argument("--layers", help="Comma separated view layers (default: all enabled)")
+    render.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count / 8)")
+    render.add_argument("--threads", type=int, help="Render threads per worker (default: CPU count / workers)")
+    render.add_argument("--chunk", type=int, default=10, help="Frames per job")
+    render.add_argument("--split-layers", action="store_true", help="One job per view layer and frame chunk")
+    render.add_argument("--retries", type=int, default=2, help="Retries per failed job")
+    render.add_argument("--skip-complete", action="store_true", help="Skip frames whose outputs already exist")
+    render.add_argument("--verify", action="store_true", help="With --skip-complete, also check file signatures")
+    render.set_defaults(func=cli_render)
+
+    scan = commands.add_parser("scan", help="Report missing or truncated output frames and the frames to re-render")
+    scan.add_argument("--scene", help="Scene name (default: active scene)")
+    scan.add_argument("--frames", help="Frames like '1-100,120' (default: scene range)")
+    scan.add_argument("--verify", action="store_true", help="Also check the PNG/EXR signature of every file")
+    scan.add_argument("--workers", type=int, default=8, help="Threads used to index the folders")
+    scan.add_argument("--json", help="Write the full report to this JSON file")
+    scan.set_defaults(func=cli_scan)
+
+    estimate = commands.add_parser("estimate", help="Estimate compositor memory and output disk space before rendering")
+    estimate.add_argument("--scene", help="Scene name (default: active scene)")
+    estimate.add_argument("--calibrate", action="store_true", help="First measure compression ratios from rendered frames")
+    estimate.add_argument("--memory-budget", type=float, help="Memory budget in GB (default: scene setting)")
+    estimate.add_argument("--disk-budget", type=float, help="Disk budget in GB (default: scene setting)")
+    estimate.add_argument("--json", help="Write the full estimate to this JSON file")
+    estimate.set_defaults(func=cli_estimate)
+
+    bench = commands.add_parser("benchmark-encoding", help="Time PNG/EXR encodings and write an encoding profile")
+    bench.add_argument("--source", help="Folder with an already rendered frame (default: synthetic buffers)")
+    bench.add_argument("--output", default="//encoding_profile.json", help="Profile path")
+    bench.add_argument("--width", type=int, default=960)
+    bench.add_argument("--height", type=int, default=540)
+    bench.add_argument("--repeats", type=int, default=3)
+    bench.add_argument("--storage-mb-per-s", type=float, default=200.0, help="Write throughput of the output storage")
+    bench.add_argument("--decode-weight", type=float, default=0.0, help="Weight of decode time in the cost")
+    bench.set_defaults(func=cli_benchmark_encoding)
+
+    generate_bench = commands.add_parser("benchmark-generate",
+                                         help="Time GENERATE NODES on synthetic scenes and compare with a baseline")
+    generate_bench.add_argument("--layers", default="1,10,50,200", help="View layer counts")
+    generate_bench.add_argument("--crypto", default="0,6,16", help="Cryptomatte depths (0 = off)")
+    generate_bench.add_argument("--repeats", type=int, default=3, help="Runs per case, the best is kept")
+    generate_bench.add_argument("--output", help="Write the results to this JSON file")
+    generate_bench.add_argument("--baseline", help="Baseline JSON, created if missing, otherwise compared")
+    generate_bench.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with these results")
+    generate_bench.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown factor per timing")
+    generate_bench.set_defaults(func=cli_benchmark_generate)
+
+    batch = commands.add_parser("batch", help="Apply GENERATE NODES with a settings preset to many .blend files")
+    batch.add_argument("inputs", nargs="+", help="Folders or glob patterns of .blend files")
+    batch.add_argument("--preset", required=True, help="Settings preset JSON (see export-preset)")
+    batch.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count / 2)")
+    batch.add_argument("--recursive", action="store_true", help="Search folders and ** patterns recursively")
+    batch.add_argument("--force", action="store_true", help="Process files even if unchanged since the last run")
+    batch.add_argument("--state", help="State file used to skip unchanged files (default: in the common folder)")
+    batch.add_argument("--summary", help="Write the per-file results to this JSON file")
+    batch.set_defaults(func=cli_batch)
+
+    export = commands.add_parser("export-preset", help="Write the scene's compositing settings as a preset")
+    export.add_argument("output", help="Preset JSON path")
+    export.add_argument("--scene", help="Scene name (default: active scene)")
+    export.set_defaults(func=cli_export_preset)
+
+    crypto = commands.add_parser("crypto-index", help="Index the cryptomatte manifests of rendered outputs")
+    crypto.add_argument("--scene", help="Scene name (default: active scene)")
+    crypto.add_argument("--frames", help="Frames like '1-100,120' (default: scene range)")
+    crypto.add_argument("--format", choices=("json", "sqlite"), default="json", help="Index file format")
+    crypto.add_argument("--rebuild", action="store_true", help="Re-read every frame instead of only new ones")
+    crypto.set_defaults(func=cli_crypto_index)
+
+    worker = commands.add_parser("render-worker", help=argparse.SUPPRESS)
+    worker.add_argument("--scene", required=True)
+    worker.add_argument("--frames", required=True)
+    worker.add_argument("--layers")
+    worker.set_defaults(func=cli_render_worker)
+
+    setup_worker = commands.add_parser("setup-worker", help=argparse.SUPPRESS)
+    setup_worker.add_argument("--preset", required=True)
+    setup_worker.add_argument("--scene")
+    setup_worker.add_argument("--force", action="store_true")
+    setup_worker.set_defaults(func=cli_setup_worker)
+
+    return parser
+
+def main(argv):
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
+
+def run_cli(argv):
+    """Headless entry point for cli.py, argv is the whole Blender command line."""
+    # With the add-on installed and enabled, its operators and render handlers already serve this run:
+    # registering again would fire every render handler twice per frame
+    if not hasattr(bpy.types.Scene, "compositing_settings"):
+        register()
+    # Everything after "--" on the Blender command line
+    if bpy.app.background and "--" in argv:
+        sys.exit(main(argv[argv.index("--") + 1:]))
+
+def register():
+    bpy.utils.register_class(CompositingSettings)
+    bpy.utils.register_class(AutoCompositingSetup)
+    bpy.utils.register_class(UncheckAllPasses)
+    bpy.utils.register_class(ToggleAllSetAlpha)
+    bpy.utils.register_class(ToggleAllDenoise)
+    bpy.utils.register_class(ToggleAllAlbedo)
+    bpy.utils.register_class(ToggleAllNormal)
+    bpy.utils.register_class(RestoreDefaultSettings)
+    bpy.utils.register_class(PrefetchPasses)
+    bpy.utils.register_class(CompareDenoiseLayouts)
+    bpy.utils.register_class(AnalyzeDenoiseNoise)
+    bpy.utils.register_class(CompareOutputLayouts)
+    bpy.utils.register_class(BenchmarkEncoding)
+    bpy.utils.register_class(CheckOutputCompleteness)
+    bpy.utils.register_class(EstimateFootprint)
+    bpy.utils.register_class(CalibrateFootprint)
+    bpy.utils.register_class(CheckForUpdate)
+    bpy.utils.register_class(COMPOSITING_PT_AutoSetupPanel)
+    bpy.types.Scene.compositing_settings = bpy.props.PointerProperty(type=CompositingSettings)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_pass_cache_on_depsgraph)
+    for handler_list, handler in (TELEMETRY_HANDLERS + DEFERRED_COMPRESSION_HANDLERS + FRAME_DEDUPE_HANDLERS
+                                  + OUTPUT_STAGING_HANDLERS + CRYPTOMATTE_INDEX_HANDLERS):
+        getattr(bpy.app.handlers, handler_list).append(handler)
+    # Deferred to a timer so register() and startup never wait on the cache or the network
+    if not bpy.app.background:
+        bpy.app.timers.register(start_update_check, first_interval=2.0)
+
+def unregister():
+    bpy.utils.unregister_class(CompositingSettings)
+    bpy.utils.unregister_class(AutoCompositingSetup)
+    bpy.utils.unregister_class(UncheckAllPasses)
+    bpy.utils.unregister_class(ToggleAllSetAlpha)
+    bpy.utils.unregister_class(ToggleAllDenoise)
+    bpy.utils.unregister_class(ToggleAllAlbedo)
+    bpy.utils.unregister_class(ToggleAllNormal)
+    bpy.utils.unregister_class(RestoreDefaultSettings)
+    bpy.utils.unregister_class(PrefetchPasses)
+    bpy.utils.unregister_class(CompareDenoiseLayouts)
+    bpy.utils.unregister_class(AnalyzeDenoiseNoise)
+    bpy.utils.unregister_class(CompareOutputLayouts)
+    bpy.utils.unregister_class(BenchmarkEncoding)
+    bpy.utils.unregister_class(CheckOutputCompleteness)
+    bpy.utils.unregister_class(EstimateFootprint)
+    bpy.utils.unregister_class(CalibrateFootprint)
+    bpy.utils.unregister_class(CheckForUpdate)
+    bpy.utils.unregister_class(COMPOSITING_PT_AutoSetupPanel)
+    del bpy.types.Scene.compositing_settings
+    if invalidate_pass_cache_on_depsgraph in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(invalidate_pass_cache_on_depsgraph)
+    for handler_list, handler in (TELEMETRY_HANDLERS + DEFERRED_COMPRESSION_HANDLERS + FRAME_DEDUPE_HANDLERS
+                                  + OUTPUT_STAGING_HANDLERS + CRYPTOMATTE_INDEX_HANDLERS):
+        handlers = getattr(bpy.app.handlers, handler_list)
+        if handler in handlers:
+            handlers.remove(handler)
+    for timer in (start_update_check, poll_update_check):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    _telemetry.stop()
+    _deferred_compression.stop()
+    _frame_deduplicator.stop()
+    _output_stager.stop()
+    invalidate_pass_cache()
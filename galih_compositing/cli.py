@@ -0,0 +1,17 @@
+"""
+Headless entry point: blender -b file.blend --python galih_compositing/cli.py -- <command> [options]
+
+Runs the installed add-on when it is enabled, otherwise the package this file belongs to.
+"""
+
+import importlib
+import os
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The folder holding the package (Blender's add-ons folder once installed), so it imports by its own name
+if os.path.dirname(PACKAGE_DIR) not in sys.path:
+    sys.path.append(os.path.dirname(PACKAGE_DIR))
+
+importlib.import_module(os.path.basename(PACKAGE_DIR)).run_cli(sys.argv)
@@ -0,0 +1,918 @@
+"""
+Pass tables, Render Layers socket discovery and the graph plan compiler of the Galih compositing add-on.
+
+Pure data, no bpy import: the add-on feeds it frozen settings and view layer descriptions,
+and the planner can be imported and tested without Blender.
+"""
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, replace
+
+# Default passes (reordered to match View Layer Passes order)
+DEFAULT_PASSES = [
+    # Diffuse Passes
+    "DiffDir",
+    "DiffInd",
+    "DiffCol",
+    # Glossy Passes
+    "GlossDir",
+    "GlossInd",
+    "GlossCol",
+    # Transmission Passes
+    "TransDir",
+    "TransInd",
+    "TransCol",
+    # Volume Passes
+    "VolumeDir",
+    "VolumeInd",
+    # Emission Pass
+    "Emit",
+    # Environment Pass
+    "Env",
+    # Ambient Occlusion Pass
+    "AO",
+]
+
+# Passes denoised by default: DiffCol, GlossCol, Emit and Env are usually clean,
+# TransCol stays denoised as in the original defaults
+DEFAULT_DENOISE_PASSES = frozenset({
+    "DiffDir", "DiffInd",
+    "GlossDir", "GlossInd",
+    "TransDir", "TransInd", "TransCol",
+    "VolumeDir", "VolumeInd",
+    "AO",
+})
+
+def get_default_denoise_flags():
+    return [pass_name in DEFAULT_DENOISE_PASSES for pass_name in DEFAULT_PASSES]
+
+# Generate cryptomatte passes dynamically up to 16 levels
+def generate_cryptomatte_passes(max_levels=16):
+    """Generate cryptomatte pass names dynamically."""
+    crypto_passes = []
+    # Object cryptomatte passes
+    for i in range(max_levels):
+        crypto_passes.append(f"CryptoObject{i:02d}")
+    # Material cryptomatte passes  
+    for i in range(max_levels):
+        crypto_passes.append(f"CryptoMaterial{i:02d}")
+    # Asset cryptomatte passes
+    for i in range(max_levels):
+        crypto_passes.append(f"CryptoAsset{i:02d}")
+    return crypto_passes
+
+# Generate cryptomatte passes (up to 16 levels)
+CRYPTOMATTE_PASSES = generate_cryptomatte_passes(16)
+
+# View layer flag for each cryptomatte type
+CRYPTOMATTE_TYPES = (
+    ("Object", "use_pass_cryptomatte_object"),
+    ("Material", "use_pass_cryptomatte_material"),
+    ("Asset", "use_pass_cryptomatte_asset"),
+)
+
+def get_cryptomatte_passes(view_layer):
+    """Cryptomatte pass names a view layer actually renders (each pass holds two levels)."""
+    pass_count = (min(view_layer.pass_cryptomatte_depth, 16) + 1) // 2
+    return tuple(
+        f"Crypto{crypto_type}{i:02d}"
+        for crypto_type, prop in CRYPTOMATTE_TYPES
+        if getattr(view_layer, prop, False)
+        for i in range(pass_count)
+    )
+
+# Passes that connect directly to File Output (in exact order)
+DIRECT_PASSES = ["Shadow Catcher"] + CRYPTOMATTE_PASSES
+
+# Non-cryptomatte EXR passes (precision and codec per pass in PASS_POLICY)
+EXR_PASSES = [
+    "Depth",
+    "Position", 
+    "Normal",
+    "Vector",
+    "UV",
+    "Mist",
+]
+
+# Output target (see OUTPUT_TARGETS) for each EXR pass:
+# - EXR: half float DWAA, fine for directions and small ranges
+# - EXR_Lossless: half float ZIP, single channel passes that DWAA would only blur and bloat
+# - EXR_Full: full float ZIP, world-space values that need 32-bit precision in large scenes
+PASS_POLICY = {
+    "Depth": "EXR_Full",
+    "Position": "EXR_Full",
+    "Normal": "EXR",
+    "Vector": "EXR",
+    "UV": "EXR",
+    "Mist": "EXR_Lossless",
+}
+
+# Cryptomatte passes that should use PIZ codec
+EXR_PIZ_PASSES = CRYPTOMATTE_PASSES
+
+PASS_MAP = {
+    "DiffDir": "use_pass_diffuse_direct",
+    "DiffInd": "use_pass_diffuse_indirect",
+    "DiffCol": "use_pass_diffuse_color",
+    "GlossDir": "use_pass_glossy_direct",
+    "GlossInd": "use_pass_glossy_indirect",
+    "GlossCol": "use_pass_glossy_color",
+    "TransDir": "use_pass_transmission_direct",
+    "TransInd": "use_pass_transmission_indirect",
+    "TransCol": "use_pass_transmission_color",
+    "VolumeDir": "use_pass_volume_direct",
+    "VolumeInd": "use_pass_volume_indirect",
+    "Emit": "use_pass_emission",
+    "Env": "use_pass_environment",
+    "AO": "use_pass_ao",
+}
+
+# Map your short pass names to actual Render Layer socket names in Blender
+SOCKET_NAME_MAP = {
+    # Diffuse
+    "DiffDir": "Diffuse Direct",
+    "DiffInd": "Diffuse Indirect",
+    "DiffCol": "Diffuse Color",
+    # Glossy
+    "GlossDir": "Glossy Direct",
+    "GlossInd": "Glossy Indirect",
+    "GlossCol": "Glossy Color",
+    # Transmission
+    "TransDir": "Transmission Direct",
+    "TransInd": "Transmission Indirect",
+    "TransCol": "Transmission Color",
+    # Volume
+    "VolumeDir": "Volume Direct",
+    "VolumeInd": "Volume Indirect",
+    # Others
+    "Emit": "Emit",               # keep simple
+    "Env": "Environment",
+    "AO": "AO",
+    # EXR / common names (these are usually identical, but map explicitly)
+    "Depth": "Depth",
+    "Position": "Position",
+    "Normal": "Normal",
+    "Vector": "Vector",
+    "UV": "UV",
+    "Mist": "Mist",
+    # Shadow variations (try both)
+    "Shadow Catcher": "Shadow Catcher",
+    "Shadow": "Shadow",
+}
+
+# Add cryptomatte passes to SOCKET_NAME_MAP dynamically
+for pass_name in CRYPTOMATTE_PASSES:
+    SOCKET_NAME_MAP[pass_name] = pass_name
+
+# -------------------------------------------------------
+# RENDER LAYERS DISCOVERY - One walk over the sockets, classified through a registry
+# -------------------------------------------------------
+
+# Shader AOVs go to the EXR output matching their channel count, the AOV name is the EXR layer name
+AOV_POLICY = {
+    'COLOR': "EXR",
+    'VALUE': "EXR_Lossless",
+}
+
+# Names of the socket name candidates in SOCKET_REGISTRY, in priority order
+SOCKET_LOOKUP_LEVELS = ("mapped", "raw", "underscore")
+
+def build_socket_registry():
+    """
+    Socket name -> (kind, pass name, priority) for every known Render Layers output.
+    Same candidates as the old lookup chain: mapped name, raw pass name, underscores as spaces.
+    """
+    registry = {}
+    groups = (
+        ('BEAUTY', ["Image"]),
+        ('UTILITY', ["Alpha", "Denoising Albedo", "Denoising Normal"]),
+        ('LIGHTING', DEFAULT_PASSES),
+        ('SHADOW', ["Shadow Catcher", "Shadow"]),
+        ('DATA', EXR_PASSES),
+        ('CRYPTOMATTE', CRYPTOMATTE_PASSES),
+    )
+    for kind, pass_names in groups:
+        for pass_name in pass_names:
+            candidates = (SOCKET_NAME_MAP.get(pass_name, pass_name), pass_name, pass_name.replace("_", " "))
+            for priority, socket_name in enumerate(candidates):
+                registry.setdefault(socket_name, (kind, pass_name, priority))
+    return registry
+
+SOCKET_REGISTRY = build_socket_registry()
+
+@dataclass(frozen=True, slots=True)
+class SocketRoutes:
+    """Discovered Render Layers outputs: pass name -> socket name, plus AOV and light group sockets."""
+    passes: dict
+    aovs: tuple = ()         # (aov name, aov type, socket name)
+    lightgroups: tuple = ()  # (light group name, socket name)
+
+def discover_sockets(socket_names, aovs=(), lightgroups=()):
+    """Classify each enabled socket name once, AOVs and light groups come from the view layer."""
+    aov_types = dict(aovs)
+    lightgroup_names = {f"Combined_{lightgroup}": lightgroup for lightgroup in lightgroups}
+    passes = {}
+    priorities = {}
+    found_aovs = []
+    found_lightgroups = []
+    for socket_name in socket_names:
+        entry = SOCKET_REGISTRY.get(socket_name)
+        if entry is not None:
+            _, pass_name, priority = entry
+            if priority < priorities.get(pass_name, len(SOCKET_LOOKUP_LEVELS)):
+                passes[pass_name] = socket_name
+                priorities[pass_name] = priority
+        elif socket_name in aov_types:
+            found_aovs.append((socket_name, aov_types[socket_name], socket_name))
+        elif socket_name in lightgroup_names:
+            found_lightgroups.append((lightgroup_names[socket_name], socket_name))
+        else:
+            profile_count("socket_lookup.miss")
+    # Which candidate each routed pass resolved through, as the old lookup chain counted it
+    for priority in priorities.values():
+        profile_count(f"socket_lookup.{SOCKET_LOOKUP_LEVELS[priority]}")
+    profile_count("sockets.scanned", len(socket_names))
+    profile_count("sockets.routed", len(passes))
+    if found_aovs:
+        profile_count("sockets.aov", len(found_aovs))
+    if found_lightgroups:
+        profile_count("sockets.lightgroup", len(found_lightgroups))
+    return SocketRoutes(passes, tuple(found_aovs), tuple(found_lightgroups))
+
+# -------------------------------------------------------
+# BUILD PROFILER - Stage timings and counters, recorded while the add-on has a profiler installed
+# -------------------------------------------------------
+
+# The profiler of the build in progress, None when profiling is off
+_build_profiler = None
+
+class BuildProfiler:
+    """Accumulate stage timings (total and per view layer) and event counters."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.layers = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name, view_layer=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if view_layer is not None:
+                layer = self.layers.setdefault(view_layer, {})
+                layer[name] = layer.get(name, 0.0) + elapsed
+
+    def count(self, key, amount=1):
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "total_s": round(time.perf_counter() - self.started, 6),
+            "stages_s": {name: round(value, 6) for name, value in self.stages.items()},
+            "view_layers_s": {vl: {name: round(value, 6) for name, value in stages.items()}
+                              for vl, stages in self.layers.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+def profile_stage(name, view_layer=None):
+    """Context manager timing a stage of the current build, a no-op when not profiling."""
+    if _build_profiler is None:
+        return nullcontext()
+    return _build_profiler.stage(name, view_layer)
+
+def profile_count(key, amount=1):
+    if _build_profiler is not None:
+        _build_profiler.count(key, amount)
+
+def set_build_profiler(profiler):
+    """Install the profiler of the build in progress, None stops recording."""
+    global _build_profiler
+    _build_profiler = profiler
+
+# -------------------------------------------------------
+# GRAPH PLAN COMPILER - Pure data, cached by settings fingerprint
+# -------------------------------------------------------
+
+# Bump when the compiler output changes so stale cached plans are never reused
+PLAN_VERSION = 4
+
+# Set-based routing tables (O(1) membership instead of scanning the pass lists)
+EXR_PASS_SET = frozenset(EXR_PASSES)
+EXR_PIZ_PASS_SET = frozenset(EXR_PIZ_PASSES)
+PNG_PASSES = tuple(p for p in DEFAULT_PASSES if p not in EXR_PASS_SET and p not in EXR_PIZ_PASS_SET)
+
+@dataclass(frozen=True, slots=True)
+class SettingsSnapshot:
+    """The CompositingSettings fields the planner depends on."""
+    set_alpha: tuple
+    denoise: tuple
+    albedo: tuple
+    normal: tuple
+    denoise_mode: str
+    shared_prefilter: bool
+    base_path: str
+    prefix: str
+    suffix: str
+    encoding: tuple = ()
+    group_filters: bool = False
+    consolidated: bool = False
+    merge_cryptomatte: bool = False
+    deferred_compression: bool = False
+    staging_root: str = ""  # local scratch root the outputs are written under, "" writes to base_path
+
+@dataclass(frozen=True, slots=True)
+class LayerInputs:
+    """A view layer as seen by the planner: its name, enabled Render Layers sockets, cryptomatte passes, AOVs and light groups."""
+    name: str
+    outputs: tuple
+    cryptomatte: tuple = ()
+    aovs: tuple = ()         # (name, 'COLOR' or 'VALUE')
+    lightgroups: tuple = ()
+
+@dataclass(frozen=True, slots=True)
+class FormatPlan:
+    file_format: str
+    color_depth: str
+    color_mode: str = None
+    compression: int = None
+    exr_codec: str = None
+    color_management: str = 'FOLLOW_SCENE'
+
+@dataclass(frozen=True, slots=True)
+class FilterGroupPlan:
+    """A shared Set Alpha -> Denoise node group: one input/output pair per pass, a step chain per pass."""
+    passes: tuple
+    set_alpha: bool
+    prefilter: str = None  # None when the passes are not denoised
+    albedo: bool = False
+    normal: bool = False
+
+    @property
+    def name(self):
+        steps = ["SetAlpha"] if self.set_alpha else []
+        if self.prefilter is not None:
+            steps.append(f"Denoise {self.prefilter.title()}")
+        steps += [label for label, used in (("Albedo", self.albedo), ("Normal", self.normal)) if used]
+        # ID names are limited to 63 characters, the pass list only goes into a short digest
+        digest = hashlib.sha1(" ".join(self.passes).encode("utf-8")).hexdigest()[:6]
+        return f"PassFilter {' '.join(steps)} {digest}"
+
+@dataclass(frozen=True, slots=True)
+class NodePlan:
+    name: str
+    bl_idname: str
+    props: tuple = ()
+    initial: tuple = ()
+    format: FormatPlan = None
+    slots: tuple = ()
+    group: FilterGroupPlan = None
+
+@dataclass(frozen=True, slots=True)
+class LinkPlan:
+    from_node: str
+    from_socket: str
+    to_node: str
+    to_socket: str
+
+@dataclass(frozen=True, slots=True)
+class LayerPlan:
+    view_layer: str
+    nodes: tuple
+    links: tuple
+    warnings: tuple
+    skipped_outputs: int = 0  # File Output nodes not created because nothing is linked to them
+    filter_counts: tuple = ((0, 0), (0, 0))  # (nodes, links) of the Set Alpha/Denoise chains: loose, grouped
+    filter_groups: tuple = ()  # FilterGroupPlan of each chain a node group replaces when grouping
+
+@dataclass(frozen=True, slots=True)
+class GraphPlan:
+    fingerprint: str
+    layers: tuple
+
+PNG_FORMAT = FormatPlan('PNG', '16', color_mode='RGBA', compression=15)
+EXR_DWAA_FORMAT = FormatPlan('OPEN_EXR_MULTILAYER', '16', exr_codec='DWAA')  # DWAA codec for non-cryptomatte EXR passes
+EXR_LOSSLESS_FORMAT = FormatPlan('OPEN_EXR_MULTILAYER', '16', exr_codec='ZIP')
+EXR_FULL_FORMAT = FormatPlan('OPEN_EXR_MULTILAYER', '32', exr_codec='ZIP')
+EXR_PIZ_FORMAT = FormatPlan('OPEN_EXR_MULTILAYER', '32', exr_codec='PIZ')  # Full float PIZ for cryptomatte
+
+@dataclass(frozen=True, slots=True)
+class OutputTarget:
+    """A File Output node per view layer: name prefix, label, folder suffix, format and node color."""
+    node_prefix: str
+    label: str
+    folder_suffix: str
+    format: FormatPlan
+    color: tuple
+
+# Output targets in node stacking order, passes routed to the same target share one File Output node
+OUTPUT_TARGETS = {
+    "PNG": OutputTarget("PNG_Output_", "PNG", None, PNG_FORMAT, (0.2, 0.6, 0.2)),  # Green color for PNG nodes
+    # Consolidated layout: beauty and lighting passes (optionally cryptomatte) in one multilayer EXR
+    "Combined": OutputTarget("Combined_", "Combined EXR", "_Combined", EXR_LOSSLESS_FORMAT, (0.2, 0.5, 0.6)),
+    "EXR": OutputTarget("EXR_", "EXR", "_EXR", EXR_DWAA_FORMAT, (0.607, 0.176, 0.153)),  # Red color for EXR nodes
+    "EXR_Lossless": OutputTarget("EXRLossless_", "EXR Lossless", "_EXR_Lossless", EXR_LOSSLESS_FORMAT, (0.607, 0.4, 0.153)),
+    "EXR_Full": OutputTarget("EXRFull_", "EXR Full", "_EXR_Full", EXR_FULL_FORMAT, (0.45, 0.12, 0.35)),
+    "Cryptomatte": OutputTarget("Cryptomatte_", "Cryptomatte", "_Cryptomatte", EXR_PIZ_FORMAT, (0.176, 0.176, 0.607)),  # Blue
+}
+
+def get_target_base_path(target, base_path, view_layer_name):
+    """File Output base path of a target: '<base>/<vl>' for PNG, '<base>/<vl>/<vl><suffix>/<vl><suffix>' for EXR."""
+    if target.folder_suffix is None:
+        return os.path.join(base_path, view_layer_name)
+    folder_name = f"{view_layer_name}{target.folder_suffix}"
+    return os.path.join(base_path, view_layer_name, folder_name, folder_name)
+
+def get_encoded_format(format_plan, role, encoding):
+    """Apply the encoding profile overrides of an output role to a FormatPlan."""
+    for profile_role, overrides in encoding:
+        if profile_role == role:
+            return replace(format_plan, **dict(overrides))
+    return format_plan
+
+def get_output_format(format_plan, role, snapshot):
+    """Final FormatPlan of an output: encoding profile overrides, then uncompressed PNG when compression is deferred."""
+    format_plan = get_encoded_format(format_plan, role, snapshot.encoding)
+    if snapshot.deferred_compression and format_plan.file_format == 'PNG':
+        format_plan = replace(format_plan, compression=0)
+    return format_plan
+
+def get_modified_name(snapshot, base_name, view_layer_name):
+    """Build '<prefix>_<view layer>_<pass>_<suffix>' for folder and slot names."""
+    modified = ""
+    if snapshot.prefix:
+        modified += snapshot.prefix + "_"
+    # Add view layer name as prefix
+    modified += view_layer_name + "_"
+    modified += base_name
+    if snapshot.suffix:
+        modified += "_" + snapshot.suffix
+    return modified
+
+def resolve_base_path(base_path, view_layer_name):
+    """Clean up the base path so view layer folders never stack."""
+    # Normalize the path to ensure it's a clean base path
+    base_path = base_path.rstrip(os.path.sep)
+
+    # Ensure base_path doesn't end with view layer name already
+    # If it does, remove it to avoid stacking
+    base_dir = os.path.basename(base_path)
+    if base_dir == view_layer_name:
+        base_path = os.path.dirname(base_path)
+
+    # Also check for CH_Beauty type patterns and remove them
+    for pass_name in DEFAULT_PASSES + ["Beauty", "Shadow_Catcher"]:
+        pattern = f"{view_layer_name}_{pass_name}"
+        if base_dir == pattern:
+            base_path = os.path.dirname(base_path)
+            break
+    return base_path
+
+def get_staged_base(staging_root, base_path):
+    """Scratch folder mirroring base_path: '<staging root>/<hash of base_path>', below it the same '<vl>/...' layout."""
+    return os.path.join(staging_root, hashlib.sha1(base_path.encode("utf-8")).hexdigest()[:12])
+
+def compile_shared_prefilter(rl_name, name, albedo_socket, normal_socket, x, y):
+    """
+    Nodes that clean the guiding passes once per view layer:
+    - Albedo: Denoise (no prefilter, LDR)
+    - Normal: remapped to 0..1, denoised, remapped back to -1..1, divided by its length
+    Returns (nodes, links, albedo source, normal source).
+    """
+    nodes = []
+    links = []
+    albedo_source = normal_source = None
+
+    if albedo_socket:
+        albedo_name = f"Prefilter_{name}_Albedo"
+        nodes.append(NodePlan(
+            albedo_name,
+            'CompositorNodeDenoise',
+            props=(("prefilter", 'NONE'), ("use_hdr", False)),
+            initial=(("label", "Prefilter Albedo"), ("location", (x, y))),
+        ))
+        links.append(LinkPlan(rl_name, albedo_socket, albedo_name, 'Image'))
+        albedo_source = (albedo_name, 'Image')
+
+    if normal_socket:
+        source = (rl_name, normal_socket)
+        y -= 200
+        chain = [
+            ("EncodeAdd", 'ADD', 1.0),
+            ("EncodeMul", 'MULTIPLY', 0.5),
+            (None, None, None),  # the Denoise node itself
+            ("DecodeMul", 'MULTIPLY', 2.0),
+            ("DecodeSub", 'SUBTRACT', 1.0),
+        ]
+        for step, (suffix, blend_type, operand) in enumerate(chain):
+            if suffix is None:
+                node_name = f"Prefilter_{name}_Normal"
+                nodes.append(NodePlan(
+                    node_name,
+                    'CompositorNodeDenoise',
+                    props=(("prefilter", 'NONE'), ("use_hdr", False)),
+                    initial=(("label", "Prefilter Normal"), ("location", (x + step * 160, y))),
+                ))
+            else:
+                node_name = f"PrefilterRemap_{name}_Normal{suffix}"
+                nodes.append(NodePlan(
+                    node_name,
+                    'CompositorNodeMixRGB',
+                    props=(
+                        ("blend_type", blend_type),
+                        ("use_clamp", False),
+                        ("inputs[0].default_value", 1.0),
+                        ("inputs[2].default_value", (operand, operand, operand, 1.0)),
+                    ),
+                    initial=(("hide", True), ("location", (x + step * 160, y))),
+                ))
+            links.append(LinkPlan(*source, node_name, 'Image'))
+            source = (node_name, 'Image')
+
+        # Denoising shortens and tilts the vectors, bring them back to unit length: n / sqrt(x*x + y*y + z*z)
+        # (a zero vector, e.g. the background, stays zero: Mix Divide skips zero divisors)
+        decoded = source
+        x += len(chain) * 160
+        square_name = f"PrefilterRemap_{name}_NormalSquare"
+        split_name = f"PrefilterSplit_{name}_Normal"
+        sum_xy_name = f"PrefilterMath_{name}_NormalSumXY"
+        sum_name = f"PrefilterMath_{name}_NormalSum"
+        length_name = f"PrefilterMath_{name}_NormalLength"
+        unit_name = f"PrefilterRemap_{name}_NormalUnit"
+        mix_props = (("inputs[0].default_value", 1.0), ("use_clamp", False))
+        nodes += [
+            NodePlan(square_name, 'CompositorNodeMixRGB', props=(("blend_type", 'MULTIPLY'),) + mix_props,
+                     initial=(("hide", True), ("location", (x, y)))),
+            NodePlan(split_name, 'CompositorNodeSeparateXYZ', initial=(("hide", True), ("location", (x + 160, y)))),
+            NodePlan(sum_xy_name, 'CompositorNodeMath', props=(("operation", 'ADD'), ("use_clamp", False)),
+                     initial=(("hide", True), ("location", (x + 320, y)))),
+            NodePlan(sum_name, 'CompositorNodeMath', props=(("operation", 'ADD'), ("use_clamp", False)),
+                     initial=(("hide", True), ("location", (x + 480, y)))),
+            NodePlan(length_name, 'CompositorNodeMath', props=(("operation", 'SQRT'), ("use_clamp", False)),
+                     initial=(("hide", True), ("location", (x + 640, y)))),
+            NodePlan(unit_name, 'CompositorNodeMixRGB', props=(("blend_type", 'DIVIDE'),) + mix_props,
+                     initial=(("hide", True), ("location", (x + 800, y)))),
+        ]
+        # The second input of Mix and Math nodes repeats the name of the first, it is linked by identifier
+        links += [
+            LinkPlan(*decoded, square_name, 'Image'),
+            LinkPlan(*decoded, square_name, 'Image_001'),
+            LinkPlan(square_name, 'Image', split_name, 'Vector'),
+            LinkPlan(split_name, 'X', sum_xy_name, 'Value'),
+            LinkPlan(split_name, 'Y', sum_xy_name, 'Value_001'),
+            LinkPlan(sum_xy_name, 'Value', sum_name, 'Value'),
+            LinkPlan(split_name, 'Z', sum_name, 'Value_001'),
+            LinkPlan(sum_name, 'Value', length_name, 'Value'),
+            LinkPlan(*decoded, unit_name, 'Image'),
+            LinkPlan(length_name, 'Value', unit_name, 'Image_001'),
+        ]
+        normal_source = (unit_name, 'Image')
+
+    return nodes, links, albedo_source, normal_source
+
+def count_oidn_runs(plan):
+    """Estimate OIDN filter executions per frame (Denoise nodes plus ACCURATE guiding pass prefilters)."""
+    runs = 0
+    for layer_plan in plan.layers:
+        aux_inputs = {}
+        for link in layer_plan.links:
+            if link.to_socket in ('Albedo', 'Normal'):
+                aux_inputs[link.to_node] = aux_inputs.get(link.to_node, 0) + 1
+        for node_plan in layer_plan.nodes:
+            if node_plan.group is not None:
+                prefilter = node_plan.group.prefilter
+                passes = len(node_plan.group.passes)
+            elif node_plan.bl_idname == 'CompositorNodeDenoise':
+                prefilter = dict(node_plan.props).get("prefilter")
+                passes = 1
+            else:
+                continue
+            if prefilter is None:
+                continue
+            runs += passes
+            if prefilter == 'ACCURATE':
+                runs += passes * aux_inputs.get(node_plan.name, 0)
+    return runs
+
+def count_filter_layouts(plan, group_filters):
+    """
+    Nodes and links of a plan with loose and with grouped Set Alpha/Denoise chains, from the
+    chain counts of its layers (the layout the plan was not compiled with is never compiled).
+    """
+    nodes = sum(len(layer_plan.nodes) for layer_plan in plan.layers)
+    links = sum(len(layer_plan.links) for layer_plan in plan.layers)
+    current = 1 if group_filters else 0
+    totals = {}
+    for layout, index in (("loose", 0), ("grouped", 1)):
+        totals[layout] = (
+            nodes + sum(layer_plan.filter_counts[index][0] - layer_plan.filter_counts[current][0] for layer_plan in plan.layers),
+            links + sum(layer_plan.filter_counts[index][1] - layer_plan.filter_counts[current][1] for layer_plan in plan.layers),
+        )
+    # Node groups are shared between view layers with the same chains
+    totals["groups"] = len({group for layer_plan in plan.layers for group in layer_plan.filter_groups})
+    return totals
+
+def plan_fingerprint(snapshot, layers):
+    """Stable hash of everything the compiled plan depends on."""
+    key = repr((PLAN_VERSION, snapshot, tuple(layers)))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def compile_layer_plan(snapshot, layer, view_layer_idx):
+    """Turn one view layer into its LayerPlan."""
+    name = layer.name
+    routes = discover_sockets(layer.outputs, layer.aovs, layer.lightgroups)
+    sockets = routes.passes
+    set_alpha = frozenset(snapshot.set_alpha)
+    denoise = frozenset(snapshot.denoise)
+    albedo = frozenset(snapshot.albedo)
+    normal = frozenset(snapshot.normal)
+    base_path = resolve_base_path(snapshot.base_path, name)
+    if snapshot.staging_root:
+        # Written to the local scratch mirror, the output stager moves the files to base_path
+        base_path = get_staged_base(snapshot.staging_root, base_path)
+
+    nodes = []
+    links = []
+    warnings = []
+
+    rl_name = f"RenderLayers_{name}"
+    nodes.append(NodePlan(
+        rl_name,
+        'CompositorNodeRLayers',
+        props=(("layer", name),),
+        initial=(("label", rl_name), ("location", (-1600, -view_layer_idx * 1200))),
+    ))
+
+    # File Output slots per target, every target is built from the clean base path
+    target_slots = {target_name: [] for target_name in OUTPUT_TARGETS}
+    # Beauty and lighting passes go to PNG files, or to layers of the combined EXR
+    main_target = "Combined" if snapshot.consolidated else "PNG"
+    png_name = f"{OUTPUT_TARGETS[main_target].node_prefix}{name}"
+    png_slots = target_slots[main_target]
+    crypto_target = "Combined" if snapshot.consolidated and snapshot.merge_cryptomatte else "Cryptomatte"
+
+    def main_slot(modified_name):
+        """PNG slots use double naming (CH_Pass/CH_Pass), EXR layers just the name."""
+        return modified_name if snapshot.consolidated else f"{modified_name}/{modified_name}"
+
+    def output_nodes():
+        output_plans = []
+        for target_name, target in OUTPUT_TARGETS.items():
+            slots = target_slots[target_name]
+            # Outputs are only created when a pass is routed to them
+            if not slots:
+                continue
+            format_plan = target.format
+            # Cryptomatte IDs need full float, a merged combined EXR is written like the cryptomatte output
+            if target_name == crypto_target == "Combined" and any(slot in layer.cryptomatte for slot in slots):
+                format_plan = EXR_PIZ_FORMAT
+            output_plans.append(NodePlan(
+                f"{target.node_prefix}{name}",
+                'CompositorNodeOutputFile',
+                props=(("base_path", get_target_base_path(target, base_path, name)),),
+                initial=(
+                    ("label", f"{target.label} {name}"),
+                    ("location", (600, -view_layer_idx * 700 - len(output_plans) * 300)),
+                    ("width", 100000),
+                    ("use_custom_color", True),
+                    ("color", target.color),
+                ),
+                format=get_output_format(format_plan, target_name, snapshot),
+                slots=tuple(slots),
+            ))
+        return output_plans
+
+    def route_data_passes():
+        """Data, AOV and Cryptomatte passes, they do not depend on the Alpha pass."""
+        # Non-cryptomatte EXR passes to the target from PASS_POLICY, the pass name is the EXR layer name
+        for pass_name in EXR_PASSES:
+            pass_socket = sockets.get(pass_name)
+            if pass_socket:
+                target_name = PASS_POLICY.get(pass_name, "EXR")
+                target_slots[target_name].append(pass_name)
+                links.append(LinkPlan(rl_name, pass_socket, f"{OUTPUT_TARGETS[target_name].node_prefix}{name}", pass_name))
+            else:
+                warnings.append(f"Missing EXR pass: {pass_name} for {name}")
+
+        # Shader AOVs to the EXR output of their type, prefixed so they never collide with a pass layer
+        for aov_name, aov_type, aov_socket in routes.aovs:
+            target_name = AOV_POLICY.get(aov_type, "EXR")
+            slot_name = f"AOV_{aov_name}"
+            target_slots[target_name].append(slot_name)
+            links.append(LinkPlan(rl_name, aov_socket, f"{OUTPUT_TARGETS[target_name].node_prefix}{name}", slot_name))
+
+        # Cryptomatte passes to the PIZ output, only the types and levels enabled on the view layer
+        exr_piz_name = f"{OUTPUT_TARGETS[crypto_target].node_prefix}{name}"
+        for pass_name in layer.cryptomatte:
+            pass_socket = sockets.get(pass_name)
+            if pass_socket:
+                target_slots[crypto_target].append(pass_name)
+                links.append(LinkPlan(rl_name, pass_socket, exr_piz_name, pass_name))
+            else:
+                warnings.append(f"Missing cryptomatte pass: {pass_name} for {name}")
+
+    def finish():
+        output_plans = output_nodes()
+        # PNG, EXR and Cryptomatte outputs used to be created even without slots
+        dropped = {main_target, "EXR", crypto_target}
+        skipped = sum(1 for target_name in dropped if not target_slots[target_name])
+        return LayerPlan(name, tuple(nodes + output_plans), tuple(links), tuple(warnings), skipped,
+                         filter_counts, filter_groups)
+
+    filter_counts = ((0, 0), (0, 0))
+    filter_groups = ()
+
+    # Get required passes for this view layer
+    alpha_socket = sockets.get("Alpha")
+    if not alpha_socket:
+        # Without Alpha only the Set Alpha -> PNG branch is skipped
+        warnings.append(f"Missing Alpha pass in Render Layers for {name}")
+        route_data_passes()
+        return finish()
+
+    albedo_socket = sockets.get('Denoising Albedo')
+    normal_socket = sockets.get('Denoising Normal')
+
+    # Connect Beauty pass to PNG output with double naming: CH_Beauty/CH_Beauty
+    beauty_socket = sockets.get("Image")
+    if beauty_socket:
+        modified_beauty_name = get_modified_name(snapshot, "Beauty", name)
+        beauty_slot = main_slot(modified_beauty_name)
+        png_slots.append(beauty_slot)
+        links.append(LinkPlan(rl_name, beauty_socket, png_name, beauty_slot))
+    else:
+        warnings.append(f"Missing Image (Beauty) pass for {name}")
+
+    # Shared prefilter: clean the guiding passes once, per-pass Denoise nodes skip their own prefiltering
+    shared_albedo = shared_normal = None
+    if snapshot.shared_prefilter:
+        denoised = [p for p in PNG_PASSES if p in denoise and p in sockets]
+        prefilter_nodes, prefilter_links, shared_albedo, shared_normal = compile_shared_prefilter(
+            rl_name,
+            name,
+            albedo_socket if any(p in albedo for p in denoised) else None,
+            normal_socket if any(p in normal for p in denoised) else None,
+            -1400, -view_layer_idx * 1200 + 700,
+        )
+        nodes.extend(prefilter_nodes)
+        links.extend(prefilter_links)
+
+    # Default passes to PNG output with double naming: CH_PassName/CH_PassName
+    # Each pass is filtered by a chain: (set alpha, denoise prefilter or None, albedo source, normal source)
+    chains = []
+    for pass_name in PNG_PASSES:
+        pass_socket = sockets.get(pass_name)
+        if not pass_socket:
+            # Only show warning for passes that are actually enabled in settings
+            if pass_name in set_alpha or pass_name in denoise or pass_name in albedo or pass_name in normal:
+                warnings.append(f"Missing pass: {pass_name} for {name}")
+            continue
+
+        modified_name = get_modified_name(snapshot, pass_name, name)
+        slot_name = main_slot(modified_name)
+        png_slots.append(slot_name)
+
+        prefilter = albedo_source = normal_source = None
+        if pass_name in denoise:
+            albedo_source = (shared_albedo or (rl_name, albedo_socket)) if pass_name in albedo and albedo_socket else None
+            normal_source = (shared_normal or (rl_name, normal_socket)) if pass_name in normal and normal_socket else None
+            # Guiding passes that are already clean must not be prefiltered again
+            prefilter = snapshot.denoise_mode
+            if (albedo_source or normal_source) and (albedo_source is None or shared_albedo) and (normal_source is None or shared_normal):
+                prefilter = 'NONE'
+        chains.append((pass_name, pass_socket, slot_name, (pass_name in set_alpha, prefilter, albedo_source, normal_source)))
+
+    x, y = -1200, -view_layer_idx * 1200 + 400
+
+    # Passes with the same chain share one instance of a node group, when that saves nodes.
+    # The size of both layouts is counted either way, so the sidebar can compare them without a second compile.
+    grouped = {}
+    chain_passes = {}
+    for pass_name, _, _, chain in chains:
+        chain_passes.setdefault(chain, []).append(pass_name)
+    loose_nodes = loose_links = grouped_nodes = grouped_links = 0
+    groups = []
+    for chain, passes in chain_passes.items():
+        use_set_alpha, prefilter, albedo_source, normal_source = chain
+        steps = use_set_alpha + (prefilter is not None)
+        guides = (albedo_source is not None) + (normal_source is not None)
+        # Loose: per pass its filter nodes, their inputs (Image, Alpha, guides) and the link to the output
+        chain_nodes = len(passes) * steps
+        chain_links = len(passes) * (1 + 2 * use_set_alpha + (prefilter is not None) * (1 + guides))
+        loose_nodes += chain_nodes
+        loose_links += chain_links
+        if not steps or len(passes) * steps < 2:
+            grouped_nodes += chain_nodes
+            grouped_links += chain_links
+            continue
+        # Grouped: one group node, its shared inputs, and an input and output link per pass
+        group_plan = FilterGroupPlan(tuple(passes), use_set_alpha, prefilter,
+                                     albedo_source is not None, normal_source is not None)
+        groups.append(group_plan)
+        grouped_nodes += 1
+        grouped_links += use_set_alpha + guides + 2 * len(passes)
+        if snapshot.group_filters:
+            group_name = f"PassFilter_{name}_{passes[0]}"
+            nodes.append(NodePlan(
+                group_name,
+                'CompositorNodeGroup',
+                initial=(("location", (x + 100, y)),),
+                group=group_plan,
+            ))
+            if use_set_alpha:
+                links.append(LinkPlan(rl_name, alpha_socket, group_name, 'Alpha'))
+            if albedo_source:
+                links.append(LinkPlan(*albedo_source, group_name, 'Albedo'))
+            if normal_source:
+                links.append(LinkPlan(*normal_source, group_name, 'Normal'))
+            grouped.update((pass_name, group_name) for pass_name in passes)
+            y -= 250
+    filter_counts = ((loose_nodes, loose_links), (grouped_nodes, grouped_links))
+    filter_groups = tuple(groups)
+
+    for pass_name, pass_socket, slot_name, chain in chains:
+        source = (rl_name, pass_socket)
+        group_name = grouped.get(pass_name)
+        if group_name is not None:
+            links.append(LinkPlan(*source, group_name, pass_name))
+            links.append(LinkPlan(group_name, pass_name, png_name, slot_name))
+            continue
+
+        # Upstream of the output slot: RL pass -> [Set Alpha] -> [Denoise]
+        use_set_alpha, prefilter, albedo_source, normal_source = chain
+        if use_set_alpha:
+            set_alpha_name = f"SetAlpha_{name}_{pass_name}"
+            nodes.append(NodePlan(set_alpha_name, 'CompositorNodeSetAlpha', initial=(("location", (x, y)),)))
+            links.append(LinkPlan(*source, set_alpha_name, 'Image'))
+            links.append(LinkPlan(rl_name, alpha_socket, set_alpha_name, 'Alpha'))
+            source = (set_alpha_name, 'Image')
+
+        if prefilter is not None:
+            denoise_name = f"Denoise_{name}_{pass_name}"
+            nodes.append(NodePlan(
+                denoise_name,
+                'CompositorNodeDenoise',
+                props=(("prefilter", prefilter),),
+                initial=(("location", (x + 200, y)),),
+            ))
+            if albedo_source:
+                links.append(LinkPlan(*albedo_source, denoise_name, 'Albedo'))
+            if normal_source:
+                links.append(LinkPlan(*normal_source, denoise_name, 'Normal'))
+            links.append(LinkPlan(*source, denoise_name, 'Image'))
+            source = (denoise_name, 'Image')
+
+        links.append(LinkPlan(*source, png_name, slot_name))
+        y -= 250
+
+    # Shadow Catcher to PNG output with double naming: CH_Shadow_Catcher/CH_Shadow_Catcher
+    shadow_socket = sockets.get("Shadow Catcher") or sockets.get("Shadow")
+    if shadow_socket:
+        modified_shadow_name = get_modified_name(snapshot, "Shadow_Catcher", name)
+        shadow_slot = main_slot(modified_shadow_name)
+        png_slots.append(shadow_slot)
+        links.append(LinkPlan(rl_name, shadow_socket, png_name, shadow_slot))
+
+    # Light groups are lighting passes: CH_LG_<group>/CH_LG_<group> next to the beauty
+    for lightgroup, lightgroup_socket in routes.lightgroups:
+        lightgroup_slot = main_slot(get_modified_name(snapshot, f"LG_{lightgroup}", name))
+        png_slots.append(lightgroup_slot)
+        links.append(LinkPlan(rl_name, lightgroup_socket, png_name, lightgroup_slot))
+
+    route_data_passes()
+    return finish()
+
+def compile_graph_plan(snapshot, layers, fingerprint=None):
+    """Compile the full GraphPlan for all view layers (uncached)."""
+    if fingerprint is None:
+        fingerprint = plan_fingerprint(snapshot, layers)
+    return GraphPlan(fingerprint, tuple(compile_layer_plan(snapshot, layer, idx) for idx, layer in enumerate(layers)))
+
+# Compiled plans by fingerprint, oldest first
+_PLAN_CACHE = {}
+PLAN_CACHE_SIZE = 32
+
+def clear_plan_cache():
+    _PLAN_CACHE.clear()
+
+def get_graph_plan(snapshot, layers):
+    """Return the cached GraphPlan for these inputs, compiling it on a miss."""
+    layers = tuple(layers)
+    fingerprint = plan_fingerprint(snapshot, layers)
+    plan = _PLAN_CACHE.get(fingerprint)
+    profile_count("plan_cache.hit" if plan is not None else "plan_cache.miss")
+    if plan is None:
+        plan = compile_graph_plan(snapshot, layers, fingerprint)
+        if len(_PLAN_CACHE) >= PLAN_CACHE_SIZE:
+            _PLAN_CACHE.pop(next(iter(_PLAN_CACHE)))
+        _PLAN_CACHE[fingerprint] = plan
+    return plan
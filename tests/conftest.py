@@ -0,0 +1,42 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# The add-on package lives at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "galih_compositing"
+PACKAGE_DIR = os.path.join(ROOT, PACKAGE)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# compositing_plan.py needs no bpy: the compiler tests import it on its own, without the package
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+
+# tests/stub/bpy.py stands in for Blender, only for the tests that load the add-on
+STUB_DIR = os.path.join(ROOT, "tests", "stub")
+
+@pytest.fixture(scope="session")
+def addon():
+    """The add-on package, registered against the bpy stub."""
+    if STUB_DIR not in sys.path:
+        sys.path.insert(0, STUB_DIR)
+    module = importlib.import_module(PACKAGE)
+    module.register()
+    yield module
+    module.unregister()
+
+@pytest.fixture
+def bpy(addon):
+    import bpy
+    return bpy
+
+@pytest.fixture
+def scene(addon, bpy, tmp_path):
+    """The context scene: two view layers with every pass the add-on handles, writing under tmp_path."""
+    scene = addon.build_benchmark_scene(2, 0)
+    scene.compositing_settings.base_path = str(tmp_path)
+    with bpy.context.temp_override(scene=scene):
+        yield scene
+    bpy.data.scenes.remove(scene)
@@ -0,0 +1,775 @@
+"""
+Minimal stand-in for Blender's bpy, enough to register the add-on, run GENERATE NODES and
+draw the sidebar panel outside Blender. Only the API the add-on uses is modelled.
+"""
+
+import os
+import sys
+import tempfile
+import types as _module_types
+from contextlib import contextmanager
+
+# -------------------------------------------------------
+# PROPERTIES
+# -------------------------------------------------------
+
+class _Property:
+    """A bpy.props definition: defaults for property groups, a per-ID instance for PointerProperty."""
+
+    def __init__(self, kind, **options):
+        self.kind = kind
+        self.options = options
+
+    def default(self):
+        value = self.options.get("default")
+        if self.kind == "BoolVector":
+            return list(value) if value is not None else [False] * self.options.get("size", 3)
+        if self.kind == "Enum" and value is None:
+            items = self.options.get("items")
+            return items[0][0] if isinstance(items, (list, tuple)) and items else ""
+        if value is None:
+            return {"Bool": False, "String": "", "Int": 0, "Float": 0.0}.get(self.kind)
+        return value
+
+    def __get__(self, instance, owner):
+        # Assigned to an ID type (bpy.types.Scene.x = PointerProperty(...)): one group per ID
+        if instance is None:
+            return self
+        key = ("_pointer", id(self))
+        if key not in instance.__dict__:
+            group = self.options["type"]()
+            object.__setattr__(group, "id_data", instance)
+            instance.__dict__[key] = group
+        return instance.__dict__[key]
+
+def _make_property(kind):
+    def make(**options):
+        return _Property(kind, **options)
+    make.__name__ = f"{kind}Property"
+    return make
+
+props = _module_types.ModuleType("bpy.props")
+for _kind in ("Bool", "BoolVector", "String", "Enum", "Int", "Float", "FloatVector", "IntVector", "Pointer", "Collection"):
+    setattr(props, f"{_kind}Property", _make_property(_kind))
+
+def _annotated_properties(cls):
+    for klass in reversed(cls.__mro__):
+        for name, prop in vars(klass).get("__annotations__", {}).items():
+            if isinstance(prop, _Property):
+                yield name, prop
+
+# -------------------------------------------------------
+# TYPES
+# -------------------------------------------------------
+
+class _IDProperties:
+    """Custom ID properties (id["name"]) of scenes, node trees and nodes."""
+
+    def _id_props(self):
+        return self.__dict__.setdefault("_custom_properties", {})
+
+    def get(self, key, default=None):
+        return self._id_props().get(key, default)
+
+    def __getitem__(self, key):
+        return self._id_props()[key]
+
+    def __setitem__(self, key, value):
+        self._id_props()[key] = value
+
+    def __delitem__(self, key):
+        del self._id_props()[key]
+
+    def __contains__(self, key):
+        return key in self._id_props()
+
+    def keys(self):
+        return self._id_props().keys()
+
+    def as_pointer(self):
+        return id(self)
+
+class PropertyGroup:
+    def __init__(self):
+        for name, prop in _annotated_properties(type(self)):
+            if prop.kind == "Pointer":
+                value = prop.options["type"]()
+            elif prop.kind == "Collection":
+                value = []
+            else:
+                value = prop.default()
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "id_data", None)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # Blender runs update callbacks on every assignment from Python
+        for prop_name, prop in _annotated_properties(type(self)):
+            if prop_name == name and prop.options.get("update"):
+                prop.options["update"](self, context)
+
+class Operator:
+    def __init__(self):
+        self.reports = []
+        for name, prop in _annotated_properties(type(self)):
+            setattr(self, name, prop.default())
+
+    def report(self, level, message):
+        self.reports.append((set(level), message))
+
+class Panel:
+    layout = None
+
+class Menu:
+    pass
+
+class AddonPreferences:
+    pass
+
+types = _module_types.ModuleType("bpy.types")
+types.PropertyGroup = PropertyGroup
+types.Operator = Operator
+types.Panel = Panel
+types.Menu = Menu
+types.AddonPreferences = AddonPreferences
+
+# -------------------------------------------------------
+# NODES
+# -------------------------------------------------------
+
+# Node type per bl_idname, with its (inputs, outputs) when they are fixed
+NODE_TYPES = {
+    'CompositorNodeRLayers': ('R_LAYERS', (), ()),
+    'CompositorNodeOutputFile': ('OUTPUT_FILE', (), ()),
+    'CompositorNodeDenoise': ('DENOISE', ("Image", "Normal", "Albedo"), ("Image",)),
+    'CompositorNodeSetAlpha': ('SETALPHA', ("Image", "Alpha"), ("Image",)),
+    'CompositorNodeMixRGB': ('MIX_RGB', ("Fac", "Image", "Image"), ("Image",)),
+    'CompositorNodeMath': ('MATH', ("Value", "Value", "Value"), ("Value",)),
+    'CompositorNodeSeparateXYZ': ('SEPARATE_XYZ', ("Vector",), ("X", "Y", "Z")),
+    'CompositorNodeScale': ('SCALE', ("Image", "X", "Y"), ("Image",)),
+    'CompositorNodeComposite': ('COMPOSITE', ("Image",), ()),
+    'CompositorNodeViewer': ('VIEWER', ("Image",), ()),
+    'CompositorNodeColorCorrection': ('COLORCORRECTION', ("Image", "Mask"), ("Image",)),
+    'CompositorNodeGroup': ('GROUP', (), ()),
+    'NodeGroupInput': ('GROUP_INPUT', (), ()),
+    'NodeGroupOutput': ('GROUP_OUTPUT', (), ()),
+    'NodeFrame': ('FRAME', (), ()),
+}
+
+# Node attributes with their initial value, per node type
+NODE_ATTRIBUTES = {
+    'DENOISE': {"prefilter": 'ACCURATE', "use_hdr": True, "quality": 'HIGH'},
+    'SETALPHA': {"mode": 'APPLY'},
+    'MIX_RGB': {"blend_type": 'MIX', "use_clamp": False, "use_alpha": False},
+    'MATH': {"operation": 'ADD', "use_clamp": False},
+    'SCALE': {"space": 'RELATIVE'},
+}
+
+VALUE_SOCKETS = frozenset(("Alpha", "Depth", "Mist", "Denoising Depth", "Value", "Fac", "X", "Y", "Z"))
+VECTOR_SOCKETS = frozenset(("Normal", "Position", "Vector", "UV", "Denoising Normal"))
+
+class NodeSocket:
+    def __init__(self, node, name, identifier, is_output):
+        self.node = node
+        self.name = name
+        self.identifier = identifier
+        self.is_output = is_output
+        self.enabled = True
+        self.hide = False
+        self.links = []
+        self.type = 'VALUE' if name in VALUE_SOCKETS else 'VECTOR' if name in VECTOR_SOCKETS else 'RGBA'
+        self.default_value = 0.0 if self.type == 'VALUE' else (0.0, 0.0, 0.0, 1.0)
+
+    @property
+    def is_linked(self):
+        return bool(self.links)
+
+    def as_pointer(self):
+        return id(self)
+
+    def __repr__(self):
+        return f"<NodeSocket {self.node.name}.{self.identifier}>"
+
+class NodeSockets(list):
+    """node.inputs / node.outputs: by index or by name (the first socket with that name)."""
+
+    def __init__(self, node, is_output):
+        super().__init__()
+        self.node = node
+        self.is_output = is_output
+
+    def new(self, socket_type, name):
+        # Repeated names get a numbered identifier, like the second Image input of a Mix node
+        repeats = sum(1 for sock in self if sock.name == name)
+        identifier = f"{name}_{repeats:03d}" if repeats else name
+        sock = NodeSocket(self.node, name, identifier, self.is_output)
+        self.append(sock)
+        return sock
+
+    def get(self, name, default=None):
+        return next((sock for sock in self if sock.name == name), default)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            sock = self.get(key)
+            if sock is None:
+                raise KeyError(key)
+            return sock
+        return list.__getitem__(self, key)
+
+    def clear(self):
+        for sock in self:
+            for link in list(sock.links):
+                self.node.id_data.links.remove(link)
+        list.clear(self)
+
+class ImageFormatSettings:
+    def __init__(self):
+        self.file_format = 'PNG'
+        self.color_mode = 'RGBA'
+        self.color_depth = '8'
+        self.compression = 15
+        self.exr_codec = 'ZIP'
+        self.color_management = 'FOLLOW_SCENE'
+        self.quality = 90
+
+class FileOutputSlot:
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+        self.use_node_format = True
+        self.format = ImageFormatSettings()
+
+class FileOutputSlots:
+    """file_slots and layer_slots of a File Output node, each slot owns one input socket."""
+
+    def __init__(self, node):
+        self.node = node
+        self.slots = []
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, index):
+        return self.slots[index]
+
+    def new(self, path):
+        self.slots.append(FileOutputSlot(path))
+        return self.node.inputs.new('NodeSocketColor', path)
+
+    def remove(self, sock):
+        index = self.node.inputs.index(sock)
+        for link in list(sock.links):
+            self.node.id_data.links.remove(link)
+        self.node.inputs.pop(index)
+        self.slots.pop(index)
+
+    def clear(self):
+        for sock in list(self.node.inputs):
+            self.remove(sock)
+
+class Node(_IDProperties):
+    def __init__(self, node_tree, bl_idname):
+        node_type, inputs, outputs = NODE_TYPES.get(bl_idname, (bl_idname, (), ()))
+        self.__dict__.update(
+            id_data=node_tree, bl_idname=bl_idname, type=node_type, _name=bl_idname, label="",
+            location=(0.0, 0.0), width=140.0, mute=False, hide=False, parent=None,
+            use_custom_color=False, color=(0.608, 0.608, 0.608),
+        )
+        self.inputs = NodeSockets(self, False)
+        self.outputs = NodeSockets(self, True)
+        for name in inputs:
+            self.inputs.new('NodeSocketColor', name)
+        for name in outputs:
+            self.outputs.new('NodeSocketColor', name)
+        self.__dict__.update(NODE_ATTRIBUTES.get(node_type, {}))
+        if node_type == 'OUTPUT_FILE':
+            self.file_slots = self.layer_slots = FileOutputSlots(self)
+            self.format = ImageFormatSettings()
+            self.base_path = "/tmp/"
+        elif node_type == 'R_LAYERS':
+            self.scene = node_tree.scene
+            self._layer = ""
+        elif node_type == 'GROUP':
+            self._node_tree = None
+        elif node_type in ('GROUP_INPUT', 'GROUP_OUTPUT'):
+            in_out, sockets = ('INPUT', self.outputs) if node_type == 'GROUP_INPUT' else ('OUTPUT', self.inputs)
+            for item in node_tree.interface.items_tree:
+                if item.in_out == in_out:
+                    sockets.new(item.socket_type, item.name)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self.id_data.nodes._rename(self, value)
+
+    @property
+    def layer(self):
+        return self._layer
+
+    @layer.setter
+    def layer(self, value):
+        # The Render Layers node shows every pass socket, only those of enabled passes are enabled
+        self._layer = value
+        view_layer = self.scene.view_layers.get(value) if self.scene else None
+        enabled = view_layer.get_output_names() if view_layer else []
+        available = set(enabled)
+        existing = {sock.name: sock for sock in self.outputs}
+        for name in RENDER_LAYERS_OUTPUTS + tuple(name for name in enabled if name not in RENDER_LAYERS_OUTPUTS):
+            sock = existing.get(name) or self.outputs.new('NodeSocketColor', name)
+            sock.enabled = name in available
+
+    @property
+    def node_tree(self):
+        return self._node_tree
+
+    @node_tree.setter
+    def node_tree(self, group):
+        self._node_tree = group
+        self.inputs.clear()
+        self.outputs.clear()
+        for item in group.interface.items_tree:
+            (self.outputs if item.in_out == 'OUTPUT' else self.inputs).new(item.socket_type, item.name)
+
+    def __repr__(self):
+        return f"<Node {self.name} ({self.type})>"
+
+class Nodes:
+    """node_tree.nodes in creation order, with Blender's unique names (Name.001)."""
+
+    def __init__(self, node_tree):
+        self.node_tree = node_tree
+        self.by_name = {}
+        self.ordered = {}
+
+    def _unique_name(self, name):
+        if name not in self.by_name:
+            return name
+        base = name.rsplit(".", 1)[0] if name[-4:-3] == "." and name[-3:].isdigit() else name
+        index = 1
+        while f"{base}.{index:03d}" in self.by_name:
+            index += 1
+        return f"{base}.{index:03d}"
+
+    def _rename(self, node, name):
+        if name == node._name and self.by_name.get(name) is node:
+            return
+        self.by_name.pop(node._name, None)
+        node._name = self._unique_name(name)
+        self.by_name[node._name] = node
+
+    def new(self, bl_idname):
+        node = Node(self.node_tree, bl_idname)
+        node._name = self._unique_name(node._name)
+        self.by_name[node._name] = node
+        self.ordered[id(node)] = node
+        return node
+
+    def remove(self, node):
+        for sock in list(node.inputs) + list(node.outputs):
+            for link in list(sock.links):
+                self.node_tree.links.remove(link)
+        del self.ordered[id(node)]
+        del self.by_name[node._name]
+
+    def clear(self):
+        self.node_tree.links.clear()
+        for node in list(self):
+            self.remove(node)
+
+    def get(self, name, default=None):
+        return self.by_name.get(name, default)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.by_name[key]
+        return list(self.ordered.values())[key]
+
+    def __iter__(self):
+        return iter(list(self.ordered.values()))
+
+    def __len__(self):
+        return len(self.ordered)
+
+    def __contains__(self, node):
+        return id(node) in self.ordered
+
+class NodeLink:
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+        self.is_valid = True
+        self.is_muted = False
+
+class NodeLinks:
+    """node_tree.links, an input socket takes a single link."""
+
+    def __init__(self):
+        self.ordered = {}
+
+    def new(self, from_socket, to_socket):
+        for link in list(to_socket.links):
+            self.remove(link)
+        link = NodeLink(from_socket, to_socket)
+        from_socket.links.append(link)
+        to_socket.links.append(link)
+        self.ordered[id(link)] = link
+        return link
+
+    def remove(self, link):
+        link.from_socket.links.remove(link)
+        link.to_socket.links.remove(link)
+        del self.ordered[id(link)]
+
+    def clear(self):
+        for link in list(self.ordered.values()):
+            self.remove(link)
+
+    def __iter__(self):
+        return iter(list(self.ordered.values()))
+
+    def __len__(self):
+        return len(self.ordered)
+
+class NodeTreeInterfaceSocket:
+    def __init__(self, name, in_out, socket_type):
+        self.name = name
+        self.in_out = in_out
+        self.socket_type = socket_type
+        self.item_type = 'SOCKET'
+
+class NodeTreeInterface:
+    def __init__(self):
+        self.items_tree = []
+
+    def new_socket(self, name, in_out='INPUT', socket_type='NodeSocketFloat'):
+        item = NodeTreeInterfaceSocket(name, in_out, socket_type)
+        self.items_tree.append(item)
+        return item
+
+    def clear(self):
+        self.items_tree.clear()
+
+class NodeTree(_IDProperties):
+    def __init__(self, name, scene=None):
+        self.name = name
+        self.scene = scene
+        self.users = 1
+        self.use_fake_user = False
+        self.interface = NodeTreeInterface()
+        self.nodes = Nodes(self)
+        self.links = NodeLinks()
+
+# -------------------------------------------------------
+# SCENES AND VIEW LAYERS
+# -------------------------------------------------------
+
+# Sockets the Render Layers node always shows, disabled unless their pass is enabled
+RENDER_LAYERS_OUTPUTS = (
+    "Image", "Alpha", "Depth", "Mist", "Normal", "Position", "Vector", "UV",
+    "Diffuse Direct", "Diffuse Indirect", "Diffuse Color", "Glossy Direct", "Glossy Indirect", "Glossy Color",
+    "Transmission Direct", "Transmission Indirect", "Transmission Color", "Volume Direct", "Volume Indirect",
+    "Emit", "Environment", "AO", "Shadow Catcher", "Denoising Normal", "Denoising Albedo", "Denoising Depth",
+)
+
+# (flag, socket) of the passes on the view layer
+VIEW_LAYER_PASSES = (
+    ("use_pass_z", "Depth"), ("use_pass_mist", "Mist"), ("use_pass_normal", "Normal"),
+    ("use_pass_position", "Position"), ("use_pass_vector", "Vector"), ("use_pass_uv", "UV"),
+    ("use_pass_diffuse_direct", "Diffuse Direct"), ("use_pass_diffuse_indirect", "Diffuse Indirect"),
+    ("use_pass_diffuse_color", "Diffuse Color"), ("use_pass_glossy_direct", "Glossy Direct"),
+    ("use_pass_glossy_indirect", "Glossy Indirect"), ("use_pass_glossy_color", "Glossy Color"),
+    ("use_pass_transmission_direct", "Transmission Direct"),
+    ("use_pass_transmission_indirect", "Transmission Indirect"),
+    ("use_pass_transmission_color", "Transmission Color"), ("use_pass_emit", "Emit"),
+    ("use_pass_environment", "Environment"), ("use_pass_ambient_occlusion", "AO"),
+    ("use_pass_shadow_catcher", "Shadow Catcher"),
+)
+
+# (flag, socket prefix) of the cryptomatte passes
+CRYPTOMATTE_PASSES = (
+    ("use_pass_cryptomatte_object", "CryptoObject"),
+    ("use_pass_cryptomatte_material", "CryptoMaterial"),
+    ("use_pass_cryptomatte_asset", "CryptoAsset"),
+)
+
+class IDCollection(list):
+    """bpy.data collections and scene.view_layers: a list with lookup by name."""
+
+    def __init__(self, factory=None):
+        super().__init__()
+        self.factory = factory
+
+    def get(self, name, default=None):
+        return next((item for item in self if item.name == name), default)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(key)
+            return item
+        return list.__getitem__(self, key)
+
+    def new(self, name, *args, **kwargs):
+        item = self.factory(name, *args, **kwargs)
+        self.append(item)
+        return item
+
+class NamedItem:
+    def __init__(self, name, type='COLOR'):
+        self.name = name
+        self.type = type
+
+class ViewLayerCycles:
+    def __init__(self):
+        self.use_pass_volume_direct = False
+        self.use_pass_volume_indirect = False
+        self.use_pass_shadow_catcher = False
+        self.denoising_store_passes = False
+
+class ViewLayer:
+    def __init__(self, name):
+        self.name = name
+        self.use = True
+        self.cycles = ViewLayerCycles()
+        self.use_pass_combined = True
+        for flag, _socket in VIEW_LAYER_PASSES + CRYPTOMATTE_PASSES:
+            setattr(self, flag, False)
+        self.pass_cryptomatte_depth = 6
+        self.aovs = IDCollection(NamedItem)
+        self.lightgroups = IDCollection(NamedItem)
+
+    def as_pointer(self):
+        return id(self)
+
+    def get_output_names(self):
+        """Sockets Blender enables on a Render Layers node for this view layer."""
+        names = ["Image", "Alpha"]
+        names += [socket for flag, socket in VIEW_LAYER_PASSES if getattr(self, flag)
+                  and socket != "Shadow Catcher"]
+        if self.cycles.use_pass_volume_direct:
+            names.append("Volume Direct")
+        if self.cycles.use_pass_volume_indirect:
+            names.append("Volume Indirect")
+        if self.use_pass_shadow_catcher or self.cycles.use_pass_shadow_catcher:
+            names.append("Shadow Catcher")
+        if self.cycles.denoising_store_passes:
+            names += ["Denoising Normal", "Denoising Albedo", "Denoising Depth"]
+        levels = (self.pass_cryptomatte_depth + 1) // 2
+        for flag, prefix in CRYPTOMATTE_PASSES:
+            if getattr(self, flag):
+                names += [f"{prefix}{level:02d}" for level in range(levels)]
+        names += [aov.name for aov in self.aovs]
+        names += [f"Combined_{lightgroup.name}" for lightgroup in self.lightgroups]
+        return names
+
+class RenderSettings:
+    def __init__(self):
+        self.engine = 'CYCLES'
+        self.resolution_x = 1920
+        self.resolution_y = 1080
+        self.resolution_percentage = 100
+        self.filepath = "/tmp/"
+        self.use_file_extension = True
+        self.use_compositing = True
+        self.fps = 24
+        self.fps_base = 1.0
+        self.image_settings = ImageFormatSettings()
+
+class Scene(_IDProperties):
+    def __init__(self, name="Scene"):
+        self.name = name
+        self.use_nodes = False
+        self.render = RenderSettings()
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_step = 1
+        self.frame_current = 1
+        self.view_layers = IDCollection(ViewLayer)
+        self.view_layers.new("ViewLayer")
+        self.node_tree = NodeTree("Compositing", self)
+
+    def frame_set(self, frame):
+        self.frame_current = frame
+
+types.Scene = Scene
+types.ViewLayer = ViewLayer
+types.Node = Node
+types.NodeTree = NodeTree
+
+class BlendData:
+    def __init__(self):
+        self.filepath = ""
+        self.is_dirty = False
+        self.scenes = IDCollection(Scene)
+        self.node_groups = IDCollection(lambda name, tree_type='CompositorNodeTree': NodeTree(name))
+        self.images = IDCollection()
+
+data = BlendData()
+
+# -------------------------------------------------------
+# CONTEXT AND OPERATORS
+# -------------------------------------------------------
+
+class WindowManager:
+    def __init__(self):
+        self.windows = []
+        self.clipboard = ""
+
+    def invoke_props_dialog(self, operator):
+        return operator.execute(context)
+
+class Context:
+    def __init__(self):
+        self.scene = None
+        self.view_layer = None
+        self.area = None
+        self.window_manager = WindowManager()
+        self.preferences = None
+
+    @contextmanager
+    def temp_override(self, **overrides):
+        if "scene" in overrides and "view_layer" not in overrides:
+            overrides["view_layer"] = overrides["scene"].view_layers[0]
+        previous = {name: getattr(self, name) for name in overrides}
+        for name, value in overrides.items():
+            setattr(self, name, value)
+        try:
+            yield self
+        finally:
+            for name, value in previous.items():
+                setattr(self, name, value)
+
+context = Context()
+
+# bl_idname -> registered class
+_registered = {}
+
+class _OperatorCategory:
+    def __init__(self, category):
+        self.category = category
+
+    def __getattr__(self, name):
+        bl_idname = f"{self.category}.{name}"
+
+        def call(*args, **properties):
+            cls = _registered.get(bl_idname)
+            if cls is None or not issubclass(cls, Operator):
+                raise RuntimeError(f"Operator bpy.ops.{bl_idname} is not available in the stub")
+            operator = cls()
+            for prop_name, value in properties.items():
+                setattr(operator, prop_name, value)
+            return operator.execute(context)
+        return call
+
+class _Operators:
+    def __getattr__(self, category):
+        return _OperatorCategory(category)
+
+ops = _Operators()
+
+def _register_class(cls):
+    _registered[getattr(cls, "bl_idname", cls.__name__)] = cls
+
+def _unregister_class(cls):
+    _registered.pop(getattr(cls, "bl_idname", cls.__name__), None)
+
+def _user_resource(resource_type, path=""):
+    return os.path.join(tempfile.gettempdir(), "bpy_stub", resource_type.lower(), path)
+
+utils = _module_types.ModuleType("bpy.utils")
+utils.register_class = _register_class
+utils.unregister_class = _unregister_class
+utils.user_resource = _user_resource
+
+def _abspath(path):
+    if path.startswith("//"):
+        return os.path.join(os.path.dirname(data.filepath) or tempfile.gettempdir(), path[2:])
+    return path
+
+path = _module_types.ModuleType("bpy.path")
+path.abspath = _abspath
+
+# -------------------------------------------------------
+# UI
+# -------------------------------------------------------
+
+class UILayout:
+    """Records what a draw() call puts in the panel, properties must exist on their data."""
+
+    def __init__(self, root=None):
+        self.root = root or self
+        if root is None:
+            self.labels = []
+            self.props = []
+            self.operators = []
+
+    def _child(self, *args, **kwargs):
+        return UILayout(self.root)
+
+    row = column = box = split = grid_flow = column_flow = _child
+
+    def label(self, text="", icon='NONE'):
+        self.root.labels.append(text)
+
+    def prop(self, data, property, **kwargs):
+        if not hasattr(data, property):
+            raise AttributeError(f"rna_uiItemR: property not found: {type(data).__name__}.{property}")
+        self.root.props.append(property)
+
+    def operator(self, operator, **kwargs):
+        self.root.operators.append(operator)
+        return _module_types.SimpleNamespace()
+
+    def separator(self, **kwargs):
+        pass
+
+types.UILayout = UILayout
+
+# -------------------------------------------------------
+# APP
+# -------------------------------------------------------
+
+def persistent(function):
+    return function
+
+handlers = _module_types.ModuleType("bpy.app.handlers")
+handlers.persistent = persistent
+for _name in ("depsgraph_update_pre", "depsgraph_update_post", "frame_change_pre", "frame_change_post",
+              "load_pre", "load_post", "save_pre", "save_post", "render_init", "render_pre", "render_post",
+              "render_stats", "render_write", "render_complete", "render_cancel"):
+    setattr(handlers, _name, [])
+
+# function -> first interval of the registered timers, never run by the stub
+_timers = {}
+
+timers = _module_types.ModuleType("bpy.app.timers")
+timers.register = lambda function, first_interval=0.0, persistent=False: _timers.__setitem__(function, first_interval)
+timers.is_registered = lambda function: function in _timers
+timers.unregister = lambda function: _timers.pop(function, None)
+
+app = _module_types.ModuleType("bpy.app")
+app.version = (4, 5, 0)
+app.binary_path = "blender"
+app.background = True
+app.handlers = handlers
+app.timers = timers
+
+sys.modules.update({
+    "bpy.app": app,
+    "bpy.app.handlers": handlers,
+    "bpy.app.timers": timers,
+    "bpy.props": props,
+    "bpy.types": types,
+    "bpy.utils": utils,
+    "bpy.path": path,
+})
@@ -0,0 +1,345 @@
+"""The add-on against the bpy stub in tests/stub: GENERATE NODES, the sidebar panel and the operators around them."""
+
+import json
+import os
+import runpy
+
+VERSION_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "version.json")
+
+def generate(addon, bpy):
+    operator = addon.AutoCompositingSetup()
+    assert operator.execute(bpy.context) == {'FINISHED'}
+    return operator.reports
+
+def get_tree_links(scene):
+    return {(link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+            for link in scene.node_tree.links}
+
+def draw_panel(addon, bpy):
+    panel = addon.COMPOSITING_PT_AutoSetupPanel()
+    panel.layout = bpy.types.UILayout()
+    panel.draw(bpy.context)
+    return panel.layout
+
+def test_generate_builds_every_view_layer(addon, bpy, scene):
+    settings = scene.compositing_settings
+    settings.use_node_groups = False
+    settings.set_alpha_passes[addon.DEFAULT_PASSES.index("DiffDir")] = True
+    generate(addon, bpy)
+    nodes = scene.node_tree.nodes
+    for view_layer in scene.view_layers:
+        name = view_layer.name
+        assert nodes[f"RenderLayers_{name}"].layer == name
+        assert f"{name}_Beauty/{name}_Beauty" in [slot.path for slot in nodes[f"PNG_Output_{name}"].file_slots]
+        # No cryptomatte pass is enabled, so no Cryptomatte output
+        assert nodes.get(f"Cryptomatte_{name}") is None
+    links = get_tree_links(scene)
+    assert ("RenderLayers_ViewLayer", "Diffuse Direct", "SetAlpha_ViewLayer_DiffDir", "Image") in links
+    assert ("RenderLayers_ViewLayer", "Alpha", "SetAlpha_ViewLayer_DiffDir", "Alpha") in links
+    assert ("SetAlpha_ViewLayer_DiffDir", "Image", "Denoise_ViewLayer_DiffDir", "Image") in links
+
+def test_regenerate_is_a_noop_and_keeps_user_nodes(addon, bpy, scene):
+    generate(addon, bpy)
+    node_tree = scene.node_tree
+    viewer = node_tree.nodes.new('CompositorNodeViewer')
+    node_tree.links.new(node_tree.nodes["RenderLayers_ViewLayer"].outputs["Image"], viewer.inputs["Image"])
+    nodes = {node.name: node for node in node_tree.nodes}
+    links = get_tree_links(scene)
+
+    scene.compositing_settings.reconcile_existing = True
+    reports = generate(addon, bpy)
+    assert any("+0/-0 nodes, +0/-0 slots, +0/-0 links" in message for _level, message in reports)
+    assert {node.name: node for node in node_tree.nodes} == nodes
+    assert get_tree_links(scene) == links
+
+def test_regenerate_keeps_user_node_before_generated_input(addon, bpy, scene):
+    generate(addon, bpy)
+    node_tree = scene.node_tree
+    png = node_tree.nodes["PNG_Output_ViewLayer"]
+    slot = addon.get_slot_inputs(png)["ViewLayer_Beauty/ViewLayer_Beauty"]
+    source = slot.links[0].from_socket
+    correction = node_tree.nodes.new('CompositorNodeColorCorrection')
+    node_tree.links.new(source, correction.inputs["Image"])
+    node_tree.links.new(correction.outputs["Image"], slot)
+    links = get_tree_links(scene)
+
+    scene.compositing_settings.reconcile_existing = True
+    reports = generate(addon, bpy)
+    assert any("+0/-0 nodes, +0/-0 slots, +0/-0 links" in message for _level, message in reports)
+    assert get_tree_links(scene) == links
+    assert slot.links[0].from_node is correction
+
+def test_cancelled_generate_keeps_the_tree(addon, bpy, scene):
+    generate(addon, bpy)
+    nodes = {node.name for node in scene.node_tree.nodes}
+    for view_layer in scene.view_layers:
+        view_layer.use = False
+    operator = addon.AutoCompositingSetup()
+    assert operator.execute(bpy.context) == {'CANCELLED'}
+    assert {node.name for node in scene.node_tree.nodes} == nodes
+
+def test_regenerate_follows_settings(addon, bpy, scene):
+    settings = scene.compositing_settings
+    generate(addon, bpy)
+    settings.reconcile_existing = True
+    settings.denoise_passes = [False] * len(addon.DEFAULT_PASSES)
+    generate(addon, bpy)
+    nodes = scene.node_tree.nodes
+    assert not any(node.type == 'DENOISE' for node in nodes)
+    # The same wiring as a fresh build with these settings
+    links = get_tree_links(scene)
+    settings.reconcile_existing = False
+    generate(addon, bpy)
+    assert get_tree_links(scene) == links
+
+def test_malformed_encoding_profile_falls_back(addon, bpy, scene, tmp_path):
+    settings = scene.compositing_settings
+    profile = tmp_path / "encoding_profile.json"
+    profile.write_text('{"outputs": {"PNG": {"compression": 5')
+    settings.encoding_profile = str(profile)
+    reports = generate(addon, bpy)
+    assert any(level == {'WARNING'} and "Encoding profile" in message for level, message in reports)
+    assert scene.node_tree.nodes["PNG_Output_ViewLayer"].format.compression == addon.PNG_FORMAT.compression
+
+    # Only the encoding fields are taken from a profile
+    profile.write_text(json.dumps({"outputs": {"PNG": {"compression": 5, "file_format": 'JPEG'}}}))
+    os.utime(profile, (0, 1))
+    generate(addon, bpy)
+    png_format = scene.node_tree.nodes["PNG_Output_ViewLayer"].format
+    assert (png_format.file_format, png_format.compression) == ('PNG', 5)
+
+def test_noise_analysis_keeps_user_edits(addon, bpy, scene, monkeypatch):
+    settings = scene.compositing_settings
+    generate(addon, bpy)
+    viewer = scene.node_tree.nodes.new('CompositorNodeViewer')
+    guided = addon.DEFAULT_PASSES.index("GlossDir")
+    settings.use_denoise_albedo[guided] = True
+    # No render here: the analysis measures these values
+    monkeypatch.setattr(bpy.ops, "render", type("RenderOps", (), {"render": staticmethod(lambda **kwargs: {'FINISHED'})}),
+                        raising=False)
+    measured = []
+
+    def measure_pass_noise(files):
+        measured.extend(files.values())
+        return {"DiffDir": 0.5, "DiffInd": 0.001}
+
+    monkeypatch.setattr(addon, "measure_pass_noise", measure_pass_noise)
+
+    operator = addon.AnalyzeDenoiseNoise()
+    assert operator.execute(bpy.context) == {'FINISHED'}
+    assert scene.node_tree.nodes.get(viewer.name) is viewer
+    assert not settings.reconcile_existing
+    # Measured on linear float EXRs, the PNG outputs are put back afterwards
+    assert measured and all(path.endswith(".exr") for path in measured)
+    png_format = scene.node_tree.nodes["PNG_Output_ViewLayer"].format
+    assert (png_format.file_format, png_format.color_depth) == (addon.PNG_FORMAT.file_format, addon.PNG_FORMAT.color_depth)
+    assert ({'INFO'}, "Noise: DiffDir 0.5000 (denoise), DiffInd 0.0010") in operator.reports
+    flags = dict(zip(addon.DEFAULT_PASSES, settings.denoise_passes))
+    assert flags["DiffDir"] and not flags["DiffInd"]
+    # Only the measured passes are changed
+    assert settings.use_denoise_albedo[guided]
+    assert settings.denoise_passes[guided] == addon.get_default_denoise_flags()[guided]
+
+def test_preview_mode_restores_node_formats(addon, bpy, scene):
+    settings = scene.compositing_settings
+    settings.use_node_groups = True
+    settings.set_alpha_passes[addon.DEFAULT_PASSES.index("DiffDir")] = True
+    generate(addon, bpy)
+    nodes = scene.node_tree.nodes
+    groups = {node.name: node.node_tree for node in nodes if node.type == 'GROUP'}
+    group_nodes = {group.name: len(group.nodes) for group in groups.values()}
+    png = nodes["PNG_Output_ViewLayer"]
+    png.format.compression = 90  # user edit after GENERATE NODES
+    final_depth = png.format.color_depth
+    links = get_tree_links(scene)
+
+    settings.preview_mode = True
+    assert get_tree_links(scene) == links
+    for name, group in groups.items():
+        preview = nodes[name].node_tree
+        assert not nodes[name].mute
+        # The shared groups are left as they are, the preview variant only drops the Denoise rows
+        assert len(group.nodes) == group_nodes[group.name]
+        assert not any(inner.type == 'DENOISE' for inner in preview.nodes)
+        set_alpha = sum(inner.type == 'SETALPHA' for inner in group.nodes)
+        assert sum(inner.type == 'SETALPHA' for inner in preview.nodes) == set_alpha
+    assert any(sum(inner.type == 'SETALPHA' for inner in nodes[name].node_tree.nodes) for name in groups)
+    assert (png.format.color_depth, png.format.compression) == (addon.PREVIEW_PNG_DEPTH, addon.PREVIEW_PNG_COMPRESSION)
+
+    settings.preview_mode = False
+    assert {name: nodes[name].node_tree for name in groups} == groups
+    assert get_tree_links(scene) == links
+    assert (png.format.color_depth, png.format.compression) == (final_depth, 90)
+    assert addon.PREVIEW_FORMAT_PROP not in png
+
+def test_telemetry_record(addon, bpy, scene, tmp_path):
+    settings = scene.compositing_settings
+    settings.telemetry_enabled = True
+    settings.telemetry_path = str(tmp_path / "render_telemetry.csv")
+    generate(addon, bpy)
+    telemetry = addon.RenderTelemetry()
+    telemetry.start(scene)
+    telemetry.begin_frame(scene)
+    telemetry.update_stats("Fra:1 | Mem:10M | Compositing")
+    telemetry.mark("post")
+    telemetry.mark("write")
+    telemetry.end_frame()
+    record = telemetry.last
+    # The File Outputs write while compositing: their time is in composite_s
+    assert record["composite_s"] is not None and record["render_write_s"] is not None
+    with open(telemetry.path, newline="") as handle:
+        assert next(handle).strip().split(",") == list(addon.TELEMETRY_CSV_FIELDS)
+
+def get_pass_rows(addon, layout):
+    return [label for label in layout.labels if label in addon.DEFAULT_PASSES]
+
+def test_panel_draw(addon, bpy, scene, tmp_path):
+    view_layer = scene.view_layers[0]
+    # Cold: nothing generated yet, the pass rows come from the view layer settings
+    cold = draw_panel(addon, bpy)
+    assert addon.AutoCompositingSetup.bl_idname in cold.operators
+    assert get_pass_rows(addon, cold) == [p for p in addon.DEFAULT_PASSES if p in addon.get_enabled_passes(scene, view_layer)]
+
+    # Warm: the pass rows come from the generated Render Layers node, the stats of the build are shown
+    scene.compositing_settings.profile_build = True
+    scene.compositing_settings.profile_report_path = str(tmp_path / "build_profile.json")
+    generate(addon, bpy)
+    warm = draw_panel(addon, bpy)
+    enabled = addon.get_enabled_passes(scene, view_layer)
+    assert "DiffDir" in enabled
+    assert get_pass_rows(addon, warm) == [p for p in addon.DEFAULT_PASSES if p in enabled]
+    assert any(label.startswith("Loose: ") for label in warm.labels)
+    assert any(label.startswith("Lookups: mapped ") for label in warm.labels)
+
+def check_for_update(addon, monkeypatch, cache_path, version_json):
+    """Run the update check against a local version.json through the COMPOSITING_UPDATE_URL override."""
+    monkeypatch.setenv("COMPOSITING_UPDATE_URL", str(version_json))
+    checker = addon.UpdateChecker()
+    checker.start(addon.get_update_url(), str(cache_path), addon.bl_info["version"])
+    checker.thread.join(5)
+    return checker
+
+def test_published_version_matches_bl_info(addon, monkeypatch, tmp_path):
+    checker = check_for_update(addon, monkeypatch, tmp_path / "update_check.json", VERSION_JSON)
+    assert addon.parse_version(checker.result["latest_version"]) == addon.bl_info["version"]
+    assert not checker.result["update_available"]
+    # The release zip of the whole package (the README's install step), not a single file
+    assert checker.result["download_url"].endswith(f"/{addon.__name__}.zip")
+
+def test_newer_version_is_shown(addon, bpy, scene, monkeypatch, tmp_path):
+    version_json = tmp_path / "version.json"
+    major, minor = addon.bl_info["version"]
+    version_json.write_text(json.dumps({"latest_version": f"{major}.{minor + 1}", "download_url": "https://example.com"}))
+    checker = check_for_update(addon, monkeypatch, tmp_path / "update_check.json", version_json)
+    assert checker.result["update_available"]
+    monkeypatch.setattr(addon, "_update_checker", checker)
+    assert f"Update available: {major}.{minor + 1}" in draw_panel(addon, bpy).labels
+
+def write_exr(path, exr_magic, attributes, chunks):
+    """A single part scanline EXR: string attributes, the offset table, then the chunks."""
+    header = b""
+    for name, value in attributes.items():
+        value = value.encode()
+        header += name.encode() + b"\0string\0" + len(value).to_bytes(4, "little") + value
+    header += b"\0"
+    offset = 8 + len(header) + 8 * len(chunks)
+    table = b""
+    for chunk in chunks:
+        table += offset.to_bytes(8, "little")
+        offset += len(chunk)
+    path.write_bytes(exr_magic + (2).to_bytes(4, "little") + header + table + b"".join(chunks))
+    return str(path)
+
+def test_exr_hash_ignores_header_length(addon, tmp_path):
+    chunks = [y.to_bytes(4, "little") + (8).to_bytes(4, "little") + bytes(range(y, y + 8)) for y in range(4)]
+    short = write_exr(tmp_path / "short.exr", addon.EXR_MAGIC, {"comments": "a"}, chunks)
+    long = write_exr(tmp_path / "long.exr", addon.EXR_MAGIC, {"comments": "rendered on another machine"}, chunks)
+    assert addon.hash_exr_data(short) == addon.hash_exr_data(long)
+    changed = write_exr(tmp_path / "changed.exr", addon.EXR_MAGIC, {"comments": "a"}, chunks[:3] + [chunks[3][:-1] + b"\xff"])
+    assert addon.hash_exr_data(changed) != addon.hash_exr_data(short)
+
+def test_cryptomatte_index_rereads_rendered_frames(addon, scene, monkeypatch, tmp_path):
+    pattern = addon.OutputPattern("Cryptomatte_ViewLayer", ("ViewLayer",), str(tmp_path), "crypto_", ".exr", 4)
+    monkeypatch.setattr(addon, "get_cryptomatte_patterns", lambda scene: [pattern])
+
+    def render(frame, manifest):
+        attributes = {"cryptomatte/abc1234/name": "CryptoObject", "cryptomatte/abc1234/manifest": json.dumps(manifest)}
+        write_exr(tmp_path / pattern.file_name(frame), addon.EXR_MAGIC, attributes, [])
+
+    for frame in (1, 2):
+        render(frame, {"Cube": "3f800000"})
+    addon.update_cryptomatte_indexes(scene, [1, 2])
+    index_path = addon.get_cryptomatte_index_path(pattern)
+    os.utime(index_path, ns=(0, 10 ** 18))
+    for frame in (1, 2):
+        os.utime(tmp_path / pattern.file_name(frame), ns=(0, 10 ** 18 - 1))
+
+    # Frame 2 re-rendered after the cube was renamed
+    render(2, {"Box": "3f800000"})
+    os.utime(tmp_path / pattern.file_name(2), ns=(0, 10 ** 18 + 1))
+    [(_path, read, manifests, _seconds)] = addon.update_cryptomatte_indexes(scene, [1, 2])
+    assert (read, manifests) == (1, 2)
+    layer = addon.load_cryptomatte_index(index_path)["CryptoObject"]
+    assert layer["manifests"][layer["frames"][2]] == {"Box": "3f800000"}
+
+def test_hardlinked_frames_are_copied_apart(addon, tmp_path):
+    pattern = addon.OutputPattern("PNG_Output_ViewLayer", ("ViewLayer",), str(tmp_path), "beauty_", ".png", 4)
+    first = tmp_path / pattern.file_name(1)
+    first.write_bytes(b"frame 1")
+    os.link(first, tmp_path / pattern.file_name(2))
+    with open(addon.get_dedupe_manifest_path(pattern), "w") as f:
+        json.dump({"hardlinked": True, "duplicates": [[2, 2, 1]]}, f)
+
+    assert addon.break_frame_hardlinks([pattern], [2, 3]) == (1, [])
+    # Rendering frame 2 again truncates and rewrites only its own file
+    (tmp_path / pattern.file_name(2)).write_bytes(b"frame 2")
+    assert first.read_bytes() == b"frame 1"
+    assert os.stat(first).st_nlink == 1
+
+def stage_outputs(addon, bpy, scene, tmp_path):
+    settings = scene.compositing_settings
+    settings.use_staging = True
+    settings.staging_root = str(tmp_path / "staging")
+    generate(addon, bpy)
+    return addon.get_staging(scene)
+
+def test_staging_flush_leaves_other_renders_files(addon, bpy, scene, tmp_path):
+    staging = stage_outputs(addon, bpy, scene, tmp_path)
+    stager = addon.OutputStager()
+    stager.start(scene)
+    pattern = stager.patterns[0]
+    os.makedirs(pattern.directory, exist_ok=True)
+    own = os.path.join(pattern.directory, pattern.file_name(1))
+    # Another worker's frame in the same staged base, still being written
+    other = os.path.join(pattern.directory, pattern.file_name(5))
+    for path in (own, other):
+        with open(path, "wb") as f:
+            f.write(b"pixels")
+    scene.frame_set(1)
+    stager.frame_written(scene)
+    stager.stop()
+    assert os.path.exists(addon.map_staged_path(own, staging)) and not os.path.exists(own)
+    assert os.path.exists(other) and not os.path.exists(addon.map_staged_path(other, staging))
+
+def test_recompressed_files_wait_for_deduplication(addon, bpy, scene, tmp_path, monkeypatch):
+    stage_outputs(addon, bpy, scene, tmp_path)
+    stager = addon.OutputStager()
+    stager.start(scene)
+    pattern = stager.patterns[0]
+    monkeypatch.setattr(addon, "_deferred_compression", type("Deferred", (), {"patterns": [pattern], "recompressor": object()}))
+    os.makedirs(pattern.directory, exist_ok=True)
+    path = os.path.join(pattern.directory, pattern.file_name(1))
+    with open(path, "wb") as f:
+        f.write(b"pixels")
+    # Recompressed before render_post of its frame has reached deduplication: held back
+    stager.recompressed_file(path)
+    assert path not in stager.queued
+    stager.queue_frame(1)
+    assert path in stager.queued
+    stager.stop()
+
+def test_script_run_skips_installed_addon(addon, bpy):
+    # Run as a script (blender --python cli.py) while the installed add-on is registered
+    handlers = {name: list(getattr(bpy.app.handlers, name)) for name, _handler in addon.TELEMETRY_HANDLERS}
+    runpy.run_path(addon.CLI_SCRIPT, run_name="__main__")
+    assert {name: list(getattr(bpy.app.handlers, name)) for name in handlers} == handlers
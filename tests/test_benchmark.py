@@ -0,0 +1,28 @@
+"""GENERATE NODES on synthetic scenes against the bpy stub, compared with tests/benchmark_baseline.json."""
+
+import json
+import os
+
+import pytest
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+# Same cases as the benchmark-generate command line defaults
+VIEW_LAYER_COUNTS = (1, 10, 50, 200)
+CRYPTOMATTE_DEPTHS = (0, 6, 16)
+# Node and link counts must match exactly, timings may be this many times slower (other machines, noise)
+TOLERANCE = float(os.environ.get("COMPOSITING_BENCHMARK_TOLERANCE", "4.0"))
+
+def test_generation_matches_baseline(addon):
+    results = [addon.benchmark_generation(view_layer_count, crypto_depth, repeats=2)
+               for view_layer_count in VIEW_LAYER_COUNTS for crypto_depth in CRYPTOMATTE_DEPTHS]
+    if os.environ.get("COMPOSITING_UPDATE_BASELINE"):
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(addon.make_benchmark_report(results), f, indent=2)
+            f.write("\n")
+        pytest.skip(f"Baseline written to {BASELINE_PATH}")
+
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    cases = {(result["view_layers"], result["cryptomatte_depth"]) for result in results}
+    assert cases == {(entry["view_layers"], entry["cryptomatte_depth"]) for entry in baseline["results"]}
+    assert addon.compare_benchmark(results, baseline, TOLERANCE) == []
@@ -0,0 +1,162 @@
+"""Routing decisions of the graph plan compiler, without Blender."""
+
+import os
+import subprocess
+import sys
+
+from compositing_plan import (
+    EXR_FULL_FORMAT, EXR_PIZ_FORMAT, PNG_FORMAT, PLAN_VERSION, BuildProfiler, LayerInputs, SettingsSnapshot,
+    clear_plan_cache, compile_graph_plan, compile_layer_plan, count_filter_layouts, discover_sockets, get_graph_plan,
+    plan_fingerprint, set_build_profiler,
+)
+
+SOCKETS = (
+    "Image", "Alpha", "Depth", "Mist", "Normal", "Position", "Vector", "UV", "Denoising Albedo", "Denoising Normal",
+    "Diffuse Direct", "Diffuse Indirect", "Diffuse Color", "Glossy Direct", "Emit", "Shadow Catcher",
+)
+
+def make_snapshot(**fields):
+    values = dict(set_alpha=(), denoise=(), albedo=(), normal=(), denoise_mode='ACCURATE', shared_prefilter=False,
+                  base_path="/renders", prefix="", suffix="")
+    values.update(fields)
+    return SettingsSnapshot(**values)
+
+def make_layer(outputs=SOCKETS, **fields):
+    return LayerInputs("CH", tuple(sorted(outputs)), **fields)
+
+def get_outputs(layer_plan):
+    return {node.name: node for node in layer_plan.nodes if node.bl_idname == 'CompositorNodeOutputFile'}
+
+def get_links_into(layer_plan, node_name):
+    return {link.to_socket: link for link in layer_plan.links if link.to_node == node_name}
+
+def test_png_routing():
+    layer_plan = compile_layer_plan(make_snapshot(), make_layer(), 0)
+    png = get_outputs(layer_plan)["PNG_Output_CH"]
+    assert png.format == PNG_FORMAT
+    assert dict(png.props)["base_path"] == os.path.join("/renders", "CH")
+    assert png.slots == ("CH_Beauty/CH_Beauty", "CH_DiffDir/CH_DiffDir", "CH_DiffInd/CH_DiffInd", "CH_DiffCol/CH_DiffCol",
+                         "CH_GlossDir/CH_GlossDir", "CH_Emit/CH_Emit", "CH_Shadow_Catcher/CH_Shadow_Catcher")
+    links = get_links_into(layer_plan, "PNG_Output_CH")
+    assert links["CH_Beauty/CH_Beauty"].from_socket == "Image"
+    assert links["CH_DiffDir/CH_DiffDir"].from_socket == "Diffuse Direct"
+
+def test_set_alpha_and_denoise_chain():
+    snapshot = make_snapshot(set_alpha=("DiffDir",), denoise=("DiffDir",), albedo=("DiffDir",))
+    layer_plan = compile_layer_plan(snapshot, make_layer(), 0)
+    assert get_links_into(layer_plan, "SetAlpha_CH_DiffDir")["Alpha"].from_socket == "Alpha"
+    denoise_links = get_links_into(layer_plan, "Denoise_CH_DiffDir")
+    assert denoise_links["Image"].from_node == "SetAlpha_CH_DiffDir"
+    assert denoise_links["Albedo"].from_socket == "Denoising Albedo"
+    assert "Normal" not in denoise_links
+    assert get_links_into(layer_plan, "PNG_Output_CH")["CH_DiffDir/CH_DiffDir"].from_node == "Denoise_CH_DiffDir"
+
+def test_shared_prefilter_renormalises_normals():
+    snapshot = make_snapshot(denoise=("DiffDir",), albedo=("DiffDir",), normal=("DiffDir",), shared_prefilter=True)
+    layer_plan = compile_layer_plan(snapshot, make_layer(), 0)
+    nodes = {node.name: node for node in layer_plan.nodes}
+    assert dict(nodes["Denoise_CH_DiffDir"].props)["prefilter"] == 'NONE'
+    denoise_links = get_links_into(layer_plan, "Denoise_CH_DiffDir")
+    assert denoise_links["Albedo"].from_node == "Prefilter_CH_Albedo"
+    assert denoise_links["Normal"].from_node == "PrefilterRemap_CH_NormalUnit"
+    unit_links = get_links_into(layer_plan, "PrefilterRemap_CH_NormalUnit")
+    assert unit_links["Image"].from_node == "PrefilterRemap_CH_NormalDecodeSub"
+    assert unit_links["Image_001"].from_node == "PrefilterMath_CH_NormalLength"
+    assert dict(nodes["PrefilterRemap_CH_NormalUnit"].props)["blend_type"] == 'DIVIDE'
+    assert dict(nodes["PrefilterMath_CH_NormalLength"].props)["operation"] == 'SQRT'
+
+def test_exr_routing_follows_pass_policy():
+    outputs = get_outputs(compile_layer_plan(make_snapshot(), make_layer(), 0))
+    assert outputs["EXR_CH"].slots == ("Normal", "Vector", "UV")
+    assert outputs["EXRLossless_CH"].slots == ("Mist",)
+    assert outputs["EXRFull_CH"].slots == ("Depth", "Position")
+    assert outputs["EXRFull_CH"].format == EXR_FULL_FORMAT
+    assert dict(outputs["EXRFull_CH"].props)["base_path"] == os.path.join("/renders", "CH", "CH_EXR_Full", "CH_EXR_Full")
+
+def test_cryptomatte_routing():
+    layer = make_layer(SOCKETS + ("CryptoObject00",), cryptomatte=("CryptoObject00", "CryptoObject01"))
+    layer_plan = compile_layer_plan(make_snapshot(), layer, 0)
+    crypto = get_outputs(layer_plan)["Cryptomatte_CH"]
+    assert crypto.format == EXR_PIZ_FORMAT
+    assert crypto.slots == ("CryptoObject00",)
+    assert "Missing cryptomatte pass: CryptoObject01 for CH" in layer_plan.warnings
+
+def test_no_cryptomatte_output_without_passes():
+    assert "Cryptomatte_CH" not in get_outputs(compile_layer_plan(make_snapshot(), make_layer(), 0))
+
+def test_aov_routing():
+    layer = make_layer(SOCKETS + ("mask", "tint"), aovs=(("mask", 'VALUE'), ("tint", 'COLOR'), ("unused", 'COLOR')))
+    layer_plan = compile_layer_plan(make_snapshot(), layer, 0)
+    outputs = get_outputs(layer_plan)
+    assert "AOV_mask" in outputs["EXRLossless_CH"].slots
+    assert "AOV_tint" in outputs["EXR_CH"].slots
+    assert get_links_into(layer_plan, "EXR_CH")["AOV_tint"].from_socket == "tint"
+    assert not any("unused" in slot for output in outputs.values() for slot in output.slots)
+
+def test_lightgroup_routing():
+    layer = make_layer(SOCKETS + ("Combined_key",), lightgroups=("key", "rim"))
+    layer_plan = compile_layer_plan(make_snapshot(), layer, 0)
+    assert "CH_LG_key/CH_LG_key" in get_outputs(layer_plan)["PNG_Output_CH"].slots
+    assert get_links_into(layer_plan, "PNG_Output_CH")["CH_LG_key/CH_LG_key"].from_socket == "Combined_key"
+    assert not any("rim" in link.to_socket for link in layer_plan.links)
+
+def test_socket_lookup_counts():
+    profiler = BuildProfiler("test")
+    set_build_profiler(profiler)
+    try:
+        routes = discover_sockets(("Image", "Diffuse Direct", "DiffInd", "Unknown Output"))
+    finally:
+        set_build_profiler(None)
+    assert routes.passes["DiffDir"] == "Diffuse Direct"
+    assert routes.passes["DiffInd"] == "DiffInd"
+    counters = profiler.counters
+    assert (counters["socket_lookup.mapped"], counters["socket_lookup.raw"], counters["socket_lookup.miss"]) == (2, 1, 1)
+
+def test_missing_alpha():
+    outputs = [s for s in SOCKETS if s != "Alpha"] + ["CryptoObject00"]
+    layer_plan = compile_layer_plan(make_snapshot(set_alpha=("DiffDir",)),
+                                    make_layer(outputs, cryptomatte=("CryptoObject00",)), 0)
+    assert "Missing Alpha pass in Render Layers for CH" in layer_plan.warnings
+    assert not any(node.bl_idname == 'CompositorNodeSetAlpha' for node in layer_plan.nodes)
+    # Only the PNG branch is dropped, data and Cryptomatte passes are still written
+    outputs = get_outputs(layer_plan)
+    assert "PNG_Output_CH" not in outputs
+    assert outputs["EXR_CH"].slots == ("Normal", "Vector", "UV")
+    assert outputs["EXRFull_CH"].slots == ("Depth", "Position")
+    assert outputs["Cryptomatte_CH"].slots == ("CryptoObject00",)
+    assert layer_plan.skipped_outputs == 1
+
+def test_skipped_outputs_count_every_dropped_target():
+    layer_plan = compile_layer_plan(make_snapshot(), make_layer(("Image", "Alpha")), 0)
+    assert set(get_outputs(layer_plan)) == {"PNG_Output_CH"}
+    # EXR and Cryptomatte outputs were always created before
+    assert layer_plan.skipped_outputs == 2
+
+def test_filter_layouts_match_both_compiles():
+    layers = (make_layer(), LayerInputs("BG", tuple(sorted(SOCKETS))))
+    fields = dict(set_alpha=("DiffDir", "DiffInd", "GlossDir"), denoise=("DiffDir", "DiffInd", "Emit"), normal=("Emit",))
+    plans = {group_filters: compile_graph_plan(make_snapshot(group_filters=group_filters, **fields), layers)
+             for group_filters in (False, True)}
+    for group_filters, plan in plans.items():
+        totals = count_filter_layouts(plan, group_filters)
+        for layout, other in (("loose", plans[False]), ("grouped", plans[True])):
+            assert totals[layout] == (sum(len(layer_plan.nodes) for layer_plan in other.layers),
+                                      sum(len(layer_plan.links) for layer_plan in other.layers))
+        # Both layers share the DiffDir/DiffInd group
+        assert totals["groups"] == 1
+
+def test_plan_cache_reuses_plans_by_fingerprint():
+    clear_plan_cache()
+    layers = (make_layer(),)
+    plan = get_graph_plan(make_snapshot(), layers)
+    assert get_graph_plan(make_snapshot(), layers) is plan
+    changed = get_graph_plan(make_snapshot(denoise=("DiffDir",)), layers)
+    assert changed is not plan
+    assert changed.fingerprint != plan.fingerprint
+    assert plan.fingerprint == plan_fingerprint(make_snapshot(), layers)
+    assert PLAN_VERSION > 0
+
+def test_imports_without_bpy():
+    code = "import sys, compositing_plan; sys.exit('bpy' in sys.modules)"
+    package_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "galih_compositing")
+    assert subprocess.run([sys.executable, "-c", code], cwd=package_dir).returncode == 0